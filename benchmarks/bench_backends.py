@@ -0,0 +1,117 @@
+"""Compare import plus load time of the snippet storage backends.
+
+The same synthetic snippets are written as a DuckDB database, an SQLite
+database and flat JSON and YAML files. Each is then loaded in a fresh
+interpreter, so the timings include importing palmoni and the backend's
+own modules (``duckdb``, ``sqlite3``, ``json`` or ``yaml``) the way
+``palmoni start`` and ``palmoni list`` pay for them.
+
+Usage: python benchmarks/bench_backends.py [--rows 100 1000 10000 100000]
+"""
+
+import argparse
+import json
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import duckdb
+import yaml
+
+from synthetic import generate_snippet_db
+
+# Run in a fresh interpreter per measurement; prints the import, open and
+# load times in milliseconds.
+PROBE = """
+import sys, time
+started = time.perf_counter()
+from palmoni_core.core.database import SnippetDatabase
+imported = time.perf_counter()
+db = SnippetDatabase(sys.argv[1], idle_timeout=0)
+db.open()
+opened = time.perf_counter()
+triggers, expansions = db.load_columns()
+loaded = time.perf_counter()
+assert len(triggers) == int(sys.argv[2])
+print((imported - started) * 1000, (opened - imported) * 1000, (loaded - opened) * 1000)
+"""
+
+
+def read_rows(db_path: Path):
+    conn = duckdb.connect(str(db_path), read_only=True)
+    try:
+        return conn.execute("SELECT trigger, expansion, category FROM snippets ORDER BY trigger").fetchall()
+    finally:
+        conn.close()
+
+
+def write_sqlite(path: Path, rows) -> Path:
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE snippets (trigger TEXT PRIMARY KEY, expansion TEXT NOT NULL, category TEXT DEFAULT '')")
+    conn.executemany("INSERT INTO snippets VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def write_json(path: Path, rows) -> Path:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({trigger: expansion for trigger, expansion, _ in rows}, f)
+    return path
+
+
+def write_yaml(path: Path, rows) -> Path:
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.dump(
+            {trigger: expansion for trigger, expansion, _ in rows},
+            f,
+            Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper),
+        )
+    return path
+
+
+def measure(path: Path, rows: int, repeat: int):
+    """Best of ``repeat`` fresh-process runs, as (import, open, load) in ms."""
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE, str(path), str(rows)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        timings = tuple(float(value) for value in output.split())
+        if best is None or sum(timings) < sum(best):
+            best = timings
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    print(f"{'rows':>10} {'backend':<8} {'size (KB)':>10} {'import':>8} {'open':>8} {'load':>8} {'total (ms)':>11}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for rows in args.rows:
+            db_path = generate_snippet_db(Path(temp_dir) / f"snippets-{rows}.db", rows)
+            snippets = read_rows(db_path)
+            files = {
+                "duckdb": db_path,
+                "sqlite": write_sqlite(Path(temp_dir) / f"snippets-{rows}.sqlite", snippets),
+                "json": write_json(Path(temp_dir) / f"snippets-{rows}.json", snippets),
+                "yaml": write_yaml(Path(temp_dir) / f"snippets-{rows}.yaml", snippets),
+            }
+            
+            for name, path in files.items():
+                imported, opened, loaded = measure(path, rows, args.repeat)
+                size = path.stat().st_size / 1024
+                total = imported + opened + loaded
+                print(f"{rows:>10} {name:<8} {size:>10.0f} {imported:>8.1f} {opened:>8.1f} {loaded:>8.1f} {total:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare the row-tuple and columnar snippet load paths.
+
+All paths end with a snapshot (mapping plus compiled matcher), so the
+timings cover everything TextExpander does at startup after connecting.
+The columnar paths need the ``columnar`` extra (NumPy and/or PyArrow).
+
+Usage: python benchmarks/bench_load.py [--rows 1000 100000 1000000]
+"""
+
+import argparse
+import importlib.util
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import duckdb
+
+from palmoni_core.core.database import SnippetDatabase
+from palmoni_core.core.snapshot import SnippetSnapshot
+
+from synthetic import generate_snippet_db
+
+
+def load_fetchall(db_path: Path):
+    conn = duckdb.connect(str(db_path), read_only=True)
+    try:
+        result = conn.execute("SELECT trigger, expansion FROM snippets").fetchall()
+        snippets = {trigger: expansion for trigger, expansion in result}
+    finally:
+        conn.close()
+    return SnippetSnapshot.build(1, snippets, "aho-corasick")
+
+
+def load_columnar(db_path: Path, backend):
+    with patch("palmoni_core.core.database.get_columnar_backend", return_value=backend):
+        with SnippetDatabase(db_path, idle_timeout=0) as db:
+            triggers, expansions = db.load_columns()
+    return SnippetSnapshot.from_columns(1, triggers, expansions, "aho-corasick")
+
+
+def load_arrow_compact(db_path: Path):
+    with SnippetDatabase(db_path, idle_timeout=0) as db:
+        table = db.load_arrow()
+    return SnippetSnapshot.from_arrow(1, table, "aho-corasick")
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    backends = [None] + [name for name in ("numpy", "pyarrow") if importlib.util.find_spec(name)]
+    
+    print(f"{'rows':>10} {'path':<22} {'load (ms)':>10}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for rows in args.rows:
+            db_path = generate_snippet_db(Path(temp_dir) / f"snippets-{rows}.db", rows)
+            
+            elapsed = best_of(lambda: load_fetchall(db_path), args.repeat)
+            print(f"{rows:>10} {'fetchall tuples':<22} {elapsed * 1000:>10.1f}")
+            
+            for backend in backends:
+                name = f"columnar ({backend or 'fallback'})"
+                elapsed = best_of(lambda: load_columnar(db_path, backend), args.repeat)
+                print(f"{rows:>10} {name:<22} {elapsed * 1000:>10.1f}")
+
+            if "pyarrow" in backends:
+                elapsed = best_of(lambda: load_arrow_compact(db_path), args.repeat)
+                print(f"{rows:>10} {'arrow (compact store)':<22} {elapsed * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Replay keystrokes through TextExpander against synthetic snippet databases.
+
+Each database size runs in its own interpreter so that startup time and
+resident memory are not skewed by earlier runs. Keys go through
+``TextExpander._on_key_press`` exactly as an input source delivers
+them, with the output worker running and an in-memory output sink
+instead of a keyboard, so the per-key latency is what the listener
+thread spends on each key. No display or pynput backend is needed.
+
+Usage: python benchmarks/bench_replay.py [--rows 100 10000 100000 1000000]
+       [--keys 20000] [--stream recorded.txt] [--output results.json]
+
+A recorded stream is a UTF-8 text file replayed character by character;
+``\\b`` (backspace) deletes, newlines and tabs are sent as Enter and Tab.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import duckdb
+
+from synthetic import generate_snippet_db
+
+SIZES = [100, 10_000, 100_000, 1_000_000]
+
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while we refactor this module "
+    "and run the tests again before pushing to the remote branch for review"
+).split()
+
+
+def synthetic_stream(triggers: List[str], keys: int, trigger_rate: float, seed: int) -> str:
+    """Prose with triggers mixed in, the odd typo fixed with backspace."""
+    rng = random.Random(seed)
+    parts: List[str] = []
+    length = 0
+    while length < keys:
+        if triggers and rng.random() < trigger_rate:
+            word = rng.choice(triggers)
+        else:
+            word = rng.choice(WORDS)
+            if rng.random() < 0.03:
+                word += rng.choice(WORDS)[:2] + "\b\b"
+        separator = "\n" if rng.random() < 0.08 else " "
+        parts.append(word + separator)
+        length += len(word) + 1
+    return "".join(parts)[:keys]
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+def percentile(sorted_values: List[int], percent: float) -> int:
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+
+def run_child(db_path: Path, stream: str, cache_dir: Path) -> Dict[str, Any]:
+    """Measure one database size; runs in a fresh interpreter."""
+    logging.basicConfig(level=logging.ERROR)
+    baseline_rss = rss_bytes()
+    
+    started = time.perf_counter()
+    from palmoni_core.core.config import PalmoniConfig
+    from palmoni_core.core.expander import TextExpander
+    from palmoni_core.core.keyio import MemoryOutputSink, ReplayInputSource
+    import_ms = (time.perf_counter() - started) * 1000
+    
+    def make_config(snapshot_cache: bool) -> PalmoniConfig:
+        return PalmoniConfig(
+            database_file=db_path,
+            user_config_dir=cache_dir,
+            watch_snippets=False,
+            snapshot_cache=snapshot_cache,
+            paste_threshold=0,
+            output_queue_size=1024,
+            output_max_job_age=0,
+        )
+    
+    # Keys are fed to the expander directly below so each one can be timed;
+    # the replay source only tells it that injected output is not echoed
+    # back, so no replayed key is filtered while the worker injects.
+    source = ReplayInputSource.from_text(stream)
+    events = source.events
+    
+    def make_expander(snapshot_cache: bool) -> TextExpander:
+        return TextExpander(make_config(snapshot_cache), input_source=source, output_sink=MemoryOutputSink())
+    
+    started = time.perf_counter()
+    expander = make_expander(snapshot_cache=False)
+    startup_ms = (time.perf_counter() - started) * 1000
+    loaded_rss = rss_bytes()
+    
+    make_expander(snapshot_cache=True)
+    started = time.perf_counter()
+    make_expander(snapshot_cache=True)
+    cached_startup_ms = (time.perf_counter() - started) * 1000
+    
+    expander.output_worker.start()
+    
+    on_key_press = expander._on_key_press
+    clock = time.perf_counter_ns
+    latencies = []
+    replay_started = clock()
+    for event in events:
+        started_ns = clock()
+        on_key_press(event)
+        latencies.append(clock() - started_ns)
+    replay_ns = clock() - replay_started
+    expander.output_worker.wait_idle(timeout=60)
+    expander.output_worker.stop(timeout=5)
+    
+    latencies.sort()
+    worker = expander.output_worker.stats()
+    return {
+        "snippets": len(expander.snapshot),
+        "import_ms": import_ms,
+        "startup_ms": startup_ms,
+        "cached_startup_ms": cached_startup_ms,
+        "rss_mb": loaded_rss / 1024 / 1024,
+        "rss_delta_mb": (loaded_rss - baseline_rss) / 1024 / 1024,
+        "keys": len(events),
+        "keys_per_sec": len(events) / (replay_ns / 1e9) if replay_ns else 0.0,
+        "p50_us": percentile(latencies, 50) / 1000,
+        "p99_us": percentile(latencies, 99) / 1000,
+        "max_us": latencies[-1] / 1000 if latencies else 0.0,
+        "expansions": worker["jobs_submitted"],
+        "injections_completed": worker["jobs_completed"],
+        "events_filtered": expander.events_filtered,
+    }
+
+
+def sample_triggers(db_path: Path, count: int, seed: int) -> List[str]:
+    conn = duckdb.connect(str(db_path), read_only=True)
+    try:
+        conn.execute("SELECT setseed(?)", [seed / 2**31])
+        rows = conn.execute("SELECT trigger FROM snippets ORDER BY random() LIMIT ?", [count]).fetchall()
+    finally:
+        conn.close()
+    return [row[0] for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--keys", type=int, default=20_000, help="Length of the synthetic keystroke stream")
+    parser.add_argument("--trigger-rate", type=float, default=0.05, help="Share of synthetic words that are triggers")
+    parser.add_argument("--stream", type=Path, help="Replay this recorded keystroke file instead")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", type=Path, help="Keep generated databases here and reuse them")
+    parser.add_argument("--output", type=Path, help="Write JSON results here instead of stdout")
+    parser.add_argument("--child", nargs=3, metavar=("DB", "STREAM", "CACHE_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        db_path, stream_path, cache_dir = (Path(value) for value in args.child)
+        result = run_child(db_path, stream_path.read_text(encoding="utf-8"), cache_dir)
+        print(json.dumps(result))
+        return
+    
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        workdir = args.workdir or Path(temp_dir)
+        workdir.mkdir(parents=True, exist_ok=True)
+        
+        for rows in args.rows:
+            db_path = workdir / f"snippets-{rows}.db"
+            if not db_path.exists():
+                started = time.perf_counter()
+                generate_snippet_db(db_path, rows)
+                print(f"Generated {rows} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+            
+            if args.stream:
+                stream = args.stream.read_text(encoding="utf-8")
+            else:
+                stream = synthetic_stream(sample_triggers(db_path, 500, args.seed), args.keys, args.trigger_rate, args.seed)
+            stream_path = Path(temp_dir) / f"stream-{rows}.txt"
+            stream_path.write_text(stream, encoding="utf-8")
+            
+            cache_dir = Path(temp_dir) / f"config-{rows}"
+            child = subprocess.run(
+                [sys.executable, __file__, "--child", str(db_path), str(stream_path), str(cache_dir)],
+                capture_output=True,
+                text=True,
+            )
+            if child.returncode != 0:
+                print(child.stderr, file=sys.stderr)
+                sys.exit(f"Benchmark failed for {rows} rows")
+            
+            result = dict(rows=rows, **json.loads(child.stdout.strip().splitlines()[-1]))
+            results.append(result)
+            print(
+                f"{rows:>9} rows: startup {result['startup_ms']:8.1f}ms "
+                f"(cached {result['cached_startup_ms']:6.1f}ms), "
+                f"p50 {result['p50_us']:6.1f}us p99 {result['p99_us']:7.1f}us, "
+                f"rss {result['rss_mb']:7.1f}MB",
+                file=sys.stderr,
+            )
+    
+    report = {
+        "benchmark": "keystroke-replay",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "stream": str(args.stream) if args.stream else f"synthetic ({args.keys} keys, trigger rate {args.trigger_rate})",
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
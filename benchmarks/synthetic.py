@@ -0,0 +1,69 @@
+"""Synthetic snippet databases for the benchmarks.
+
+Triggers follow the ``namespace::name`` shape of the bundled snippets
+(``git::st``, ``py::class``, then ``git::st1``... once every pair is used)
+and expansions mix one-liners with multi-line templates.
+"""
+
+import duckdb
+from pathlib import Path
+
+NAMESPACES = [
+    "py", "git", "sql", "doc", "pip", "js", "ts", "go", "rs", "sh",
+    "k8s", "tf", "aws", "gcp", "npm", "email", "md", "re", "http", "dj",
+]
+
+NAMES = [
+    "st", "cm", "co", "br", "class", "def", "main", "test", "log", "req",
+    "get", "post", "put", "del", "sel", "ins", "upd", "join", "imp", "ex",
+    "for", "if", "try", "with", "list", "dict", "map", "env", "run", "cfg",
+    "sig", "hdr", "todo", "fix", "ty", "thx", "addr", "date", "tmpl", "init",
+]
+
+SCHEMA = """
+    CREATE TABLE snippets (
+        trigger TEXT PRIMARY KEY,
+        expansion TEXT NOT NULL,
+        category TEXT DEFAULT '',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def generate_snippet_db(path: Path, rows: int, seed: float = 0.42) -> Path:
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+    
+    conn = duckdb.connect(str(path))
+    try:
+        conn.execute(SCHEMA)
+        conn.execute("SELECT setseed(?)", [seed])
+        conn.execute(
+            """
+            INSERT INTO snippets (trigger, expansion, category)
+            SELECT
+                ns || '::' || name || CASE WHEN i < ? THEN '' ELSE (i // ?)::VARCHAR END,
+                CASE WHEN i % 10 = 0
+                    THEN 'def ' || ns || '_' || i::VARCHAR || '():\n    ' || repeat('pass  # template body\n    ', 1 + (random() * 8)::INTEGER)
+                    ELSE ns || ' command ' || i::VARCHAR || ' --flag ' || repeat('x', (random() * 40)::INTEGER)
+                END,
+                ns
+            FROM (
+                SELECT
+                    i,
+                    list_extract(?, 1 + (i % ?)::INTEGER) AS ns,
+                    list_extract(?, 1 + ((i // ?) % ?)::INTEGER) AS name
+                FROM range(?) t(i)
+            )
+            """,
+            [
+                len(NAMESPACES) * len(NAMES), len(NAMESPACES) * len(NAMES),
+                NAMESPACES, len(NAMESPACES),
+                NAMES, len(NAMESPACES), len(NAMES),
+                rows,
+            ],
+        )
+    finally:
+        conn.close()
+    return path
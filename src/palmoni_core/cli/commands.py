@@ -2,17 +2,16 @@ import logging
 import sys
 import os
 import subprocess
+import json
+import time
 import signal
 from pathlib import Path
 import typer
-from typing import Optional
+from typing import List, Optional
 
-from ..core import TextExpander, load_config, ensure_user_setup
+from ..core import load_config, ensure_user_setup
+from ..core.control import ControlError, send_command
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 app = typer.Typer(
@@ -21,7 +20,13 @@ app = typer.Typer(
     add_completion=False
 )
 
+diag_app = typer.Typer(help="Performance diagnostics")
+app.add_typer(diag_app, name="diag")
+ctl_app = typer.Typer(help="Control the running daemon over its socket")
+app.add_typer(ctl_app, name="ctl")
+
 PIDFILE = Path.home() / ".palmoni" / "palmoni.pid"
+SOCKET_PATH = PIDFILE.parent / "palmoni.sock"
 
 
 def write_pidfile():
@@ -48,20 +53,29 @@ def cleanup_pidfile():
         pass
 
 
-def daemonize():
+def wait_for_exit(pid: int, timeout: float = 2.0) -> bool:
+    """Wait for a process to exit, returning False if it is still alive"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            os.kill(pid, 0)
+        except OSError:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def daemonize(extra_args: Optional[List[str]] = None):
     """Cross-platform daemon implementation"""
+    command = [sys.executable, '-m', 'palmoni_core.cli.commands', 'start', '--no-daemon'] + (extra_args or [])
     if os.name == 'nt':  # Windows
-        subprocess.Popen([
-            sys.executable, '-m', 'palmoni_core.cli.commands', 'start', '--no-daemon'
-        ], creationflags=subprocess.DETACHED_PROCESS)
+        subprocess.Popen(command, creationflags=subprocess.DETACHED_PROCESS)
         print("Palmoni started in background")
         sys.exit(0)
     else:  # Unix-like (macOS, Linux)
         # Use subprocess instead of fork to preserve session context for accessibility
         with open(os.devnull, 'w') as devnull:
-            subprocess.Popen([
-                sys.executable, '-m', 'palmoni_core.cli.commands', 'start', '--no-daemon'
-            ], stdout=devnull, stderr=devnull, stdin=None)
+            subprocess.Popen(command, stdout=devnull, stderr=devnull, stdin=None)
         print("Palmoni started in background")
         sys.exit(0)
 
@@ -70,7 +84,8 @@ def daemonize():
 def start(
     config_file: Optional[Path] = typer.Option(None, "--config", "-c"),
     verbose: bool = typer.Option(False, "--verbose", "-v"),
-    no_daemon: bool = typer.Option(False, "--no-daemon", help="Run in foreground")
+    no_daemon: bool = typer.Option(False, "--no-daemon", help="Run in foreground"),
+    profile: bool = typer.Option(False, "--profile", help="Record hot-path latency histograms; printed on exit with --no-daemon, otherwise via 'palmoni ctl profile'")
 ):
     if verbose:
         logging.getLogger().setLevel(logging.DEBUG)
@@ -89,7 +104,10 @@ def start(
             cleanup_pidfile()
     
     if not no_daemon:
-        daemonize()
+        if profile:
+            # The daemon's stdout goes to /dev/null, so its exit report is lost
+            print("Recording latency histograms; view them with 'palmoni ctl profile'")
+        daemonize(["--profile"] if profile else None)
     
     # Write PID file for daemon processes
     write_pidfile()
@@ -105,6 +123,8 @@ def start(
     try:
         ensure_user_setup()
         config = load_config(config_file)
+        if profile:
+            config.instrumentation = True
         
         if no_daemon:
             print("Starting palmoni text expander...")
@@ -112,8 +132,16 @@ def start(
             print(f"Database: {config.database_file}")
             print("Press Ctrl+C to stop")
         
-        with TextExpander(config) as expander:
-            expander.start()
+        from ..core.control import ControlServer, expander_handlers
+        from ..core.expander import TextExpander
+        from ..core.instrumentation import format_report
+        
+        with TextExpander(config) as expander, ControlServer(SOCKET_PATH, expander_handlers(expander)):
+            try:
+                expander.start()
+            finally:
+                if profile:
+                    print(format_report(expander.instrumentation.to_dict(), title="\nHot-path latency"))
             
     except KeyboardInterrupt:
         if no_daemon:
@@ -130,6 +158,16 @@ def start(
 @app.command()
 def stop():
     """Stop the running palmoni daemon"""
+    try:
+        result = send_command(SOCKET_PATH, "shutdown")
+        if not wait_for_exit(result["pid"]):
+            print(f"Palmoni (PID: {result['pid']}) is still shutting down")
+            return
+        print(f"Stopped palmoni (PID: {result['pid']})")
+        return
+    except ControlError:
+        pass
+    
     pid = read_pidfile()
     if not pid:
         print("Palmoni is not running")
@@ -155,6 +193,13 @@ def stop():
 @app.command()
 def status():
     """Check if palmoni is running"""
+    try:
+        result = send_command(SOCKET_PATH, "ping")
+        print(f"Palmoni is running (PID: {result['pid']}, {result['snippets']} snippets)")
+        return
+    except ControlError:
+        pass
+    
     pid = read_pidfile()
     if not pid:
         print("Palmoni is not running")
@@ -182,8 +227,13 @@ def status():
 @app.command()
 def list(
     config_file: Optional[Path] = typer.Option(None, "--config", "-c"),
-    verbose: bool = typer.Option(False, "--verbose", "-v")
+    verbose: bool = typer.Option(False, "--verbose", "-v"),
+    category: Optional[str] = typer.Option(None, "--category", help="Only list this category"),
+    prefix: Optional[str] = typer.Option(None, "--prefix", "-p", help="Only list triggers starting with this"),
+    limit: Optional[int] = typer.Option(None, "--limit", "-n", min=0, help="Show at most this many snippets"),
+    offset: int = typer.Option(0, "--offset", min=0, help="Skip this many snippets first"),
 ):
+    """List snippets from every source, merged, in trigger order"""
     if verbose:
         logging.getLogger().setLevel(logging.DEBUG)
         logging.getLogger('palmoni_core').setLevel(logging.DEBUG)
@@ -191,27 +241,40 @@ def list(
     try:
         ensure_user_setup()
         config = load_config(config_file)
-        expander = TextExpander(config)
-        snippets = expander.get_snippets()
         
-        if not snippets:
-            print("No snippets found.")
-            print(f"Check your database: {config.database_file}")
-            return
-            
-        print(f"Loaded {len(snippets)} snippets from database:")
-        print("-" * 60)
+        from ..core.packs import SnippetQuery
+        from ..core.sources import resolve_sources
         
-        for trigger in sorted(snippets.keys()):
-            expansion = snippets[trigger]
-            
-            if len(expansion) > 50:
-                display_expansion = expansion[:47] + "..."
-            else:
-                display_expansion = expansion
+        with SnippetQuery([s.path for s in resolve_sources(config)], category=category, prefix=prefix) as query:
+            total = query.count()
+            if not total:
+                if category is not None or prefix:
+                    print("No snippets match.")
+                else:
+                    print("No snippets found.")
+                    print(f"Check your database: {config.database_file}")
+                return
+        
+            filtered = " matching" if category is not None or prefix else ""
+            header = f"Loaded {total}{filtered} snippets from database"
+            if limit is not None or offset:
+                first, last = offset + 1, total if limit is None else min(total, offset + limit)
+                header += f" (showing {first}-{last})" if first <= last else f" (none after the first {total})"
+            print(f"{header}:")
+            print("-" * 60)
             
-            display_expansion = display_expansion.replace('\n', '\\n')
-            print(f"{trigger:<25} → {display_expansion}")
+            for rows in query.batches(limit=limit, offset=offset):
+                lines = []
+                for trigger, expansion, _ in rows:
+                    if len(expansion) > 50:
+                        display_expansion = expansion[:47] + "..."
+                    else:
+                        display_expansion = expansion
+        
+                    display_expansion = display_expansion.replace('\n', '\\n')
+                    lines.append(f"{trigger:<25} → {display_expansion}\n")
+                sys.stdout.write("".join(lines))
+                sys.stdout.flush()
             
     except Exception as e:
         logger.error(f"Failed to list snippets: {e}")
@@ -220,6 +283,172 @@ def list(
         sys.exit(1)
 
 
+@app.command()
+def replay(
+    events_file: Path = typer.Argument(..., help="Keystroke file: UTF-8 text, \\b for backspace"),
+    config_file: Optional[Path] = typer.Option(None, "--config", "-c"),
+    sink: str = typer.Option("memory", "--sink", help="Where expansions go: memory or pynput"),
+    delay: float = typer.Option(0.0, "--delay", help="Seconds to wait between keys"),
+    show_output: bool = typer.Option(False, "--show-output", help="Print the resulting text (memory sink only)"),
+    profile: bool = typer.Option(False, "--profile", help="Print hot-path latency histograms"),
+):
+    """Replay a recorded keystroke file through the expander, without a keyboard"""
+    from ..core.expander import TextExpander
+    from ..core.instrumentation import format_report
+    from ..core.keyio import MemoryOutputSink, ReplayInputSource, create_output_sink
+    
+    try:
+        config = load_config(config_file)
+        config.watch_snippets = False
+        if profile:
+            config.instrumentation = True
+        
+        output = create_output_sink(sink)
+        source = ReplayInputSource.from_file(events_file, delay=delay, echo=output)
+        with TextExpander(config, input_source=source, output_sink=output) as expander:
+            expander.start()
+            stats = expander.get_stats()
+    except Exception as e:
+        logger.error(f"Failed to replay {events_file}: {e}")
+        sys.exit(1)
+    
+    keys_per_sec = source.delivered / source.elapsed if source.elapsed else 0.0
+    print(f"Replayed {source.delivered} keys in {source.elapsed:.2f}s ({keys_per_sec:.0f} keys/sec)")
+    print(f"Expansions: {stats['injection']['expansions']}, characters kept on screen: {stats['injection']['chars_kept']}")
+    if profile:
+        print(format_report(expander.instrumentation.to_dict(), title="\nHot-path latency"))
+    if show_output and isinstance(output, MemoryOutputSink):
+        print("-" * 60)
+        print(output.text)
+
+
+@app.command()
+def stats(
+    config_file: Optional[Path] = typer.Option(None, "--config", "-c"),
+    limit: int = typer.Option(10, "--limit", "-n", help="Number of triggers to show"),
+    days: Optional[int] = typer.Option(None, "--days", help="Only count the last N days"),
+):
+    """Show the most used triggers and keystrokes saved"""
+    from ..core.analytics import load_usage
+    
+    # Ask a running daemon to write out what it has buffered first.
+    try:
+        send_command(SOCKET_PATH, "flush")
+    except ControlError:
+        pass
+    
+    try:
+        config = load_config(config_file)
+        usage = load_usage(config.user_config_dir / "analytics.db", limit=limit, days=days)
+    except Exception as e:
+        logger.error(f"Failed to read usage analytics: {e}")
+        sys.exit(1)
+    
+    period = f" in the last {days} days" if days is not None else ""
+    print(f"Expansions{period}: {usage['expansions']}")
+    print(f"Keystrokes saved: {usage['keystrokes_saved']}")
+    if not usage["top"]:
+        if not config.analytics:
+            print("Usage analytics are off. Set 'analytics: true' in config.yml to record which")
+            print(f"triggers you expand, locally in {config.user_config_dir / 'analytics.db'}.")
+        return
+    
+    print(f"{'Trigger':<25} {'Uses':>8} {'Saved':>10}")
+    print("-" * 45)
+    for trigger, uses, saved in usage["top"]:
+        print(f"{trigger:<25} {uses:>8} {saved:>10}")
+
+
+@app.command()
+def expand(
+    files: Optional[List[Path]] = typer.Argument(None, help="Files to expand; reads stdin when none are given"),
+    config_file: Optional[Path] = typer.Option(None, "--config", "-c"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Worker processes for multiple files (default: one per core)"),
+    quiet: bool = typer.Option(False, "--quiet", "-q", help="Do not report throughput on stderr"),
+):
+    """Expand triggers in files or stdin and write the result to stdout"""
+    from ..core.batch import StreamExpander, expand_files, expand_stream, load_snapshot
+    
+    started = time.perf_counter()
+    try:
+        config = load_config(config_file)
+        if files:
+            bytes_read = expansions = 0
+            for result in expand_files(config, files, sys.stdout, jobs):
+                bytes_read += result.bytes_read
+                expansions += result.expansions
+        else:
+            expander = StreamExpander(load_snapshot(config), config.boundary_chars)
+            bytes_read = expand_stream(expander, sys.stdin, sys.stdout)
+            expansions = expander.expansions
+        sys.stdout.flush()
+    except Exception as e:
+        logger.error(f"Failed to expand input: {e}")
+        sys.exit(1)
+    
+    if not quiet:
+        elapsed = time.perf_counter() - started
+        megabytes = bytes_read / 1024 / 1024
+        rate = megabytes / elapsed if elapsed else 0.0
+        print(f"Expanded {expansions} triggers in {megabytes:.2f} MB ({elapsed:.2f}s, {rate:.2f} MB/s)", file=sys.stderr)
+
+
+@app.command("import")
+def import_snippets(
+    source: Path = typer.Argument(..., help="CSV, JSON or Parquet file with trigger and expansion columns"),
+    into: Optional[Path] = typer.Option(None, "--into", help="Database to import into (default: your user database)"),
+    file_format: Optional[str] = typer.Option(None, "--format", help="csv, json or parquet (default: from the file extension)"),
+    category: Optional[str] = typer.Option(None, "--category", help="Category for rows that do not have one"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Validate the file without writing anything"),
+    config_file: Optional[Path] = typer.Option(None, "--config", "-c"),
+):
+    """Import snippets from a CSV, JSON or Parquet file"""
+    from ..core.packs import PackError, import_pack
+    from ..core.sources import user_database_file
+    
+    try:
+        config = load_config(config_file)
+        database_file = into or user_database_file(config)
+        report = import_pack(database_file, source, file_format=file_format, category=category, dry_run=dry_run)
+    except PackError as e:
+        print(e)
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Failed to import {source}: {e}")
+        sys.exit(1)
+    
+    action = "Validated" if dry_run else "Imported"
+    print(f"{action} {report.rows} snippets for {database_file} ({report.inserted} new, {report.updated} updated)")
+    print(f"Took {report.elapsed:.2f}s ({report.rows_per_sec:,.0f} rows/sec)")
+
+
+@app.command("export")
+def export_snippets(
+    destination: Path = typer.Argument(..., help="CSV, JSON or Parquet file to write"),
+    source: Optional[Path] = typer.Option(None, "--from", help="Export this database instead of all snippet sources merged"),
+    file_format: Optional[str] = typer.Option(None, "--format", help="csv, json or parquet (default: from the file extension)"),
+    category: Optional[str] = typer.Option(None, "--category", help="Only export this category"),
+    config_file: Optional[Path] = typer.Option(None, "--config", "-c"),
+):
+    """Export snippets to a CSV, JSON or Parquet file"""
+    from ..core.packs import export_pack
+    from ..core.sources import resolve_sources
+    
+    started = time.perf_counter()
+    try:
+        config = load_config(config_file)
+        databases = [source] if source is not None else [s.path for s in resolve_sources(config)]
+        count = export_pack(databases, destination, file_format=file_format, category=category)
+    except Exception as e:
+        logger.error(f"Failed to export snippets: {e}")
+        sys.exit(1)
+    
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else 0.0
+    print(f"Exported {count} snippets to {destination}")
+    print(f"Took {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+
+
 @app.command()
 def config(
     show: bool = typer.Option(False, "--show"),
@@ -249,8 +478,43 @@ def config(
             print(f"Database: {config.database_file}")
             print(f"Poll interval: {config.poll_interval}s")
             print(f"Log level: {config.log_level}")
+            print(f"Matcher: {config.matcher}")
+            print(f"Output queue: {config.output_queue_size} jobs ({config.output_overflow_policy}, max age {config.output_max_job_age}s)")
+            if config.paste_threshold:
+                print(f"Paste expansions of {config.paste_threshold}+ chars via {config.clipboard_backend} clipboard")
+            else:
+                print("Paste injection: disabled")
+            print(f"Hot reload: {'on' if config.watch_snippets else 'off'} (debounce {config.reload_debounce}s)")
+            print(f"Snapshot cache: {'on' if config.snapshot_cache else 'off'} ({config.user_config_dir / 'cache'})")
+            if config.compress_threshold:
+                print(f"Snippet store: {config.snippet_store} (compress bodies of {config.compress_threshold}+ bytes)")
+            else:
+                print(f"Snippet store: {config.snippet_store}")
+            if config.expansion_loading == "lazy":
+                print(f"Expansion loading: lazy (LRU of {config.expansion_cache_size})")
+            else:
+                print("Expansion loading: eager")
+            print(f"Storage backend (user database): {config.storage_backend}")
+            print(f"Usage analytics: {'on' if config.analytics else 'off'} ({config.user_config_dir / 'analytics.db'})")
             print(f"Boundary chars: {sorted(config.boundary_chars)}")
             
+            from ..core.expansions import ExpansionCache
+            from ..core.sources import SnippetSources
+            
+            expansion_cache = ExpansionCache(config.expansion_cache_size) if config.expansion_loading == "lazy" else None
+            sources = SnippetSources(config, expansion_cache)
+            try:
+                sources.load()
+            finally:
+                sources.close()
+            print("Snippet sources (later ones take precedence):")
+            for source in sources.stats():
+                if source["status"] in ("loaded", "cached"):
+                    via = "snapshot cache" if source["status"] == "cached" else f"{source['backend']} database"
+                    print(f"  {source['name']}: {source['path']} - {source['snippets']} snippets in {source['load_ms']:.1f}ms ({via})")
+                else:
+                    print(f"  {source['name']}: {source['path']} - {source['status']}")
+            
         except Exception as e:
             print(f"Error showing configuration: {e}")
             sys.exit(1)
@@ -259,7 +523,120 @@ def config(
         print("Use --show to display configuration or --init to initialize")
 
 
+def control(command: str):
+    """Send a command to the daemon, exiting with an error if it is not reachable"""
+    try:
+        return send_command(SOCKET_PATH, command)
+    except ControlError as e:
+        print(f"Palmoni daemon not reachable: {e}")
+        sys.exit(1)
+
+
+@ctl_app.command("ping")
+def ctl_ping():
+    """Check that the daemon is responding"""
+    started = time.perf_counter()
+    result = control("ping")
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"Palmoni is running (PID: {result['pid']}, {result['snippets']} snippets), replied in {elapsed:.1f}ms")
+
+
+@ctl_app.command("stats")
+def ctl_stats():
+    """Print the daemon's runtime statistics as JSON"""
+    print(json.dumps(control("stats"), indent=2, sort_keys=True))
+
+
+@ctl_app.command("profile")
+def ctl_profile(as_json: bool = typer.Option(False, "--json", help="Print the raw histograms as JSON")):
+    """Print the daemon's hot-path latency histograms"""
+    from ..core.instrumentation import format_report
+    
+    result = control("profile")
+    if as_json:
+        print(json.dumps(result, indent=2, sort_keys=True))
+    else:
+        print(format_report(result))
+
+
+@ctl_app.command("reload")
+def ctl_reload():
+    """Reload snippets in the running daemon"""
+    result = control("reload")
+    if not result["reloaded"]:
+        print(f"Reload failed, still serving {result['snippets']} snippets (version {result['version']})")
+        sys.exit(1)
+    print(f"Reloaded {result['snippets']} snippets (version {result['version']})")
+
+
+@ctl_app.command("shutdown")
+def ctl_shutdown():
+    """Stop the daemon"""
+    result = control("shutdown")
+    print(f"Shutdown requested (PID: {result['pid']})")
+
+
+@diag_app.command("memory")
+def diag_memory(
+    config_file: Optional[Path] = typer.Option(None, "--config", "-c"),
+    compress_threshold: Optional[int] = typer.Option(
+        None, "--compress-threshold", help="Also measure a compact store compressing bodies of this many bytes"
+    ),
+):
+    """Report bytes per snippet for the dict and compact snippet stores"""
+    from ..core.database import SnippetDatabase
+    from ..core.diagnostics import measure_snippet_memory
+    
+    try:
+        config = load_config(config_file)
+        if compress_threshold is None:
+            compress_threshold = config.compress_threshold or 512
+        
+        with SnippetDatabase(config.database_file, idle_timeout=0) as db:
+            count = db.get_snippet_count()
+            sizes = measure_snippet_memory(db.load_columns, compress_threshold)
+    except Exception as e:
+        logger.error(f"Failed to measure snippet memory: {e}")
+        sys.exit(1)
+    
+    print(f"Snippets: {count}")
+    print(f"{'Store':<16} {'Total':>12} {'Bytes/snippet':>14}")
+    print("-" * 44)
+    for name, size in sizes.items():
+        per_snippet = size / count if count else 0.0
+        print(f"{name:<16} {size / 1024 / 1024:>9.2f} MB {per_snippet:>14.1f}")
+
+
+@diag_app.command("startup")
+def diag_startup(
+    module: str = typer.Option("palmoni_core.cli.commands", "--module", "-m", help="Module whose import to time"),
+    top: int = typer.Option(20, "--top", "-n", help="Number of modules to show"),
+):
+    """Show a per-module import-time breakdown"""
+    from ..core.diagnostics import HEAVY_MODULES, measure_import_times
+    
+    try:
+        timings = measure_import_times(module)
+    except Exception as e:
+        logger.error(f"Failed to measure import times: {e}")
+        sys.exit(1)
+    
+    total_us = sum(timing.cumulative_us for timing in timings if timing.depth == 0)
+    heavy = sorted({timing.package for timing in timings if timing.package in HEAVY_MODULES})
+    
+    print(f"Importing {module} took {total_us / 1000:.1f}ms ({len(timings)} modules)")
+    print(f"Heavy dependencies loaded: {', '.join(heavy) if heavy else 'none'}")
+    print(f"{'Module':<48} {'Self':>10} {'Cumulative':>12}")
+    print("-" * 72)
+    for timing in sorted(timings, key=lambda timing: timing.cumulative_us, reverse=True)[:top]:
+        print(f"{timing.module:<48} {timing.self_us / 1000:>8.1f}ms {timing.cumulative_us / 1000:>10.1f}ms")
+
+
 def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
     app()
 
 
@@ -1,8 +1,6 @@
 """Core functionality for Palmoni text expander."""
 
 from .config import PalmoniConfig, load_config, save_config, ensure_user_setup
-from .expander import TextExpander
-from .database import SnippetDatabase
 
 __all__ = [
     "PalmoniConfig",
@@ -11,4 +9,21 @@ __all__ = [
     "ensure_user_setup",
     "TextExpander",
     "SnippetDatabase"
-]
\ No newline at end of file
+]
+
+_LAZY_IMPORTS = {
+    "TextExpander": ".expander",
+    "SnippetDatabase": ".database",
+}
+
+
+def __getattr__(name):
+    # The expander pulls in pynput and watchdog; import it only when used so
+    # that light commands such as ``palmoni status`` stay fast.
+    if name in _LAZY_IMPORTS:
+        from importlib import import_module
+        
+        value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,197 @@
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RING_CAPACITY = 4096
+BATCH_SIZE = 512
+MAX_FLUSH_TIME = 1.0
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS expansions (
+        expanded_at TIMESTAMP NOT NULL,
+        trigger TEXT NOT NULL,
+        keystrokes_saved INTEGER NOT NULL
+    )
+"""
+
+UsageEvent = Tuple[float, str, int]
+
+
+class UsageRecorder:
+    """Write-behind log of expansions in its own DuckDB file.
+    
+    ``record`` only appends to a bounded in-memory ring, so the caller never
+    waits on disk. A background thread drains the ring every
+    ``flush_interval`` seconds, or sooner once a full batch is waiting,
+    writing at most ``batch_size`` rows per transaction and giving up for
+    the round after ``MAX_FLUSH_TIME``. If the writer falls behind, the
+    ring drops its oldest events; a failed write drops its batch. The
+    connection is only held for the duration of a flush, so ``palmoni
+    stats`` can read the file in between.
+    """
+    
+    def __init__(
+        self,
+        path: Path,
+        flush_interval: float = 5.0,
+        capacity: int = RING_CAPACITY,
+        batch_size: int = BATCH_SIZE,
+    ):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.batch_size = max(batch_size, 1)
+        self._ring: deque = deque(maxlen=max(capacity, 1))
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+        self.events_recorded = 0
+        self.events_written = 0
+        self.events_dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    @property
+    def pending(self) -> int:
+        return len(self._ring)
+    
+    def record(self, trigger: str, keystrokes_saved: int) -> None:
+        ring = self._ring
+        if len(ring) == ring.maxlen:
+            self.events_dropped += 1
+        ring.append((time.time(), trigger, keystrokes_saved))
+        self.events_recorded += 1
+        if len(ring) >= self.batch_size:
+            self._wake.set()
+    
+    def start(self) -> None:
+        if self.running:
+            return
+        
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="palmoni-analytics", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = 2.0) -> None:
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+    
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+    
+    def _take_batch(self) -> List[UsageEvent]:
+        ring = self._ring
+        batch = []
+        while ring and len(batch) < self.batch_size:
+            try:
+                batch.append(ring.popleft())
+            except IndexError:
+                break
+        return batch
+    
+    def flush(self) -> int:
+        """Write pending events in batches; returns the number written."""
+        if not self._ring:
+            return 0
+        
+        with self._flush_lock:
+            started = time.perf_counter()
+            written = 0
+            conn = None
+            try:
+                import duckdb
+                
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = duckdb.connect(str(self.path))
+                conn.execute(SCHEMA)
+                while self._ring and time.perf_counter() - started < MAX_FLUSH_TIME:
+                    batch = self._take_batch()
+                    rows = [(datetime.fromtimestamp(ts), trigger, saved) for ts, trigger, saved in batch]
+                    try:
+                        conn.executemany("INSERT INTO expansions VALUES (?, ?, ?)", rows)
+                    except Exception as e:
+                        self.events_dropped += len(batch)
+                        self.failed_flushes += 1
+                        logger.warning(f"Dropped {len(batch)} usage events: {e}")
+                        break
+                    written += len(batch)
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.warning(f"Could not open analytics database {self.path}: {e}")
+            finally:
+                if conn is not None:
+                    conn.close()
+            
+            self.flushes += 1
+            self.events_written += written
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+        
+        if written:
+            logger.debug(f"Flushed {written} usage events in {self.last_flush_ms:.1f}ms")
+        return written
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "recorded": self.events_recorded,
+            "written": self.events_written,
+            "dropped": self.events_dropped,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+def load_usage(path: Path, limit: int = 10, days: Optional[int] = None) -> Dict[str, Any]:
+    """Totals and the most used triggers from an analytics database."""
+    usage: Dict[str, Any] = {"expansions": 0, "keystrokes_saved": 0, "top": []}
+    if not Path(path).exists():
+        return usage
+    
+    import duckdb
+    
+    where = ""
+    params: List[Any] = []
+    if days is not None:
+        where = "WHERE expanded_at >= ?"
+        params.append(datetime.now() - timedelta(days=days))
+    
+    conn = duckdb.connect(str(path), read_only=True)
+    try:
+        expansions, saved = conn.execute(
+            f"SELECT count(*), coalesce(sum(keystrokes_saved), 0) FROM expansions {where}", params
+        ).fetchone()
+        top = conn.execute(
+            f"""
+            SELECT trigger, count(*) AS uses, sum(keystrokes_saved) AS saved
+            FROM expansions {where}
+            GROUP BY trigger
+            ORDER BY uses DESC, saved DESC, trigger
+            LIMIT ?
+            """,
+            params + [limit],
+        ).fetchall()
+    finally:
+        conn.close()
+    
+    usage.update(expansions=expansions, keystrokes_saved=int(saved), top=top)
+    return usage
@@ -0,0 +1,257 @@
+import os
+import sys
+import shutil
+import logging
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Set, TextIO, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .config import PalmoniConfig
+
+from .buffer import TypedBuffer
+from .snapshot import SnippetSnapshot
+from .sources import SnippetSources
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# Characters handled like the Enter and Tab keys rather than typed text.
+LINE_KEYS = frozenset("\n\t\r")
+
+
+def load_snapshot(config: 'PalmoniConfig') -> SnippetSnapshot:
+    """Load the compiled snippets of every source, through the snapshot cache when enabled.
+    
+    Storing the snapshots lets worker processes map the same files instead
+    of each querying DuckDB and compiling the matchers again.
+    """
+    sources = SnippetSources(config)
+    try:
+        sources.load()
+        return sources.snapshot(1)
+    finally:
+        sources.close()
+
+
+class StreamExpander:
+    """Expands triggers in a stream of text by the rules the key listener uses.
+    
+    Each character is handled as if it had been typed: a trigger expands as
+    soon as its last character arrives, a trigger followed by a boundary
+    character expands with the boundary kept, and line breaks and tabs act
+    as Enter and Tab. Output older than the match buffer can no longer change,
+    so ``feed`` returns it straight away and only that short tail is held.
+    """
+    
+    def __init__(self, snapshot: SnippetSnapshot, boundary_chars: Set[str]):
+        self.snapshot = snapshot
+        self.boundary_chars = boundary_chars
+        self.buffer = TypedBuffer(snapshot.matcher)
+        self._tail = ""
+        self._state = snapshot.matcher.initial_state() if snapshot.matcher.incremental else 0
+        self._transitions: Dict[Tuple[int, str], Tuple[int, Optional[str]]] = {}
+        self._resets = frozenset(boundary_chars) | LINE_KEYS
+        self._expansions: Dict[str, str] = {}
+        self.chars_read = 0
+        self.expansions = 0
+    
+    def feed(self, text: str) -> str:
+        segments = [self._tail]
+        start = 0
+        
+        # Only the text since the last copied position is sliced out; each
+        # expansion trims the trigger (and boundary) off the end of the
+        # segments, which never reaches further back than the tail.
+        for end, trigger, boundary in self._scan(text):
+            segments.append(text[start:end])
+            drop = len(trigger) + len(boundary)
+            while drop:
+                last = segments.pop()
+                if len(last) > drop:
+                    segments.append(last[:-drop])
+                    break
+                drop -= len(last)
+            expansion = self._expansions.get(trigger)
+            if expansion is None:
+                expansion = self._expansions[trigger] = self.snapshot.snippets[trigger]
+            segments.append(expansion)
+            segments.append(boundary)
+            start = end
+            self.expansions += 1
+        
+        segments.append(text[start:])
+        self.chars_read += len(text)
+        
+        output = "".join(segments)
+        keep = self.buffer.capacity
+        self._tail = output[-keep:]
+        return output[:-keep]
+    
+    def _scan(self, text: str) -> Iterator[Tuple[int, str, str]]:
+        """Yield ``(end, trigger, boundary)`` for every expansion in ``text``."""
+        matcher = self.snapshot.matcher
+        if not matcher.incremental:
+            yield from self._scan_buffer(text)
+            return
+        
+        # Without backspaces nothing rewinds the automaton, and a state that
+        # matches expands and resets straight away, so the listener's
+        # boundary and Enter lookups can never find a trigger here: those
+        # characters only reset the state. Transitions are memoised with their
+        # match, as prose revisits the same few (state, char) pairs and a dict
+        # hit is much cheaper than walking a mapped automaton.
+        advance = matcher.advance
+        match_state = matcher.match_state
+        transitions = self._transitions
+        resets = self._resets
+        initial = matcher.initial_state()
+        state = self._state
+        
+        for index, ch in enumerate(text):
+            if ch in resets:
+                state = initial
+                continue
+            
+            step = transitions.get((state, ch))
+            if step is None:
+                next_state = advance(state, ch)
+                step = transitions[state, ch] = (next_state, match_state(next_state))
+            state, trigger = step
+            if trigger is not None:
+                yield index + 1, trigger, ""
+                state = initial
+        
+        self._state = state
+    
+    def _scan_buffer(self, text: str) -> Iterator[Tuple[int, str, str]]:
+        buffer = self.buffer
+        boundary_chars = self.boundary_chars
+        
+        for index, ch in enumerate(text):
+            if ch in LINE_KEYS:
+                trigger = buffer.match()
+                if trigger is not None:
+                    yield index + 1, trigger, ch
+                buffer.clear()
+                continue
+            
+            buffer.append(ch)
+            trigger = buffer.match()
+            if trigger is not None:
+                yield index + 1, trigger, ""
+                buffer.clear()
+            elif ch in boundary_chars:
+                trigger = buffer.match_before_last()
+                if trigger is not None:
+                    yield index + 1, trigger, ch
+                buffer.clear()
+    
+    def finish(self) -> str:
+        rest = self._tail
+        self._tail = ""
+        self.buffer.clear()
+        if self.snapshot.matcher.incremental:
+            self._state = self.snapshot.matcher.initial_state()
+        return rest
+
+
+@dataclass
+class ExpandResult:
+    source: str
+    bytes_read: int
+    expansions: int
+
+
+def read_chunks(stream: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def expand_stream(expander: StreamExpander, stream: TextIO, output: TextIO, chunk_size: int = CHUNK_SIZE) -> int:
+    """Copy ``stream`` to ``output`` with triggers expanded; returns bytes read."""
+    bytes_read = 0
+    for chunk in read_chunks(stream, chunk_size):
+        bytes_read += len(chunk.encode("utf-8"))
+        output.write(expander.feed(chunk))
+    output.write(expander.finish())
+    return bytes_read
+
+
+_worker_snapshot: Optional[SnippetSnapshot] = None
+_worker_boundary_chars: Set[str] = set()
+
+
+def _init_worker(config: 'PalmoniConfig') -> None:
+    global _worker_snapshot, _worker_boundary_chars
+    _worker_snapshot = load_snapshot(config)
+    _worker_boundary_chars = config.boundary_chars
+
+
+def _expand_file(path: str, output: TextIO) -> ExpandResult:
+    expander = StreamExpander(_worker_snapshot, _worker_boundary_chars)
+    with open(path, encoding="utf-8", newline="") as f:
+        bytes_read = expand_stream(expander, f, output)
+    return ExpandResult(path, bytes_read, expander.expansions)
+
+
+def _expand_file_to(path: str, out_dir: str) -> Tuple[ExpandResult, str]:
+    """Expand one file into a file of its own in ``out_dir``, for the parent to copy out."""
+    fd, out_path = tempfile.mkstemp(dir=out_dir, suffix=".txt")
+    with open(fd, "w", encoding="utf-8", newline="") as output:
+        result = _expand_file(path, output)
+    return result, out_path
+    
+
+def _fork_context() -> Optional[multiprocessing.context.BaseContext]:
+    """The fork start method where it is available and safe (not on macOS)."""
+    if sys.platform != "darwin" and "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def expand_files(
+    config: 'PalmoniConfig',
+    paths: Iterable[Path],
+    output: TextIO,
+    jobs: Optional[int] = None,
+) -> Iterator[ExpandResult]:
+    """Expand each file to ``output``, in order, across a pool of worker processes.
+    
+    The snapshot is loaded once here. Where processes are forked, workers
+    inherit it as it is, whatever the matcher or sources. Elsewhere each
+    worker loads its own: it maps the snapshot cache files this load has
+    just written, but sources that are not cached (glob packs, another
+    matcher, ``snapshot_cache: false``) are queried and compiled again.
+    
+    Every file is read and written in chunks. Workers write to a temporary
+    file per input, which is copied to ``output`` and removed as soon as
+    the files before it are done, so no whole output is held in memory.
+    A result is yielded once its file has been written.
+    """
+    paths = [str(path) for path in paths]
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(paths)))
+    _init_worker(config)
+    if jobs == 1:
+        for path in paths:
+            yield _expand_file(path, output)
+        return
+    
+    context = _fork_context()
+    initializer = None if context is not None else _init_worker
+    initargs = () if context is not None else (config,)
+    with tempfile.TemporaryDirectory(prefix="palmoni-expand-") as out_dir:
+        with ProcessPoolExecutor(jobs, mp_context=context, initializer=initializer, initargs=initargs) as pool:
+            for result, out_path in pool.map(_expand_file_to, paths, repeat(out_dir)):
+                with open(out_path, encoding="utf-8", newline="") as f:
+                    shutil.copyfileobj(f, output, CHUNK_SIZE)
+                os.unlink(out_path)
+                yield result
@@ -0,0 +1,72 @@
+from collections import deque
+from typing import Optional
+
+from .matcher import SnippetMatcher
+
+
+class TypedBuffer:
+    """Fixed-capacity tail of the typed text.
+    
+    Only the last ``capacity`` characters can ever be part of a trigger, so
+    older characters are dropped as new ones arrive. For incremental matchers
+    the automaton state after every retained character is kept alongside it,
+    which lets a backspace restore the previous state without rescanning.
+    """
+    
+    def __init__(self, matcher: SnippetMatcher, capacity: Optional[int] = None):
+        self.matcher = matcher
+        self.capacity = 0
+        self._chars: deque = deque()
+        self._states: deque = deque()
+        self.bind(matcher, capacity)
+    
+    def bind(self, matcher: SnippetMatcher, capacity: Optional[int] = None) -> None:
+        text = self.text()
+        
+        self.matcher = matcher
+        self.capacity = capacity if capacity is not None else matcher.max_length + 1
+        self.capacity = max(self.capacity, 1)
+        self._chars = deque(maxlen=self.capacity)
+        self._states = deque(maxlen=self.capacity + 1)
+        self.clear()
+        
+        for ch in text:
+            self.append(ch)
+    
+    def clear(self) -> None:
+        self._chars.clear()
+        self._states.clear()
+        if self.matcher.incremental:
+            self._states.append(self.matcher.initial_state())
+    
+    def append(self, ch: str) -> None:
+        self._chars.append(ch)
+        if self.matcher.incremental:
+            self._states.append(self.matcher.advance(self._states[-1], ch))
+    
+    def pop(self) -> None:
+        if not self._chars:
+            self.clear()
+            return
+        
+        self._chars.pop()
+        if self.matcher.incremental:
+            self._states.pop()
+    
+    def match(self) -> Optional[str]:
+        if self.matcher.incremental:
+            return self.matcher.match_state(self._states[-1])
+        return self.matcher.longest_suffix(self.text())
+    
+    def match_before_last(self) -> Optional[str]:
+        if not self._chars:
+            return None
+        if self.matcher.incremental:
+            return self.matcher.match_state(self._states[-2])
+        return self.matcher.longest_suffix(self.text()[:-1])
+    
+    def text(self) -> str:
+        return "".join(self._chars)
+    
+    def __len__(self) -> int:
+        return len(self._chars)
@@ -0,0 +1,329 @@
+import os
+import sys
+import mmap
+import time
+import zlib
+import struct
+import hashlib
+import logging
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .matcher import AhoCorasickMatcher, SnippetMatcher
+from .snapshot import SnippetSnapshot
+from .store import CompactSnippetStore, build_dict_store
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PALMSNAP"
+FORMAT_VERSION = 2
+NO_OUTPUT = 0xFFFFFFFF
+
+_HEADER = struct.Struct("<8sIIQQ32sIIIII16sI")
+_SECTION = struct.Struct("<QQ")
+_SECTIONS = (
+    ("trigger_offsets", "Q"),
+    ("trigger_blob", "B"),
+    ("expansion_offsets", "Q"),
+    ("expansion_blob", "B"),
+    ("edge_start", "I"),
+    ("edge_chars", "I"),
+    ("edge_targets", "I"),
+    ("fail", "I"),
+    ("output", "I"),
+    ("compressed", "B"),
+)
+_BYTE_ORDER = 1 if sys.byteorder == "little" else 2
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def hash_file(path: Path) -> bytes:
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+class MappedSnippets(CompactSnippetStore):
+    """Compact snippet store whose buffers are sections of a mapped file."""
+
+
+class MappedAhoCorasickMatcher(SnippetMatcher):
+    """Aho-Corasick automaton that runs directly on a snapshot file's tables.
+    
+    Each state's outgoing edges are stored sorted by code point, so a
+    transition is a binary search instead of a dict lookup; nothing has to
+    be rebuilt when the file is mapped.
+    """
+    
+    name = "aho-corasick"
+    incremental = True
+    
+    def __init__(self, snippets: MappedSnippets, edge_start, edge_chars, edge_targets, fail, output, max_length: int):
+        super().__init__(())
+        self.snippets = snippets
+        self._edge_start = edge_start
+        self._edge_chars = edge_chars
+        self._edge_targets = edge_targets
+        self._fail = fail
+        self._output = output
+        self.max_length = max_length
+        self.trigger_count = len(snippets)
+    
+    @property
+    def state_count(self) -> int:
+        return len(self._fail)
+    
+    def initial_state(self) -> int:
+        return 0
+    
+    def advance(self, state: int, ch: str) -> int:
+        code = ord(ch)
+        while True:
+            lo, hi = self._edge_start[state], self._edge_start[state + 1]
+            i = bisect_left(self._edge_chars, code, lo, hi)
+            if i < hi and self._edge_chars[i] == code:
+                return self._edge_targets[i]
+            if state == 0:
+                return 0
+            state = self._fail[state]
+    
+    def match_state(self, state: int) -> Optional[str]:
+        index = self._output[state]
+        return None if index == NO_OUTPUT else self.snippets.trigger(index)
+    
+    def longest_suffix(self, text: str) -> Optional[str]:
+        state = 0
+        for ch in text[-self.max_length:] if self.max_length else "":
+            state = self.advance(state, ch)
+        return self.match_state(state)
+
+
+class SnapshotCache:
+    """Compiled snippet snapshot stored next to the user configuration.
+    
+    The file holds the sorted triggers, their expansions and a flattened
+    Aho-Corasick automaton as aligned arrays that are used in place through
+    ``mmap``. It is keyed by the database path, its mtime and size, and a
+    BLAKE2 hash of its contents: a changed mtime with an unchanged hash (a
+    reinstall, a ``touch``) still counts as valid. The snippet store and
+    compression threshold it was written for are part of the key too, so
+    changing either in ``config.yml`` rebuilds the file; with the ``dict``
+    store the mapped expansions are copied into a dict when loaded.
+    """
+    
+    def __init__(self, cache_dir: Path, database_file: Path, store: str = "compact", compress_threshold: int = 0):
+        self.database_file = Path(database_file)
+        self.snippet_store = store
+        self.compress_threshold = compress_threshold if store == "compact" else 0
+        self.source_key = str(self.database_file.resolve())
+        name = hashlib.sha1(self.source_key.encode("utf-8")).hexdigest()[:16]
+        self.path = Path(cache_dir) / f"snapshot-{name}.bin"
+    
+    def _source_stat(self) -> Tuple[int, int]:
+        stat = self.database_file.stat()
+        return stat.st_mtime_ns, stat.st_size
+    
+    def load(self, version: int) -> Optional[SnippetSnapshot]:
+        if not self.path.exists():
+            return None
+        
+        started = time.perf_counter()
+        try:
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not map snapshot cache {self.path}: {e}")
+            return None
+        
+        try:
+            snapshot = self._read(mapped, version)
+        except (ValueError, struct.error, IndexError, TypeError) as e:
+            logger.warning(f"Ignoring corrupt snapshot cache {self.path}: {e}")
+            snapshot = None
+        
+        if snapshot is None:
+            try:
+                mapped.close()
+            except BufferError:
+                pass
+            return None
+        
+        logger.info(f"Loaded {len(snapshot)} snippets from snapshot cache in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return snapshot
+    
+    def _read(self, mapped: mmap.mmap, version: int) -> Optional[SnippetSnapshot]:
+        (magic, format_version, byte_order, mtime_ns, size, content_hash,
+         path_length, _, _, _, max_length, store, compress_threshold) = _HEADER.unpack_from(mapped, 0)
+        
+        if magic != MAGIC or format_version != FORMAT_VERSION or byte_order != _BYTE_ORDER:
+            return None
+        
+        offset = _HEADER.size
+        if bytes(mapped[offset:offset + path_length]).decode("utf-8") != self.source_key:
+            return None
+        offset = _align(offset + path_length)
+        
+        store = store.rstrip(b"\0").decode("utf-8")
+        if (store, compress_threshold) != (self.snippet_store, self.compress_threshold):
+            logger.info(f"Snapshot cache was built for the {store} snippet store, rebuilding from database")
+            return None
+        
+        if (mtime_ns, size) != self._source_stat():
+            if hash_file(self.database_file) != content_hash:
+                logger.info("Snapshot cache is stale, rebuilding from database")
+                return None
+            self._touch(mapped, offset=0)
+        
+        view = memoryview(mapped)
+        sections = {}
+        for name, typecode in _SECTIONS:
+            start, length = _SECTION.unpack_from(mapped, offset)
+            offset += _SECTION.size
+            section = view[start:start + length]
+            sections[name] = section if typecode == "B" else section.cast(typecode)
+        
+        snippets = MappedSnippets(
+            sections["trigger_offsets"],
+            sections["trigger_blob"],
+            sections["expansion_offsets"],
+            sections["expansion_blob"],
+            compressed=sections["compressed"] if self.compress_threshold else None,
+        )
+        matcher = MappedAhoCorasickMatcher(
+            snippets,
+            sections["edge_start"],
+            sections["edge_chars"],
+            sections["edge_targets"],
+            sections["fail"],
+            sections["output"],
+            max_length,
+        )
+        if self.snippet_store == "dict":
+            expansions = [snippets.expansion(index) for index in range(len(snippets))]
+            return SnippetSnapshot(version=version, snippets=build_dict_store(list(snippets), expansions), matcher=matcher)
+        return SnippetSnapshot(version=version, snippets=snippets, matcher=matcher)
+    
+    def _touch(self, mapped: mmap.mmap, offset: int) -> None:
+        mtime_ns, size = self._source_stat()
+        try:
+            with open(self.path, "r+b") as f:
+                header = bytearray(mapped[offset:offset + _HEADER.size])
+                fields = list(_HEADER.unpack_from(header))
+                fields[3], fields[4] = mtime_ns, size
+                f.seek(offset)
+                f.write(_HEADER.pack(*fields))
+        except OSError as e:
+            logger.debug(f"Could not refresh snapshot cache key: {e}")
+    
+    def store(self, snapshot: SnippetSnapshot) -> bool:
+        if not isinstance(snapshot.matcher, AhoCorasickMatcher):
+            return False
+        
+        started = time.perf_counter()
+        try:
+            data = self._serialize(snapshot)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, self.path)
+        except (OSError, OverflowError) as e:
+            logger.warning(f"Could not write snapshot cache {self.path}: {e}")
+            return False
+        
+        logger.debug(f"Wrote snapshot cache {self.path} ({len(data)} bytes) in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return True
+    
+    def _serialize(self, snapshot: SnippetSnapshot) -> bytes:
+        matcher: AhoCorasickMatcher = snapshot.matcher
+        mtime_ns, size = self._source_stat()
+        content_hash = hash_file(self.database_file)
+        
+        encoded = sorted((trigger.encode("utf-8"), trigger) for trigger in snapshot.snippets)
+        index_of = {trigger: index for index, (_, trigger) in enumerate(encoded)}
+        
+        trigger_offsets, trigger_blob = self._pack_strings(raw for raw, _ in encoded)
+        compressed = array("B")
+        expansion_offsets, expansion_blob = self._pack_strings(
+            self._pack_body(snapshot.snippets[trigger].encode("utf-8"), compressed) for _, trigger in encoded
+        )
+        
+        goto, fail, output = matcher.tables()
+        edge_start = array("I", [0])
+        edge_chars = array("I")
+        edge_targets = array("I")
+        for edges in goto:
+            for ch, target in sorted(edges.items(), key=lambda item: ord(item[0])):
+                edge_chars.append(ord(ch))
+                edge_targets.append(target)
+            edge_start.append(len(edge_chars))
+        
+        sections = {
+            "trigger_offsets": trigger_offsets,
+            "trigger_blob": trigger_blob,
+            "expansion_offsets": expansion_offsets,
+            "expansion_blob": expansion_blob,
+            "edge_start": edge_start,
+            "edge_chars": edge_chars,
+            "edge_targets": edge_targets,
+            "fail": array("I", fail),
+            "output": array("I", [NO_OUTPUT if trigger is None else index_of[trigger] for trigger in output]),
+            "compressed": compressed,
+        }
+        
+        path_bytes = self.source_key.encode("utf-8")
+        header = _HEADER.pack(
+            MAGIC, FORMAT_VERSION, _BYTE_ORDER, mtime_ns, size, content_hash,
+            len(path_bytes), len(encoded), len(goto), len(edge_chars), matcher.max_length,
+            self.snippet_store.encode("utf-8"), self.compress_threshold,
+        )
+        
+        offset = _align(len(header) + len(path_bytes))
+        data_offset = _align(offset + _SECTION.size * len(_SECTIONS))
+        table = bytearray()
+        payload = bytearray()
+        for name, _ in _SECTIONS:
+            raw = sections[name].tobytes() if isinstance(sections[name], array) else bytes(sections[name])
+            start = data_offset + len(payload)
+            table += _SECTION.pack(start, len(raw))
+            payload += raw
+            payload += b"\0" * (_align(len(payload)) - len(payload))
+        
+        out = bytearray(header)
+        out += path_bytes
+        out += b"\0" * (offset - len(out))
+        out += table
+        out += b"\0" * (data_offset - len(out))
+        out += payload
+        return bytes(out)
+    
+    def _pack_body(self, body: bytes, compressed: array) -> bytes:
+        """Compress ``body`` the way :meth:`CompactSnippetStore.build` would."""
+        if self.compress_threshold and len(body) >= self.compress_threshold:
+            packed = zlib.compress(body)
+            if len(packed) < len(body):
+                compressed.append(1)
+                return packed
+        compressed.append(0)
+        return body
+    
+    @staticmethod
+    def _pack_strings(items) -> Tuple[array, bytearray]:
+        offsets = array("Q", [0])
+        blob = bytearray()
+        for raw in items:
+            blob += raw
+            offsets.append(len(blob))
+        return offsets, blob
+    
+    def clear(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
@@ -1,8 +1,7 @@
 import os
-import yaml
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterable, Optional
 
 
 @dataclass
@@ -12,10 +11,34 @@ class PalmoniConfig:
     poll_interval: float = 0.3
     boundary_chars: set = None
     log_level: str = "INFO"
+    matcher: str = "aho-corasick"
+    output_queue_size: int = 8
+    output_overflow_policy: str = "drop_oldest"
+    output_max_job_age: float = 2.0
+    paste_threshold: int = 200
+    paste_restore_delay: float = 0.1
+    clipboard_backend: str = "system"
+    injection_grace: float = 0.05
+    watch_snippets: bool = True
+    reload_debounce: float = 0.5
+    db_idle_timeout: float = 30.0
+    storage_backend: str = "auto"
+    snapshot_cache: bool = True
+    expansion_loading: str = "eager"
+    expansion_cache_size: int = 256
+    snippet_store: str = "dict"
+    compress_threshold: int = 0
+    instrumentation: bool = False
+    analytics: bool = False
+    analytics_flush_interval: float = 5.0
+    user_database: Optional[Path] = None
+    snippet_packs: list = None
     
     def __post_init__(self):
         if self.boundary_chars is None:
             self.boundary_chars = {" ", "\n", "\t"}
+        if self.snippet_packs is None:
+            self.snippet_packs = []
 
 
 def get_default_config_dir() -> Path:
@@ -40,6 +63,24 @@ def get_bundled_database_file() -> Path:
     return Path(__file__).parent.parent / "data" / "snippets.db"
 
 
+EXPANSION_LOADING_MODES = ("eager", "lazy")
+
+
+def _choice(config_file: Path, key: str, value, choices: Iterable[str], default: str) -> str:
+    """A config value that must be one of ``choices``; warns and keeps ``default`` otherwise.
+    
+    A typo would otherwise only surface when the daemon starts, where the
+    error goes to /dev/null.
+    """
+    value = str(value)
+    choices = sorted(choices)
+    if value in choices:
+        return value
+    print(f"Warning: Unknown {key} '{value}' in {config_file}, expected one of: {', '.join(choices)}")
+    print(f"Using the default {key} '{default}'.")
+    return default
+
+
 def load_config(config_file: Optional[Path] = None) -> PalmoniConfig:
     config_dir = get_default_config_dir()
     
@@ -52,6 +93,12 @@ def load_config(config_file: Optional[Path] = None) -> PalmoniConfig:
     )
     
     if config_file.exists():
+        import yaml
+        from .database import STORAGE_BACKENDS
+        from .matcher import MATCHERS
+        from .output import CLIPBOARDS, OVERFLOW_POLICIES
+        from .store import SNIPPET_STORES
+        
         try:
             with open(config_file, "r", encoding="utf-8") as f:
                 config_data = yaml.safe_load(f) or {}
@@ -60,6 +107,63 @@ def load_config(config_file: Optional[Path] = None) -> PalmoniConfig:
                 config.poll_interval = float(config_data["poll_interval"])
             if "log_level" in config_data:
                 config.log_level = config_data["log_level"]
+            if "matcher" in config_data:
+                config.matcher = _choice(config_file, "matcher", config_data["matcher"], MATCHERS, config.matcher)
+            if "output_queue_size" in config_data:
+                config.output_queue_size = int(config_data["output_queue_size"])
+            if "output_overflow_policy" in config_data:
+                config.output_overflow_policy = _choice(
+                    config_file, "output_overflow_policy", config_data["output_overflow_policy"],
+                    OVERFLOW_POLICIES, config.output_overflow_policy,
+                )
+            if "output_max_job_age" in config_data:
+                config.output_max_job_age = float(config_data["output_max_job_age"])
+            if "paste_threshold" in config_data:
+                config.paste_threshold = int(config_data["paste_threshold"])
+            if "paste_restore_delay" in config_data:
+                config.paste_restore_delay = float(config_data["paste_restore_delay"])
+            if "clipboard_backend" in config_data:
+                config.clipboard_backend = _choice(
+                    config_file, "clipboard_backend", config_data["clipboard_backend"], CLIPBOARDS, config.clipboard_backend
+                )
+            if "injection_grace" in config_data:
+                config.injection_grace = float(config_data["injection_grace"])
+            if "watch_snippets" in config_data:
+                config.watch_snippets = bool(config_data["watch_snippets"])
+            if "reload_debounce" in config_data:
+                config.reload_debounce = float(config_data["reload_debounce"])
+            if "db_idle_timeout" in config_data:
+                config.db_idle_timeout = float(config_data["db_idle_timeout"])
+            if "storage_backend" in config_data:
+                config.storage_backend = _choice(
+                    config_file, "storage_backend", config_data["storage_backend"],
+                    ["auto", *STORAGE_BACKENDS], config.storage_backend,
+                )
+            if "snapshot_cache" in config_data:
+                config.snapshot_cache = bool(config_data["snapshot_cache"])
+            if "expansion_loading" in config_data:
+                config.expansion_loading = _choice(
+                    config_file, "expansion_loading", config_data["expansion_loading"],
+                    EXPANSION_LOADING_MODES, config.expansion_loading,
+                )
+            if "expansion_cache_size" in config_data:
+                config.expansion_cache_size = int(config_data["expansion_cache_size"])
+            if "snippet_store" in config_data:
+                config.snippet_store = _choice(
+                    config_file, "snippet_store", config_data["snippet_store"], SNIPPET_STORES, config.snippet_store
+                )
+            if "compress_threshold" in config_data:
+                config.compress_threshold = int(config_data["compress_threshold"])
+            if "instrumentation" in config_data:
+                config.instrumentation = bool(config_data["instrumentation"])
+            if "analytics" in config_data:
+                config.analytics = bool(config_data["analytics"])
+            if "analytics_flush_interval" in config_data:
+                config.analytics_flush_interval = float(config_data["analytics_flush_interval"])
+            if config_data.get("user_database"):
+                config.user_database = Path(config_data["user_database"]).expanduser()
+            if "snippet_packs" in config_data:
+                config.snippet_packs = [Path(pack).expanduser() for pack in config_data["snippet_packs"] or []]
             
         except Exception as e:
             print(f"Warning: Could not load config file {config_file}: {e}")
@@ -74,9 +178,33 @@ def save_config(config: PalmoniConfig, config_file: Optional[Path] = None) -> No
     
     config_file.parent.mkdir(parents=True, exist_ok=True)
     
+    import yaml
+    
     config_data = {
         "poll_interval": config.poll_interval,
         "log_level": config.log_level,
+        "matcher": config.matcher,
+        "output_queue_size": config.output_queue_size,
+        "output_overflow_policy": config.output_overflow_policy,
+        "output_max_job_age": config.output_max_job_age,
+        "paste_threshold": config.paste_threshold,
+        "paste_restore_delay": config.paste_restore_delay,
+        "clipboard_backend": config.clipboard_backend,
+        "injection_grace": config.injection_grace,
+        "watch_snippets": config.watch_snippets,
+        "reload_debounce": config.reload_debounce,
+        "db_idle_timeout": config.db_idle_timeout,
+        "storage_backend": config.storage_backend,
+        "snapshot_cache": config.snapshot_cache,
+        "expansion_loading": config.expansion_loading,
+        "expansion_cache_size": config.expansion_cache_size,
+        "snippet_store": config.snippet_store,
+        "compress_threshold": config.compress_threshold,
+        "instrumentation": config.instrumentation,
+        "analytics": config.analytics,
+        "analytics_flush_interval": config.analytics_flush_interval,
+        "user_database": str(config.user_database) if config.user_database else None,
+        "snippet_packs": [str(pack) for pack in config.snippet_packs],
     }
     
     try:
@@ -0,0 +1,173 @@
+import os
+import json
+import socket
+import logging
+import threading
+import socketserver
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CONTROL_SUPPORTED = hasattr(socket, "AF_UNIX")
+
+Handler = Callable[[Dict[str, Any]], Any]
+
+
+class ControlError(Exception):
+    pass
+
+
+class _ControlRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.control.dispatch(line)
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+if CONTROL_SUPPORTED:
+    class _ControlSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+class ControlServer:
+    """Serves JSON-lines commands from the CLI over a Unix domain socket.
+    
+    Each request is one JSON object with a ``command`` key; the reply is
+    ``{"ok": true, "result": ...}`` or ``{"ok": false, "error": ...}``. The
+    socket is created readable by its owner only.
+    """
+    
+    def __init__(self, path: Path, handlers: Dict[str, Handler]):
+        self.path = Path(path)
+        self.handlers = dict(handlers)
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self) -> None:
+        if not CONTROL_SUPPORTED:
+            logger.warning("Control socket not supported on this platform")
+            return
+        if self._server is not None:
+            return
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() or self.path.is_symlink():
+            self.path.unlink()
+        
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _ControlSocketServer(str(self.path), _ControlRequestHandler)
+        except OSError as e:
+            logger.warning(f"Could not create control socket {self.path}: {e}")
+            return
+        finally:
+            os.umask(old_umask)
+        self._server.control = self
+        
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.1}, name="palmoni-control", daemon=True
+        )
+        self._thread.start()
+        logger.debug(f"Control socket listening on {self.path}")
+    
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+        
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+    
+    def dispatch(self, line: bytes) -> Dict[str, Any]:
+        try:
+            request = json.loads(line)
+            command = request["command"]
+        except (ValueError, TypeError, KeyError):
+            return {"ok": False, "error": "Malformed request"}
+        
+        handler = self.handlers.get(command)
+        if handler is None:
+            return {"ok": False, "error": f"Unknown command '{command}', expected one of: {', '.join(sorted(self.handlers))}"}
+        
+        try:
+            return {"ok": True, "result": handler(request)}
+        except Exception as e:
+            logger.error(f"Error handling control command '{command}': {e}")
+            return {"ok": False, "error": str(e)}
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def send_command(path: Path, command: str, timeout: float = 2.0, **arguments) -> Any:
+    """Send one command to a running daemon and return its result.
+    
+    Raises ``ControlError`` if nothing is listening on ``path`` or the
+    daemon reports an error.
+    """
+    if not CONTROL_SUPPORTED:
+        raise ControlError("Control socket not supported on this platform")
+    
+    request = dict(arguments, command=command)
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as reply:
+                line = reply.readline()
+    except OSError as e:
+        raise ControlError(f"Could not reach palmoni daemon: {e}")
+    
+    if not line:
+        raise ControlError("Palmoni daemon closed the connection")
+    
+    response = json.loads(line)
+    if not response.get("ok"):
+        raise ControlError(response.get("error", "Unknown error"))
+    return response.get("result")
+
+
+def expander_handlers(expander) -> Dict[str, Handler]:
+    """Control commands backed by a running ``TextExpander``."""
+    
+    def ping(request):
+        return {"pid": os.getpid(), "snippets": len(expander.snapshot)}
+    
+    def reload(request):
+        reloaded = expander.reload_snippets()
+        return {"reloaded": reloaded, "version": expander.snapshot.version, "snippets": len(expander.snapshot)}
+    
+    def flush(request):
+        return {"written": expander.usage.flush() if expander.usage is not None else 0}
+    
+    def shutdown(request):
+        expander.request_stop()
+        return {"pid": os.getpid()}
+    
+    return {
+        "ping": ping,
+        "stats": lambda request: expander.get_stats(),
+        "profile": lambda request: expander.instrumentation.to_dict(),
+        "reload": reload,
+        "flush": flush,
+        "shutdown": shutdown,
+    }
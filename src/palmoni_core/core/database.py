@@ -1,32 +1,484 @@
-import duckdb
+import glob
+import time
 import logging
+import threading
+import importlib.util
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, TYPE_CHECKING
 from contextlib import contextmanager
 
+if TYPE_CHECKING:
+    import duckdb
+    import pyarrow
+
 logger = logging.getLogger(__name__)
 
 
+GLOB_CHARS = frozenset("*?[")
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+DUCKDB_MAGIC = b"DUCK"
+
+
+# Preferred order for load_columns. Fetching 200k rows, fetchnumpy took
+# ~60ms against ~75ms for Arrow plus to_pylist and ~130ms for fetchall,
+# and its object arrays are what the dict store and matcher need. Arrow
+# pays off for the compact store, which takes its buffers as they are;
+# see SnippetDatabase.load_arrow.
+COLUMNAR_BACKENDS = ("numpy", "pyarrow")
+
+
+@lru_cache(maxsize=None)
+def get_columnar_backend() -> Optional[str]:
+    for module in COLUMNAR_BACKENDS:
+        if importlib.util.find_spec(module) is not None:
+            return module
+    return None
+
+
+@lru_cache(maxsize=None)
+def has_arrow() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def is_glob(path: Path) -> bool:
+    return any(ch in GLOB_CHARS for ch in str(path))
+
+
+def is_parquet(path: Path) -> bool:
+    """Whether a snippet source is a Parquet file or a glob of them."""
+    return is_glob(path) or Path(path).suffix.lower() == ".parquet"
+
+
+def matching_files(path: Path) -> List[Path]:
+    """The files a source path names: itself, or a glob's current matches."""
+    if is_glob(path):
+        return [Path(match) for match in sorted(glob.glob(str(path)))]
+    return [Path(path)] if Path(path).exists() else []
+
+
+class StorageBackend:
+    """How one kind of snippet file is opened and queried.
+    
+    A backend holds no state of its own: ``connect`` returns whatever handle
+    its queries need, and :class:`SnippetDatabase` decides when to open,
+    share and close it.
+    """
+    
+    name = ""
+    extensions: Tuple[str, ...] = ()
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+    
+    def connect(self) -> Any:
+        raise NotImplementedError
+    
+    def disconnect(self, conn: Any) -> None:
+        pass
+    
+    def load_columns(self, conn: Any) -> Tuple[Sequence[str], Sequence[str]]:
+        raise NotImplementedError
+    
+    def load_trigger_ids(self, conn: Any) -> Tuple[Sequence[str], Sequence[int]]:
+        raise NotImplementedError
+    
+    def get_expansion(self, conn: Any, row_id: int, trigger: str) -> Optional[str]:
+        raise NotImplementedError
+    
+    def get_snippet_count(self, conn: Any) -> int:
+        raise NotImplementedError
+    
+    def get_snippet(self, conn: Any, trigger: str) -> Optional[str]:
+        raise NotImplementedError
+    
+    def search_snippets(self, conn: Any, query: str, limit: int) -> List[Tuple[str, str]]:
+        raise NotImplementedError
+
+
+class SqlStorage(StorageBackend):
+    """Queries shared by the SQL backends, over a DB-API style connection."""
+    
+    relation = "snippets"
+    like = "LIKE"
+    
+    def disconnect(self, conn) -> None:
+        conn.close()
+    
+    def _fetch_columns(self, conn, query: str, names: Tuple[str, str], result=None) -> Tuple[Sequence, Sequence]:
+        rows = (result if result is not None else conn.execute(query)).fetchall()
+        if not rows:
+            return [], []
+        # Transposing with zip runs in C, unlike two list comprehensions.
+        first, second = zip(*rows)
+        return first, second
+    
+    def load_columns(self, conn) -> Tuple[Sequence[str], Sequence[str]]:
+        return self._fetch_columns(conn, f"SELECT trigger, expansion FROM {self.relation}", ("trigger", "expansion"))
+    
+    def load_trigger_ids(self, conn) -> Tuple[Sequence[str], Sequence[int]]:
+        return self._fetch_columns(conn, f"SELECT trigger, rowid AS row_id FROM {self.relation}", ("trigger", "row_id"))
+    
+    def get_expansion(self, conn, row_id: int, trigger: str) -> Optional[str]:
+        result = conn.execute(f"SELECT trigger, expansion FROM {self.relation} WHERE rowid = ?", [int(row_id)]).fetchone()
+        if result and result[0] == trigger:
+            return result[1]
+        return self.get_snippet(conn, trigger)
+    
+    def get_snippet_count(self, conn) -> int:
+        result = conn.execute(f"SELECT COUNT(*) FROM {self.relation}").fetchone()
+        return result[0] if result else 0
+    
+    def get_snippet(self, conn, trigger: str) -> Optional[str]:
+        result = conn.execute(f"SELECT expansion FROM {self.relation} WHERE trigger = ?", [trigger]).fetchone()
+        return result[0] if result else None
+    
+    def search_snippets(self, conn, query: str, limit: int) -> List[Tuple[str, str]]:
+        pattern = f"%{query}%"
+        return conn.execute(
+            f"""
+            SELECT trigger, expansion FROM {self.relation}
+            WHERE trigger {self.like} ? OR expansion {self.like} ?
+            ORDER BY trigger
+            LIMIT ?
+            """,
+            [pattern, pattern, limit],
+        ).fetchall()
+
+
+class DuckDBStorage(SqlStorage):
+    """DuckDB database files, and Parquet files queried in place.
+    
+    A Parquet file, or a glob of them, is read through ``read_parquet``
+    from an in-memory connection; only the columns a query names are read.
+    """
+    
+    name = "duckdb"
+    extensions = (".duckdb", ".parquet")
+    like = "ILIKE"
+    
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self.is_parquet = is_parquet(path)
+        if self.is_parquet:
+            escaped = str(path).replace("'", "''")
+            self.relation = f"read_parquet('{escaped}')"
+    
+    def connect(self) -> 'duckdb.DuckDBPyConnection':
+        import duckdb
+        
+        if self.is_parquet:
+            return duckdb.connect()
+        return duckdb.connect(str(self.path), read_only=True)
+    
+    def _fetch_columns(self, conn, query: str, names: Tuple[str, str], result=None) -> Tuple[Sequence, Sequence]:
+        first, second = names
+        result = conn.execute(query)
+        backend = get_columnar_backend()
+        
+        if backend == "numpy":
+            columns = result.fetchnumpy()
+            return columns[first], columns[second]
+        
+        if backend == "pyarrow":
+            # Without NumPy there is no cheaper way from Arrow to the Python
+            # strings the dict store and matcher are built from.
+            fetch_arrow = getattr(result, "to_arrow_table", None) or result.fetch_arrow_table
+            table = fetch_arrow()
+            return table.column(first).to_pylist(), table.column(second).to_pylist()
+        
+        return super()._fetch_columns(conn, query, names, result)
+    
+    def load_trigger_ids(self, conn) -> Tuple[Sequence[str], Sequence[int]]:
+        # Parquet files have no stable row ids; -1 makes get_expansion
+        # look the trigger up instead.
+        if self.is_parquet:
+            return self._fetch_columns(conn, f"SELECT trigger, -1 AS row_id FROM {self.relation}", ("trigger", "row_id"))
+        return super().load_trigger_ids(conn)
+    
+    def get_expansion(self, conn, row_id: int, trigger: str) -> Optional[str]:
+        if row_id < 0:
+            return self.get_snippet(conn, trigger)
+        return super().get_expansion(conn, row_id, trigger)
+    
+    def load_arrow(self, conn) -> 'pyarrow.Table':
+        query = f"""
+            SELECT DISTINCT ON (trigger) trigger, expansion
+            FROM {self.relation}
+            WHERE trigger IS NOT NULL AND expansion IS NOT NULL
+            ORDER BY trigger
+        """
+        result = conn.execute(query)
+        fetch_arrow = getattr(result, "to_arrow_table", None) or result.fetch_arrow_table
+        return fetch_arrow()
+
+
+class SQLiteStorage(SqlStorage):
+    """SQLite files through the standard library, with the same ``snippets`` table."""
+    
+    name = "sqlite"
+    extensions = (".sqlite", ".sqlite3")
+    
+    def connect(self):
+        import sqlite3
+        
+        # The connection is shared between threads; SnippetDatabase
+        # serialises every query with its lock.
+        return sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+
+
+class FlatSnippets:
+    """Parsed contents of a flat snippet file, indexed by trigger."""
+    
+    def __init__(self, triggers: List[str], expansions: List[str]):
+        self.triggers = triggers
+        self.expansions = expansions
+        self.index = {trigger: row_id for row_id, trigger in enumerate(triggers)}
+
+
+class FlatFileStorage(StorageBackend):
+    """A JSON or YAML file read whole into memory.
+    
+    The file holds either a mapping of trigger to expansion or a list of
+    records with ``trigger`` and ``expansion`` keys. Parsing a few hundred
+    snippets this way is quicker than importing an SQL engine at all.
+    """
+    
+    name = "file"
+    extensions = (".json", ".yaml", ".yml")
+    
+    def connect(self) -> FlatSnippets:
+        with open(self.path, "r", encoding="utf-8") as f:
+            if self.path.suffix.lower() == ".json":
+                import json
+                
+                data = json.load(f)
+            else:
+                import yaml
+                
+                # The C loader, where PyYAML was built with it, parses an
+                # order of magnitude faster than the pure Python one.
+                data = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+        
+        if data is None:
+            data = {}
+        if isinstance(data, dict):
+            return FlatSnippets([str(trigger) for trigger in data], [str(expansion) for expansion in data.values()])
+        if isinstance(data, list):
+            return FlatSnippets([str(row["trigger"]) for row in data], [str(row["expansion"]) for row in data])
+        raise ValueError(f"{self.path} must hold a mapping or a list of snippets")
+    
+    def load_columns(self, conn: FlatSnippets) -> Tuple[Sequence[str], Sequence[str]]:
+        return conn.triggers, conn.expansions
+    
+    def load_trigger_ids(self, conn: FlatSnippets) -> Tuple[Sequence[str], Sequence[int]]:
+        return conn.triggers, list(range(len(conn.triggers)))
+    
+    def get_expansion(self, conn: FlatSnippets, row_id: int, trigger: str) -> Optional[str]:
+        if 0 <= row_id < len(conn.triggers) and conn.triggers[row_id] == trigger:
+            return conn.expansions[row_id]
+        return self.get_snippet(conn, trigger)
+    
+    def get_snippet_count(self, conn: FlatSnippets) -> int:
+        return len(conn.index)
+    
+    def get_snippet(self, conn: FlatSnippets, trigger: str) -> Optional[str]:
+        row_id = conn.index.get(trigger)
+        return conn.expansions[row_id] if row_id is not None else None
+    
+    def search_snippets(self, conn: FlatSnippets, query: str, limit: int) -> List[Tuple[str, str]]:
+        needle = query.lower()
+        matches = sorted(
+            (trigger, conn.expansions[row_id])
+            for trigger, row_id in conn.index.items()
+            if needle in trigger.lower() or needle in conn.expansions[row_id].lower()
+        )
+        return matches[:limit]
+
+
+STORAGE_BACKENDS: Dict[str, Type[StorageBackend]] = {
+    DuckDBStorage.name: DuckDBStorage,
+    SQLiteStorage.name: SQLiteStorage,
+    FlatFileStorage.name: FlatFileStorage,
+}
+
+
+def detect_storage_backend(path: Path, default: str = "auto") -> str:
+    """Pick the backend for a snippet file.
+    
+    Extensions that name one format decide on their own. Anything else
+    (such as the usual ``.db``) uses ``default``; ``auto`` reads the file
+    header to tell SQLite from DuckDB and assumes DuckDB otherwise.
+    """
+    if is_glob(path):
+        return DuckDBStorage.name
+    suffix = Path(path).suffix.lower()
+    for name, backend_class in STORAGE_BACKENDS.items():
+        if suffix in backend_class.extensions:
+            return name
+    if default != "auto":
+        return default
+    
+    try:
+        with open(path, "rb") as f:
+            header = f.read(16)
+    except OSError:
+        return DuckDBStorage.name
+    if header.startswith(SQLITE_MAGIC):
+        return SQLiteStorage.name
+    return DuckDBStorage.name
+
+
+def create_storage_backend(path: Path, name: str = "auto") -> StorageBackend:
+    if name != "auto" and name not in STORAGE_BACKENDS:
+        raise ValueError(
+            f"Unknown storage backend '{name}', expected one of: {', '.join(['auto'] + sorted(STORAGE_BACKENDS))}"
+        )
+    return STORAGE_BACKENDS[detect_storage_backend(path, name)](path)
+
+
 class SnippetDatabase:
-    def __init__(self, db_path: Path):
+    """Read-only access to a snippet database through one shared connection.
+    
+    The connection is opened lazily in read-only mode, so the bundled file
+    is never locked for writing and other processes can read it at the same
+    time. It is shared by every query, serialised with a lock, and closed
+    again after ``idle_timeout`` seconds without use (``0`` keeps it open
+    until ``close`` is called).
+    
+    What the file is and how it is queried is up to its storage backend
+    (see :func:`create_storage_backend`): a DuckDB database, a Parquet file
+    or glob of them, an SQLite file, or a flat JSON/YAML file.
+    """
+    
+    def __init__(self, db_path: Path, idle_timeout: float = 30.0, backend: str = "auto"):
         self.db_path = db_path
-        if not self.db_path.exists():
+        if not matching_files(db_path):
             raise FileNotFoundError(f"Database not found: {db_path}")
+        
+        self.backend = create_storage_backend(db_path, backend)
+        self.idle_timeout = idle_timeout
+        self.connections_opened = 0
+        self._conn: Optional[Any] = None
+        self._lock = threading.RLock()
+        self._last_used = 0.0
+        self._idle_timer: Optional[threading.Timer] = None
+    
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None
+    
+    @property
+    def is_parquet(self) -> bool:
+        return getattr(self.backend, "is_parquet", False)
+    
+    @property
+    def supports_arrow(self) -> bool:
+        return isinstance(self.backend, DuckDBStorage) and has_arrow()
+    
+    def open(self) -> Any:
+        with self._lock:
+            if self._conn is None:
+                self._conn = self.backend.connect()
+                self.connections_opened += 1
+                logger.debug(f"Opened read-only {self.backend.name} connection to {self.db_path}")
+            return self._conn
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            
+            if self._conn is not None:
+                self.backend.disconnect(self._conn)
+                self._conn = None
+                logger.debug(f"Closed connection to {self.db_path}")
+    
+    def _schedule_idle_close(self, delay: float) -> None:
+        self._idle_timer = threading.Timer(delay, self._close_if_idle)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+    
+    def _close_if_idle(self) -> None:
+        with self._lock:
+            self._idle_timer = None
+            if self._conn is None:
+                return
+            
+            idle_for = time.monotonic() - self._last_used
+            if idle_for >= self.idle_timeout:
+                self.close()
+            else:
+                self._schedule_idle_close(self.idle_timeout - idle_for)
     
     @contextmanager
     def _get_connection(self):
-        conn = duckdb.connect(str(self.db_path))
-        try:
-            yield conn
-        finally:
-            conn.close()
+        with self._lock:
+            conn = self.open()
+            try:
+                yield conn
+            finally:
+                self._last_used = time.monotonic()
+                if self.idle_timeout and self._idle_timer is None:
+                    self._schedule_idle_close(self.idle_timeout)
+    
+    def __enter__(self):
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
     
     def load_all_snippets(self) -> Dict[str, str]:
+        triggers, expansions = self.load_columns()
+        return dict(zip(triggers, expansions))
+    
+    def load_columns(self) -> Tuple[Sequence[str], Sequence[str]]:
+        """Fetch the trigger and expansion columns without per-row tuples.
+        
+        DuckDB sources use NumPy object arrays or Arrow arrays when either
+        library is installed and fall back to ``fetchall`` otherwise. For
+        Parquet sources only these two columns are read from the files.
+        """
+        with self._get_connection() as conn:
+            return self.backend.load_columns(conn)
+    
+    def load_trigger_ids(self) -> Tuple[Sequence[str], Sequence[int]]:
+        """Fetch only the triggers and their row ids, leaving expansions on disk."""
+        with self._get_connection() as conn:
+            return self.backend.load_trigger_ids(conn)
+    
+    def load_arrow(self) -> 'pyarrow.Table':
+        """Fetch the snippets as an Arrow table sorted by trigger, one row per trigger.
+        
+        Only DuckDB sources support this. The rows are sorted and
+        deduplicated by DuckDB, so the string columns can be used as they
+        are by :meth:`CompactSnippetStore.from_arrow`.
+        """
+        if not isinstance(self.backend, DuckDBStorage):
+            raise NotImplementedError(f"The {self.backend.name} backend cannot return Arrow tables")
         with self._get_connection() as conn:
-            result = conn.execute("SELECT trigger, expansion FROM snippets").fetchall()
-            return {trigger: expansion for trigger, expansion in result}
+            return self.backend.load_arrow(conn)
+    
+    def get_expansion(self, row_id: int, trigger: str) -> Optional[str]:
+        """Fetch one expansion by row id, checking it still belongs to ``trigger``.
+        
+        Row ids can shift when the database is rewritten, so a mismatch
+        falls back to looking the trigger up by key.
+        """
+        with self._get_connection() as conn:
+            return self.backend.get_expansion(conn, row_id, trigger)
     
     def get_snippet_count(self) -> int:
         with self._get_connection() as conn:
-            result = conn.execute("SELECT COUNT(*) FROM snippets").fetchone()
-            return result[0] if result else 0
\ No newline at end of file
+            return self.backend.get_snippet_count(conn)
+    
+    def get_snippet(self, trigger: str) -> Optional[str]:
+        with self._get_connection() as conn:
+            return self.backend.get_snippet(conn, trigger)
+    
+    def search_snippets(self, query: str, limit: int = 50) -> List[Tuple[str, str]]:
+        with self._get_connection() as conn:
+            return self.backend.search_snippets(conn, query, limit)
@@ -0,0 +1,101 @@
+import gc
+import sys
+import logging
+import subprocess
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from .store import create_snippet_store
+
+logger = logging.getLogger(__name__)
+
+ColumnLoader = Callable[[], Tuple[Sequence[str], Sequence[str]]]
+
+
+def _traced_size(build: Callable[[], object]) -> int:
+    gc.collect()
+    baseline, _ = tracemalloc.get_traced_memory()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    del result
+    return current - baseline
+
+
+def measure_snippet_memory(load_columns: ColumnLoader, compress_threshold: int = 0) -> Dict[str, int]:
+    """Measure the Python heap retained by each snippet representation.
+    
+    The columns are reloaded for every representation and dropped once it is
+    built, so the strings a plain dict keeps alive are counted against it
+    while the compact store is only charged for its own buffers.
+    """
+    layouts = {"dict": ("dict", 0), "compact": ("compact", 0)}
+    if compress_threshold:
+        layouts["compact+zlib"] = ("compact", compress_threshold)
+    
+    def build(store: str, threshold: int):
+        triggers, expansions = load_columns()
+        return create_snippet_store(store, triggers, expansions, threshold)
+    
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        return {
+            name: _traced_size(lambda: build(store, threshold))
+            for name, (store, threshold) in layouts.items()
+        }
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+
+HEAVY_MODULES = ("duckdb", "pynput", "watchdog", "numpy", "pyarrow")
+
+
+@dataclass
+class ImportTime:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+    
+    @property
+    def package(self) -> str:
+        return self.module.split(".", 1)[0]
+
+
+def parse_import_times(output: str) -> List[ImportTime]:
+    """Parse the ``-X importtime`` report that Python writes to stderr."""
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        
+        name = fields[2][1:]
+        timings.append(ImportTime(
+            module=name.strip(),
+            self_us=int(fields[0]),
+            cumulative_us=int(fields[1]),
+            depth=(len(name) - len(name.lstrip())) // 2,
+        ))
+    return timings
+
+
+def measure_import_times(module: str, python: str = sys.executable) -> List[ImportTime]:
+    """Import ``module`` in a fresh interpreter and return its import timings."""
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        raise RuntimeError(error[-1] if error else f"could not import {module}")
+    return parse_import_times(result.stderr)
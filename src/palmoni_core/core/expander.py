@@ -1,117 +1,325 @@
+import os
+import sys
 import time
 import logging
-from typing import Dict, Optional, Callable, TYPE_CHECKING
-from pynput import keyboard
-from pynput.keyboard import Controller, Key
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Callable, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .config import PalmoniConfig
 
-from .database import SnippetDatabase
+from .analytics import UsageRecorder
+from .buffer import TypedBuffer
+from .expansions import ExpansionCache
+from .instrumentation import Instrumentation
+from .keyio import InputSource, OutputSink, PynputInputSource, PynputOutputSink, SpecialKey
+from .matcher import SnippetMatcher
+from .snapshot import SnippetSnapshot
+from .sources import SnippetSources
+from .watcher import SnippetWatcher
+from .output import (
+    ClipboardError,
+    ExpansionJob,
+    InjectionGuard,
+    OutputWorker,
+    PasteStrategy,
+    TypingStrategy,
+    create_clipboard,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class TextExpander:
-    def __init__(self, config: Optional['PalmoniConfig'] = None):
+    def __init__(
+        self,
+        config: Optional['PalmoniConfig'] = None,
+        input_source: Optional[InputSource] = None,
+        output_sink: Optional[OutputSink] = None,
+    ):
         if config is None:
             from .config import load_config
             config = load_config()
             
         self.config = config
-        self.db = SnippetDatabase(self.config.database_file)
-        self.snippets: Dict[str, str] = {}
-        self.typed_buffer = ""
-        self.keyboard_controller = Controller()
-        self.keyboard_listener: Optional[keyboard.Listener] = None
+        self.expansion_cache: Optional[ExpansionCache] = None
+        if self.config.expansion_loading == "lazy":
+            self.expansion_cache = ExpansionCache(self.config.expansion_cache_size)
+        elif self.config.expansion_loading != "eager":
+            raise ValueError(f"Unknown expansion loading mode '{self.config.expansion_loading}', expected 'eager' or 'lazy'")
+        self.sources = SnippetSources(self.config, self.expansion_cache)
+        self.db = self.sources.database(self.sources.bundled)
+        self.snapshot = SnippetSnapshot.build(0, {}, self.config.matcher)
+        self._reload_lock = threading.Lock()
+        self.reload_count = 0
+        self.last_reload_time = 0.0
+        self.buffer = TypedBuffer(self.matcher)
+        self.snippet_watcher: Optional[SnippetWatcher] = None
+        self.input_source = input_source if input_source is not None else PynputInputSource()
+        self.output_sink = output_sink if output_sink is not None else PynputOutputSink()
+        self._stop_requested = threading.Event()
+        self.output_worker = OutputWorker(
+            self._run_expansion_job,
+            max_queue_size=self.config.output_queue_size,
+            overflow_policy=self.config.output_overflow_policy,
+            max_job_age=self.config.output_max_job_age,
+        )
+        self.injection_guard = InjectionGuard(self.config.injection_grace)
+        self.instrumentation = Instrumentation(enabled=self.config.instrumentation)
+        self.usage: Optional[UsageRecorder] = None
+        if self.config.analytics:
+            self.usage = UsageRecorder(self.config.user_config_dir / "analytics.db", self.config.analytics_flush_interval)
+        self.expansions_injected = 0
+        self.chars_kept = 0
+        self.events_filtered = 0
+        self.last_match_version = 0
+        self.typing_strategy = TypingStrategy()
+        self.paste_strategy = PasteStrategy(
+            create_clipboard(self.config.clipboard_backend),
+            modifier=SpecialKey.CMD if sys.platform == "darwin" else SpecialKey.CTRL,
+            restore_delay=self.config.paste_restore_delay,
+        )
         
         self.load_snippets()
     
     def load_snippets(self) -> None:
-        try:
-            self.snippets = self.db.load_all_snippets()
-            logger.info(f"Loaded {len(self.snippets)} snippets into memory")
-        except Exception as e:
-            logger.error(f"Failed to load snippets from database: {e}")
-            self.snippets = {}
+        self.sources.load()
+        self.snapshot = self.sources.snapshot(self.snapshot.version + 1)
+        logger.info(f"Loaded {len(self.snapshot)} snippets from {len(self.sources.segments)} source(s)")
+    
+    def reload_snippets(self) -> bool:
+        """Rebuild the segments of the sources that changed and publish a new snapshot.
+        
+        When no source file changed (an explicit reload), every source is
+        rebuilt from its database.
+        """
+        with self._reload_lock:
+            started = time.perf_counter()
+            started_ns = self.instrumentation.clock() if self.instrumentation.enabled else 0
+            changed = self.sources.changed() or self.sources.sources
+            try:
+                self.sources.load(changed, use_cache=False, strict=True)
+            except Exception as e:
+                logger.error(f"Failed to reload snippets, keeping the current set: {e}")
+                return False
+            
+            snapshot = self.sources.snapshot(self.snapshot.version + 1)
+            self.snapshot = snapshot
+            if self.expansion_cache is not None:
+                self.expansion_cache.clear()
+            self.reload_count += 1
+            self.last_reload_time = time.perf_counter() - started
+            if self.instrumentation.enabled:
+                self.instrumentation.record("reload", started_ns)
+        
+        logger.info(
+            f"Reloaded {len(snapshot)} snippets (version {snapshot.version}) from {len(changed)} "
+            f"changed source(s) in {self.last_reload_time * 1000:.1f}ms"
+        )
+        return True
+    
+    def get_snippet_sources(self) -> List[Path]:
+        return self.sources.paths()
+    
+    @property
+    def snippets(self) -> Mapping[str, str]:
+        return self.snapshot.snippets
+    
+    @property
+    def matcher(self) -> SnippetMatcher:
+        return self.snapshot.matcher
+    
+    @property
+    def typed_buffer(self) -> str:
+        return self.buffer.text()
     
-    def get_snippets(self) -> Dict[str, str]:
-        return self.snippets.copy()
+    def get_snippets(self) -> Mapping[str, str]:
+        return MappingProxyType(self.snapshot.snippets)
     
     def get_snippet_count(self) -> int:
         return len(self.snippets)
     
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "snippets": len(self.snapshot),
+            "snapshot": {
+                "version": self.snapshot.version,
+                "created_at": self.snapshot.created_at,
+            },
+            "output": self.output_worker.stats(),
+            "injection": {
+                "expansions": self.expansions_injected,
+                "chars_kept": self.chars_kept,
+            },
+            "io": {
+                "input": self.input_source.name,
+                "output": self.output_sink.name,
+            },
+            "listener": {
+                "events_filtered": self.events_filtered,
+                "last_match_version": self.last_match_version,
+            },
+            "sources": self.sources.stats(),
+            "reload": {
+                "count": self.reload_count,
+                "last_ms": self.last_reload_time * 1000,
+            },
+            "expansions": {
+                "loading": self.config.expansion_loading,
+                **(self.expansion_cache.stats() if self.expansion_cache is not None else {}),
+            },
+            "analytics": self.usage.stats() if self.usage is not None else {},
+        }
+    
+    def _inject_text(self, text: str) -> None:
+        threshold = self.config.paste_threshold
+        if threshold and len(text) >= threshold:
+            try:
+                self.paste_strategy.inject(self.output_sink, text)
+                return
+            except ClipboardError as e:
+                logger.warning(f"Paste injection unavailable, typing instead: {e}")
+        
+        self.typing_strategy.inject(self.output_sink, text)
+    
     def _expand_trigger(self, trigger: str, expansion: str, boundary_char: Optional[str] = None) -> None:
-        try:
-            delete_count = len(trigger) + (1 if boundary_char else 0)
-            
+        """Replace the trigger on screen with its expansion.
+        
+        Errors are left to the output worker, which logs them and counts
+        the job as failed.
+        """
+        boundary = boundary_char or ""
+        on_screen = trigger + boundary
+        target = expansion + boundary
+        keep = len(os.path.commonprefix([on_screen, target]))
+        
+        delete_count = len(on_screen) - keep
+        remaining = target[keep:]
+        if boundary and remaining:
+            remaining = remaining[:-len(boundary)]
+        else:
+            boundary_char = None
+        
+        with self.injection_guard:
             for _ in range(delete_count):
-                self.keyboard_controller.press(Key.backspace)
-                self.keyboard_controller.release(Key.backspace)
+                self.output_sink.press(SpecialKey.BACKSPACE)
+                self.output_sink.release(SpecialKey.BACKSPACE)
                 time.sleep(0.01)
-            
-            self.keyboard_controller.type(expansion)
-            
+        
+            if remaining:
+                self._inject_text(remaining)
+        
             if boundary_char == "\n":
-                self.keyboard_controller.press(Key.enter)
-                self.keyboard_controller.release(Key.enter)
+                self.output_sink.press(SpecialKey.ENTER)
+                self.output_sink.release(SpecialKey.ENTER)
             elif boundary_char == "\t":
-                self.keyboard_controller.press(Key.tab)
-                self.keyboard_controller.release(Key.tab)
+                self.output_sink.press(SpecialKey.TAB)
+                self.output_sink.release(SpecialKey.TAB)
             elif boundary_char == " ":
-                self.keyboard_controller.type(" ")
-            
-            logger.debug(f"Expanded '{trigger}'")
-            
-        except Exception as e:
-            logger.error(f"Error during expansion: {e}")
+                self.output_sink.type(" ")
+        
+        self.expansions_injected += 1
+        self.chars_kept += keep
+        if self.usage is not None:
+            self.usage.record(trigger, max(len(expansion) - len(trigger), 0))
+        logger.debug(f"Expanded '{trigger}' ({delete_count} backspaces, {keep} characters kept on screen)")
+    
+    def _run_expansion_job(self, job: ExpansionJob) -> None:
+        if not self.instrumentation.enabled:
+            self._expand_trigger(job.trigger, job.resolve(), boundary_char=job.boundary_char)
+            return
+        
+        started = self.instrumentation.clock()
+        self._expand_trigger(job.trigger, job.resolve(), boundary_char=job.boundary_char)
+        self.instrumentation.record("inject", started)
+    
+    def _expand_match(self, snapshot: SnippetSnapshot, trigger: Optional[str], boundary_char: Optional[str] = None) -> bool:
+        if trigger is None:
+            return False
+        
+        self.last_match_version = snapshot.version
+        if getattr(snapshot.snippets, "lazy", False):
+            job = ExpansionJob(trigger, None, boundary_char, snapshot_version=snapshot.version, source=snapshot.snippets)
+        else:
+            job = ExpansionJob(trigger, snapshot.snippets[trigger], boundary_char, snapshot_version=snapshot.version)
+        if self.output_worker.running:
+            self.output_worker.submit(job)
+        else:
+            self.output_worker.run_job(job)
+        
+        self.buffer.clear()
+        return True
     
-    def _on_key_press(self, key) -> None:
+    def _on_key_press(self, key, injected: bool = False) -> None:
+        instrumentation = self.instrumentation
+        if not instrumentation.enabled:
+            self._handle_key_press(key, injected)
+            return
+        
+        started = instrumentation.clock()
+        self._handle_key_press(key, injected)
+        instrumentation.record("event", started)
+    
+    def _handle_key_press(self, key, injected: bool) -> None:
+        if injected or (self.input_source.sees_output and self.injection_guard.is_active()):
+            self.events_filtered += 1
+            return
+        
+        snapshot = self.snapshot
+        if self.buffer.matcher is not snapshot.matcher:
+            self.buffer.bind(snapshot.matcher)
+        
+        timing = self.instrumentation.enabled
         try:
-            if hasattr(key, 'char') and key.char is not None:
-                ch = key.char
-                self.typed_buffer += ch
+            ch = key if isinstance(key, str) else getattr(key, 'char', None)
+            if ch is not None:
+                started = self.instrumentation.clock() if timing else 0
+                self.buffer.append(ch)
+                trigger = self.buffer.match()
+                if timing:
+                    self.instrumentation.record("match", started)
                 
-                for trigger, expansion in self.snippets.items():
-                    if self.typed_buffer.endswith(trigger):
-                        self._expand_trigger(trigger, expansion)
-                        self.typed_buffer = ""
-                        return
+                if self._expand_match(snapshot, trigger):
+                    return
                 
                 if ch in self.config.boundary_chars:
-                    buf_no_boundary = self.typed_buffer[:-1]
-                    for trigger, expansion in self.snippets.items():
-                        if buf_no_boundary.endswith(trigger):
-                            self._expand_trigger(trigger, expansion, boundary_char=ch)
-                            self.typed_buffer = ""
-                            return
-                    self.typed_buffer = ""
+                    if self._expand_match(snapshot, self.buffer.match_before_last(), boundary_char=ch):
+                        return
+                    self.buffer.clear()
             
             else:
-                if key == Key.backspace:
-                    self.typed_buffer = self.typed_buffer[:-1] if self.typed_buffer else ""
-                elif key in (Key.enter, Key.tab):
-                    boundary_char = "\n" if key == Key.enter else "\t"
-                    self.typed_buffer += boundary_char
+                if key is SpecialKey.BACKSPACE:
+                    self.buffer.pop()
+                elif key is SpecialKey.ENTER or key is SpecialKey.TAB:
+                    boundary_char = "\n" if key is SpecialKey.ENTER else "\t"
                     
-                    buf_no_boundary = self.typed_buffer[:-1]
-                    for trigger, expansion in self.snippets.items():
-                        if buf_no_boundary.endswith(trigger):
-                            self._expand_trigger(trigger, expansion, boundary_char=boundary_char)
-                            self.typed_buffer = ""
-                            return
-                    self.typed_buffer = ""
+                    if self._expand_match(snapshot, self.buffer.match(), boundary_char=boundary_char):
+                        return
+                    self.buffer.clear()
                     
         except Exception as e:
             logger.error(f"Error handling key press: {e}")
-            self.typed_buffer = ""
+            self.buffer.clear()
     
     def start(self, on_started: Optional[Callable] = None) -> None:
         try:
-            logger.info(f"Starting text expander with {len(self.snippets)} snippets")
+            logger.info(f"Starting text expander with {len(self.snapshot)} snippets")
             
-            self.keyboard_listener = keyboard.Listener(on_press=self._on_key_press)
-            self.keyboard_listener.start()
+            self.output_worker.start()
+            if self.usage is not None:
+                self.usage.start()
+            if self.config.watch_snippets:
+                self.snippet_watcher = SnippetWatcher(
+                    self.get_snippet_sources(),
+                    self.reload_snippets,
+                    debounce=self.config.reload_debounce,
+                )
+                self.snippet_watcher.start()
+            self.input_source.start(self._on_key_press, wait_idle=self.output_worker.wait_idle)
+            if self._stop_requested.is_set():
+                self.input_source.stop()
             
             if on_started:
                 on_started()
@@ -119,7 +327,7 @@ class TextExpander:
             logger.info("Text expander running. Press Ctrl+C to quit.")
             
             try:
-                self.keyboard_listener.join()
+                self.input_source.join()
             except KeyboardInterrupt:
                 logger.info("Received shutdown signal")
                 
@@ -129,12 +337,24 @@ class TextExpander:
         finally:
             self.stop()
     
+    def request_stop(self) -> None:
+        """Make a running ``start`` return; safe to call from any thread."""
+        self._stop_requested.set()
+        self.input_source.stop()
+    
     def stop(self) -> None:
         logger.info("Stopping text expander")
         
-        if self.keyboard_listener:
-            self.keyboard_listener.stop()
-            self.keyboard_listener = None
+        self.input_source.stop()
+        
+        if self.snippet_watcher:
+            self.snippet_watcher.stop()
+            self.snippet_watcher = None
+        
+        self.output_worker.stop()
+        if self.usage is not None:
+            self.usage.stop()
+        self.sources.close()
         
         logger.info("Text expander stopped")
     
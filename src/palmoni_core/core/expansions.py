@@ -0,0 +1,99 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, Optional, Sequence
+
+
+class ExpansionCache:
+    """Size-bounded LRU cache of expansion bodies.
+    
+    The hit and miss counters are cumulative across ``clear`` so that the
+    hit rate reflects how well ``capacity`` fits the snippets actually used.
+    """
+    
+    def __init__(self, capacity: int = 256):
+        self.capacity = max(capacity, 1)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, trigger: str) -> Optional[str]:
+        with self._lock:
+            expansion = self._entries.get(trigger)
+            if expansion is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(trigger)
+            self.hits += 1
+            return expansion
+    
+    def put(self, trigger: str, expansion: str) -> None:
+        with self._lock:
+            self._entries[trigger] = expansion
+            self._entries.move_to_end(trigger)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class LazySnippets(Mapping):
+    """Snippet mapping that keeps only triggers resident.
+    
+    Each trigger maps to its database row id; the expansion is fetched
+    through ``loader`` the first time it is needed and then served from the
+    shared :class:`ExpansionCache`.
+    """
+    
+    lazy = True
+    
+    def __init__(
+        self,
+        triggers: Sequence[str],
+        row_ids: Sequence[int],
+        loader: Callable[[int, str], Optional[str]],
+        cache: ExpansionCache,
+    ):
+        self._row_ids: Dict[str, int] = dict(zip(triggers, row_ids))
+        self.loader = loader
+        self.cache = cache
+    
+    def __getitem__(self, trigger: str) -> str:
+        row_id = self._row_ids[trigger]
+        
+        expansion = self.cache.get(trigger)
+        if expansion is None:
+            expansion = self.loader(row_id, trigger)
+            if expansion is None:
+                raise KeyError(trigger)
+            self.cache.put(trigger, expansion)
+        return expansion
+    
+    def __contains__(self, trigger) -> bool:
+        return trigger in self._row_ids
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._row_ids)
+    
+    def __len__(self) -> int:
+        return len(self._row_ids)
@@ -0,0 +1,121 @@
+import time
+from typing import Any, Dict, List, Optional
+
+MIN_BUCKET_BITS = 10
+BUCKET_COUNT = 22
+
+HISTOGRAMS = ("event", "match", "inject", "reload")
+
+
+class Histogram:
+    """Fixed power-of-two latency buckets over nanosecond durations.
+    
+    Bucket 0 holds everything under ~1µs and bucket ``i`` everything below
+    ``2 ** (MIN_BUCKET_BITS + i)`` ns, up to ~2s; the last bucket is
+    open-ended. Recording is one ``bit_length`` and a list increment, with
+    no allocation, so it is cheap enough for the key-press path.
+    """
+    
+    def __init__(self):
+        self.counts: List[int] = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+    
+    def record_ns(self, elapsed_ns: int) -> None:
+        index = elapsed_ns.bit_length() - MIN_BUCKET_BITS
+        if index < 0:
+            index = 0
+        elif index >= BUCKET_COUNT:
+            index = BUCKET_COUNT - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+    
+    @staticmethod
+    def bucket_upper_ns(index: int) -> int:
+        return 1 << (MIN_BUCKET_BITS + index)
+    
+    def percentile_ns(self, percent: float) -> int:
+        """Upper bound of the bucket containing the given percentile."""
+        if not self.count:
+            return 0
+        
+        rank = self.count * percent / 100
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if bucket and seen >= rank:
+                return min(self.bucket_upper_ns(index), self.max_ns)
+        return self.max_ns
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_us": self.total_ns / self.count / 1000 if self.count else 0.0,
+            "p50_us": self.percentile_ns(50) / 1000,
+            "p90_us": self.percentile_ns(90) / 1000,
+            "p99_us": self.percentile_ns(99) / 1000,
+            "max_us": self.max_ns / 1000,
+            "buckets": {
+                f"<{self.bucket_upper_ns(index) / 1000:g}us": bucket
+                for index, bucket in enumerate(self.counts)
+                if bucket
+            },
+        }
+
+
+class Instrumentation:
+    """Hot-path timings for the expander, off unless explicitly enabled.
+    
+    Callers check ``enabled`` before reading the clock, so the disabled
+    cost is one attribute lookup per event. Each histogram is written by a
+    single thread (listener, output worker, or under the reload lock).
+    """
+    
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.started_at = time.monotonic()
+        self.histograms: Dict[str, Histogram] = {name: Histogram() for name in HISTOGRAMS}
+    
+    @staticmethod
+    def clock() -> int:
+        return time.perf_counter_ns()
+    
+    def record(self, name: str, started_ns: int) -> None:
+        self.histograms[name].record_ns(time.perf_counter_ns() - started_ns)
+    
+    def reset(self) -> None:
+        self.started_at = time.monotonic()
+        self.histograms = {name: Histogram() for name in HISTOGRAMS}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        uptime = time.monotonic() - self.started_at
+        expansions = self.histograms["inject"].count
+        return {
+            "enabled": self.enabled,
+            "uptime_s": uptime,
+            "expansions_per_minute": expansions / uptime * 60 if uptime else 0.0,
+            "histograms": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+        }
+
+
+def format_report(data: Dict[str, Any], title: Optional[str] = None) -> str:
+    """Render ``Instrumentation.to_dict()`` output as a plain-text table."""
+    if not data.get("enabled"):
+        return "Instrumentation is disabled (start with --profile or set 'instrumentation: true')"
+    
+    lines = []
+    if title:
+        lines.append(title)
+    lines.append(f"Uptime: {data['uptime_s']:.1f}s, {data['expansions_per_minute']:.2f} expansions/min")
+    lines.append(f"{'Timer':<8} {'Count':>8} {'Mean':>10} {'p50':>10} {'p90':>10} {'p99':>10} {'Max':>10}")
+    lines.append("-" * 72)
+    for name, histogram in data["histograms"].items():
+        lines.append(
+            f"{name:<8} {histogram['count']:>8} "
+            + " ".join(f"{histogram[key]:>8.1f}us" for key in ("mean_us", "p50_us", "p90_us", "p99_us", "max_us"))
+        )
+    return "\n".join(lines)
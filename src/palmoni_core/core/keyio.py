@@ -0,0 +1,262 @@
+import time
+import logging
+import threading
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
+
+logger = logging.getLogger(__name__)
+
+
+class SpecialKey(Enum):
+    """Backend-neutral names for the non-character keys the expander uses."""
+    
+    BACKSPACE = "backspace"
+    ENTER = "enter"
+    TAB = "tab"
+    CTRL = "ctrl"
+    CMD = "cmd"
+
+
+# Key events are either a one-character string, an object with a ``char``
+# attribute (such as a pynput ``KeyCode``) or a ``SpecialKey``.
+KeyHandler = Callable[[Any, bool], None]
+
+REPLAY_KEYS: Dict[str, SpecialKey] = {
+    "\b": SpecialKey.BACKSPACE,
+    "\n": SpecialKey.ENTER,
+    "\t": SpecialKey.TAB,
+}
+
+
+class InputSource:
+    """Delivers key presses to the expander.
+    
+    ``sees_output`` says whether the source also observes the events an
+    output sink emits, in which case the expander has to filter them out.
+    """
+    
+    name = ""
+    sees_output = True
+    
+    def start(self, on_press: KeyHandler, wait_idle: Optional[Callable[[], Any]] = None) -> None:
+        raise NotImplementedError
+    
+    def stop(self) -> None:
+        raise NotImplementedError
+    
+    def join(self) -> None:
+        raise NotImplementedError
+
+
+class PynputInputSource(InputSource):
+    """Global keyboard hook through pynput; needs a display or input device."""
+    
+    name = "pynput"
+    
+    def __init__(self):
+        self._listener = None
+    
+    def start(self, on_press: KeyHandler, wait_idle: Optional[Callable[[], Any]] = None) -> None:
+        from pynput import keyboard
+        
+        special = {
+            keyboard.Key.backspace: SpecialKey.BACKSPACE,
+            keyboard.Key.enter: SpecialKey.ENTER,
+            keyboard.Key.tab: SpecialKey.TAB,
+        }
+        
+        def translate(key, injected=False):
+            on_press(special.get(key, key), injected)
+        
+        self._listener = keyboard.Listener(on_press=translate)
+        self._listener.start()
+    
+    def stop(self) -> None:
+        listener = self._listener
+        if listener:
+            listener.stop()
+    
+    def join(self) -> None:
+        if self._listener:
+            self._listener.join()
+
+
+class ReplayInputSource(InputSource):
+    """Replays a recorded key stream on a background thread.
+    
+    When ``paced`` is set each key waits for the expansions it triggered
+    to be injected before the next one is sent, so a replay produces the
+    same output on every run. Keys are also passed to ``echo``, standing
+    in for the focused application that would have received them.
+    """
+    
+    name = "replay"
+    sees_output = False
+    
+    def __init__(
+        self,
+        events: Sequence[Any],
+        paced: bool = True,
+        delay: float = 0.0,
+        echo: Optional["OutputSink"] = None,
+    ):
+        self.events = events
+        self.paced = paced
+        self.delay = delay
+        self.echo = echo
+        self.delivered = 0
+        self.elapsed = 0.0
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @classmethod
+    def from_text(cls, text: str, **kwargs) -> "ReplayInputSource":
+        """Read ``\\b`` as backspace and newlines and tabs as Enter and Tab."""
+        return cls([REPLAY_KEYS.get(ch, ch) for ch in text], **kwargs)
+    
+    @classmethod
+    def from_file(cls, path: Path, **kwargs) -> "ReplayInputSource":
+        """Load a UTF-8 keystroke file in the ``from_text`` format."""
+        return cls.from_text(Path(path).read_text(encoding="utf-8"), **kwargs)
+    
+    def start(self, on_press: KeyHandler, wait_idle: Optional[Callable[[], Any]] = None) -> None:
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(on_press, wait_idle if self.paced else None), name="palmoni-replay", daemon=True
+        )
+        self._thread.start()
+    
+    def _run(self, on_press: KeyHandler, wait_idle: Optional[Callable[[], Any]]) -> None:
+        started = time.perf_counter()
+        for key in self.events:
+            if self._stopping.is_set():
+                break
+            
+            if self.echo is not None:
+                send_key(self.echo, key)
+            on_press(key, False)
+            self.delivered += 1
+            if wait_idle is not None:
+                wait_idle()
+            if self.delay:
+                self._stopping.wait(self.delay)
+        
+        self.elapsed = time.perf_counter() - started
+        logger.debug(f"Replayed {self.delivered} keys in {self.elapsed * 1000:.1f}ms")
+    
+    def stop(self) -> None:
+        self._stopping.set()
+    
+    def join(self) -> None:
+        if self._thread is not None:
+            self._thread.join()
+
+
+class OutputSink:
+    """Receives the key events the expander injects."""
+    
+    name = ""
+    
+    def press(self, key: Any) -> None:
+        raise NotImplementedError
+    
+    def release(self, key: Any) -> None:
+        raise NotImplementedError
+    
+    def type(self, text: str) -> None:
+        raise NotImplementedError
+
+
+class PynputOutputSink(OutputSink):
+    """Synthetic key events through pynput's keyboard controller."""
+    
+    name = "pynput"
+    
+    def __init__(self):
+        from pynput.keyboard import Controller, Key
+        
+        self._controller = Controller()
+        self._keys = {special: getattr(Key, special.value) for special in SpecialKey}
+    
+    def press(self, key: Any) -> None:
+        self._controller.press(self._keys.get(key, key))
+    
+    def release(self, key: Any) -> None:
+        self._controller.release(self._keys.get(key, key))
+    
+    def type(self, text: str) -> None:
+        self._controller.type(text)
+
+
+class MemoryOutputSink(OutputSink):
+    """Applies key events to an in-memory text buffer.
+    
+    Characters pressed while a modifier is held are chords, not text, and
+    are ignored, so paste injection leaves no trace here.
+    """
+    
+    name = "memory"
+    
+    def __init__(self):
+        self._chars: List[str] = []
+        self._held = set()
+        self._lock = threading.Lock()
+    
+    @property
+    def text(self) -> str:
+        with self._lock:
+            return "".join(self._chars)
+    
+    def press(self, key: Any) -> None:
+        with self._lock:
+            if key is SpecialKey.BACKSPACE:
+                if self._chars:
+                    self._chars.pop()
+            elif key is SpecialKey.ENTER:
+                self._chars.append("\n")
+            elif key is SpecialKey.TAB:
+                self._chars.append("\t")
+            elif isinstance(key, SpecialKey):
+                self._held.add(key)
+            elif not self._held:
+                self._chars.append(key)
+    
+    def release(self, key: Any) -> None:
+        with self._lock:
+            self._held.discard(key)
+    
+    def type(self, text: str) -> None:
+        with self._lock:
+            self._chars.extend(text)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._chars.clear()
+
+
+def send_key(sink: OutputSink, key: Any) -> None:
+    """Press and release one key event on ``sink``."""
+    if isinstance(key, SpecialKey):
+        sink.press(key)
+        sink.release(key)
+        return
+    
+    char = key if isinstance(key, str) else getattr(key, "char", None)
+    if char:
+        sink.type(char)
+
+
+OUTPUT_SINKS: Dict[str, Type[OutputSink]] = {
+    PynputOutputSink.name: PynputOutputSink,
+    MemoryOutputSink.name: MemoryOutputSink,
+}
+
+
+def create_output_sink(name: str) -> OutputSink:
+    try:
+        sink = OUTPUT_SINKS[name]
+    except KeyError:
+        raise ValueError(f"Unknown output sink '{name}', expected one of: {', '.join(sorted(OUTPUT_SINKS))}")
+    
+    return sink()
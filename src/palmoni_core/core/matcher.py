@@ -0,0 +1,192 @@
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+_TERMINAL = ""
+
+
+class SnippetMatcher:
+    """Finds the longest trigger that the typed text ends with.
+    
+    Matchers are built once from the full trigger set and then queried on
+    every key press, so lookups must be bounded by the longest trigger
+    rather than by the number of snippets.
+    """
+    
+    name = ""
+    incremental = False
+    
+    def __init__(self, triggers: Iterable[str]):
+        self.max_length = 0
+        self.trigger_count = 0
+    
+    def longest_suffix(self, text: str) -> Optional[str]:
+        raise NotImplementedError
+
+
+class ReversedTrieMatcher(SnippetMatcher):
+    """Trie of reversed triggers, walked backwards from the end of the text."""
+    
+    name = "trie"
+    
+    def __init__(self, triggers: Iterable[str]):
+        super().__init__(triggers)
+        self._root: Dict[str, dict] = {}
+        
+        for trigger in triggers:
+            if not trigger:
+                continue
+            node = self._root
+            for ch in reversed(trigger):
+                node = node.setdefault(ch, {})
+            node[_TERMINAL] = trigger
+            self.trigger_count += 1
+            self.max_length = max(self.max_length, len(trigger))
+    
+    def longest_suffix(self, text: str) -> Optional[str]:
+        node = self._root
+        found = None
+        stop = max(len(text) - self.max_length, 0)
+        
+        for i in range(len(text) - 1, stop - 1, -1):
+            node = node.get(text[i])
+            if node is None:
+                break
+            found = node.get(_TERMINAL, found)
+        
+        return found
+
+
+class AhoCorasickMatcher(SnippetMatcher):
+    """Aho-Corasick automaton over the trigger set.
+    
+    Besides one-shot lookups it can be driven one character at a time:
+    ``advance`` moves between integer states and ``match_state`` reports the
+    longest trigger ending at that state.
+    """
+    
+    name = "aho-corasick"
+    incremental = True
+    
+    def __init__(self, triggers: Iterable[str]):
+        super().__init__(triggers)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[str]] = [None]
+        
+        for trigger in triggers:
+            if not trigger:
+                continue
+            state = 0
+            for ch in trigger:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                    self._goto[state][ch] = next_state
+                state = next_state
+            self._output[state] = trigger
+            self.trigger_count += 1
+            self.max_length = max(self.max_length, len(trigger))
+        
+        self._build_failure_links()
+    
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                
+                if self._output[next_state] is None:
+                    self._output[next_state] = self._output[self._fail[next_state]]
+                queue.append(next_state)
+    
+    @property
+    def state_count(self) -> int:
+        return len(self._goto)
+    
+    def tables(self) -> Tuple[List[Dict[str, int]], List[int], List[Optional[str]]]:
+        """Return the goto, failure and output tables, e.g. for serialising."""
+        return self._goto, self._fail, self._output
+    
+    def initial_state(self) -> int:
+        return 0
+    
+    def advance(self, state: int, ch: str) -> int:
+        goto = self._goto
+        while state and ch not in goto[state]:
+            state = self._fail[state]
+        return goto[state].get(ch, 0)
+    
+    def match_state(self, state: int) -> Optional[str]:
+        return self._output[state]
+    
+    def longest_suffix(self, text: str) -> Optional[str]:
+        state = 0
+        for ch in text[-self.max_length:] if self.max_length else "":
+            state = self.advance(state, ch)
+        return self._output[state]
+
+
+class SegmentedMatcher(SnippetMatcher):
+    """Queries several independently built matchers as one.
+    
+    Each segment keeps its own automaton, so replacing one segment does not
+    rebuild the others. An incremental state is the tuple of the segments'
+    states; the longest trigger any segment reports wins.
+    """
+    
+    name = "segmented"
+    
+    def __init__(self, matchers: Sequence[SnippetMatcher]):
+        super().__init__(())
+        self.matchers = tuple(matchers)
+        self.incremental = all(matcher.incremental for matcher in self.matchers)
+        self.max_length = max((matcher.max_length for matcher in self.matchers), default=0)
+        self.trigger_count = sum(matcher.trigger_count for matcher in self.matchers)
+    
+    def initial_state(self) -> Tuple[int, ...]:
+        return tuple(matcher.initial_state() for matcher in self.matchers)
+    
+    def advance(self, state: Tuple[int, ...], ch: str) -> Tuple[int, ...]:
+        return tuple(matcher.advance(substate, ch) for matcher, substate in zip(self.matchers, state))
+    
+    def match_state(self, state: Tuple[int, ...]) -> Optional[str]:
+        return self._longest(matcher.match_state(substate) for matcher, substate in zip(self.matchers, state))
+    
+    def longest_suffix(self, text: str) -> Optional[str]:
+        return self._longest(matcher.longest_suffix(text) for matcher in self.matchers)
+    
+    @staticmethod
+    def _longest(triggers: Iterable[Optional[str]]) -> Optional[str]:
+        found = None
+        for trigger in triggers:
+            if trigger is not None and (found is None or len(trigger) > len(found)):
+                found = trigger
+        return found
+
+
+MATCHERS: Dict[str, Type[SnippetMatcher]] = {
+    ReversedTrieMatcher.name: ReversedTrieMatcher,
+    AhoCorasickMatcher.name: AhoCorasickMatcher,
+}
+
+
+def create_matcher(name: str, triggers: Iterable[str]) -> SnippetMatcher:
+    try:
+        matcher_class = MATCHERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown matcher '{name}', expected one of: {', '.join(sorted(MATCHERS))}")
+    
+    matcher = matcher_class(triggers)
+    logger.debug(f"Built {name} matcher for {matcher.trigger_count} triggers (max length {matcher.max_length})")
+    return matcher
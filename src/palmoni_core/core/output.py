@@ -0,0 +1,376 @@
+import os
+import sys
+import time
+import queue
+import shutil
+import logging
+import threading
+import subprocess
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+
+@dataclass
+class ExpansionJob:
+    trigger: str
+    expansion: Optional[str]
+    boundary_char: Optional[str] = None
+    snapshot_version: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+    source: Optional[Mapping[str, str]] = None
+    
+    def resolve(self) -> str:
+        """Return the expansion, looking it up in ``source`` on first use."""
+        if self.expansion is None:
+            self.expansion = self.source[self.trigger]
+        return self.expansion
+
+
+class OutputWorker:
+    """Injects expansions on a dedicated thread.
+    
+    The keyboard listener only enqueues jobs. The queue is bounded: when it
+    is full the overflow policy decides whether the oldest queued job or the
+    incoming one is dropped, and jobs that waited longer than ``max_job_age``
+    are cancelled instead of being typed into whatever the user moved on to.
+    """
+    
+    def __init__(
+        self,
+        handler: Callable[[ExpansionJob], None],
+        max_queue_size: int = 8,
+        overflow_policy: str = "drop_oldest",
+        max_job_age: float = 2.0,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow_policy}', expected one of: {', '.join(OVERFLOW_POLICIES)}")
+        
+        self.handler = handler
+        self.max_queue_size = max(max_queue_size, 1)
+        self.overflow_policy = overflow_policy
+        self.max_job_age = max_job_age
+        
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        
+        self.jobs_submitted = 0
+        self.jobs_completed = 0
+        self.jobs_dropped = 0
+        self.jobs_cancelled = 0
+        self.jobs_failed = 0
+        self.total_injection_time = 0.0
+        self.last_injection_time = 0.0
+        self.max_injection_time = 0.0
+        self.max_queue_depth = 0
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+    
+    def start(self) -> None:
+        if self.running:
+            if not self._stopping.is_set():
+                return
+            # A stopped worker is still inside a slow injection; a second
+            # thread would type into the same window at the same time. Its
+            # stop marker is still queued, so drain the queue as stop() did.
+            self._thread.join()
+            self.cancel_pending()
+        
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="palmoni-output", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = 1.0) -> None:
+        if self._thread is None:
+            return
+        
+        self._stopping.set()
+        self.cancel_pending()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Output worker is still injecting an expansion; it will exit once that finishes")
+            return
+        self._thread = None
+    
+    def submit(self, job: ExpansionJob) -> bool:
+        with self._lock:
+            self.jobs_submitted += 1
+            
+            while True:
+                try:
+                    self._queue.put_nowait(job)
+                    break
+                except queue.Full:
+                    if self.overflow_policy == "drop_newest":
+                        self.jobs_dropped += 1
+                        logger.warning(f"Output queue full, dropped expansion of '{job.trigger}'")
+                        return False
+                    
+                    try:
+                        dropped = self._queue.get_nowait()
+                    except queue.Empty:
+                        continue
+                    self._queue.task_done()
+                    self.jobs_dropped += 1
+                    logger.warning(f"Output queue full, dropped expansion of '{dropped.trigger}'")
+            
+            self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return True
+    
+    def cancel_pending(self) -> int:
+        cancelled = 0
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            if job is not None:
+                cancelled += 1
+        
+        with self._lock:
+            self.jobs_cancelled += cancelled
+        return cancelled
+    
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            job = self._queue.get()
+            try:
+                if job is None:
+                    break
+                
+                if self.max_job_age and time.monotonic() - job.created_at > self.max_job_age:
+                    with self._lock:
+                        self.jobs_cancelled += 1
+                    logger.warning(f"Cancelled stale expansion of '{job.trigger}'")
+                    continue
+                
+                self.run_job(job)
+            finally:
+                self._queue.task_done()
+    
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued job has been injected, dropped or cancelled."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+    
+    def run_job(self, job: ExpansionJob) -> None:
+        started = time.perf_counter()
+        try:
+            self.handler(job)
+        except Exception as e:
+            with self._lock:
+                self.jobs_failed += 1
+            logger.error(f"Error injecting expansion of '{job.trigger}': {e}")
+            return
+        
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.jobs_completed += 1
+            self.total_injection_time += elapsed
+            self.last_injection_time = elapsed
+            self.max_injection_time = max(self.max_injection_time, elapsed)
+    
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            completed = self.jobs_completed
+            return {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "jobs_submitted": self.jobs_submitted,
+                "jobs_completed": completed,
+                "jobs_dropped": self.jobs_dropped,
+                "jobs_cancelled": self.jobs_cancelled,
+                "jobs_failed": self.jobs_failed,
+                "last_injection_ms": self.last_injection_time * 1000,
+                "avg_injection_ms": (self.total_injection_time / completed * 1000) if completed else 0.0,
+                "max_injection_ms": self.max_injection_time * 1000,
+            }
+
+
+class InjectionGuard:
+    """Marks the window during which key events are our own.
+    
+    The keyboard listener also sees the synthetic events the controller
+    emits, and the OS may deliver them shortly after the controller call
+    returns, so the window stays open for ``grace`` seconds afterwards.
+    """
+    
+    def __init__(self, grace: float = 0.05):
+        self.grace = grace
+        self._active = 0
+        self._until = 0.0
+        self._lock = threading.Lock()
+    
+    def __enter__(self):
+        with self._lock:
+            self._active += 1
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with self._lock:
+            self._active -= 1
+            self._until = time.monotonic() + self.grace
+    
+    def is_active(self) -> bool:
+        return self._active > 0 or time.monotonic() < self._until
+
+
+class ClipboardError(Exception):
+    pass
+
+
+class Clipboard:
+    name = ""
+    
+    def read(self) -> Optional[str]:
+        raise NotImplementedError
+    
+    def write(self, text: str) -> None:
+        raise NotImplementedError
+
+
+class InMemoryClipboard(Clipboard):
+    name = "memory"
+    
+    def __init__(self, text: Optional[str] = None):
+        self.text = text
+    
+    def read(self) -> Optional[str]:
+        return self.text
+    
+    def write(self, text: str) -> None:
+        self.text = text
+
+
+class SystemClipboard(Clipboard):
+    """Clipboard access through the platform's command line tools."""
+    
+    name = "system"
+    
+    def __init__(self):
+        self._commands: Optional[Tuple[List[str], List[str]]] = None
+    
+    @staticmethod
+    def _detect_commands() -> Optional[Tuple[List[str], List[str]]]:
+        if sys.platform == "darwin":
+            return ["pbcopy"], ["pbpaste"]
+        if os.name == "nt":
+            return (
+                ["powershell", "-NoProfile", "-Command", "Set-Clipboard -Value ([Console]::In.ReadToEnd())"],
+                ["powershell", "-NoProfile", "-Command", "Get-Clipboard -Raw"],
+            )
+        
+        candidates = [
+            (["wl-copy"], ["wl-paste", "--no-newline"]),
+            (["xclip", "-selection", "clipboard"], ["xclip", "-selection", "clipboard", "-o"]),
+            (["xsel", "--clipboard", "--input"], ["xsel", "--clipboard", "--output"]),
+        ]
+        for copy_command, paste_command in candidates:
+            if shutil.which(copy_command[0]):
+                return copy_command, paste_command
+        return None
+    
+    def _get_commands(self) -> Tuple[List[str], List[str]]:
+        if self._commands is None:
+            self._commands = self._detect_commands()
+        if self._commands is None:
+            raise ClipboardError("No clipboard tool found (install wl-clipboard, xclip or xsel)")
+        return self._commands
+    
+    def read(self) -> Optional[str]:
+        _, paste_command = self._get_commands()
+        try:
+            result = subprocess.run(paste_command, capture_output=True, text=True, encoding="utf-8", timeout=1)
+        except (OSError, subprocess.SubprocessError) as e:
+            raise ClipboardError(f"Could not read clipboard: {e}")
+        return result.stdout if result.returncode == 0 else None
+    
+    def write(self, text: str) -> None:
+        copy_command, _ = self._get_commands()
+        try:
+            subprocess.run(copy_command, input=text, text=True, encoding="utf-8", check=True, timeout=1)
+        except (OSError, subprocess.SubprocessError) as e:
+            raise ClipboardError(f"Could not write clipboard: {e}")
+
+
+CLIPBOARDS: Dict[str, Type[Clipboard]] = {
+    SystemClipboard.name: SystemClipboard,
+    InMemoryClipboard.name: InMemoryClipboard,
+}
+
+
+def create_clipboard(name: str) -> Clipboard:
+    try:
+        return CLIPBOARDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown clipboard backend '{name}', expected one of: {', '.join(sorted(CLIPBOARDS))}")
+
+
+class TypingStrategy:
+    """Types the text one synthetic key event per character."""
+    
+    name = "type"
+    
+    def inject(self, controller: Any, text: str) -> None:
+        controller.type(text)
+
+
+class PasteStrategy:
+    """Places the text on the clipboard and sends a single paste chord.
+    
+    Whatever was on the clipboard before is written back once the target
+    application has had ``restore_delay`` seconds to read the paste. If it
+    held nothing readable (empty, or not text) it is cleared instead, so
+    the expansion is not left behind. Once the chord has been sent a failed
+    restore is only logged: raising would make the caller type the text a
+    second time.
+    """
+    
+    name = "paste"
+    
+    def __init__(self, clipboard: Clipboard, modifier: Any, restore_delay: float = 0.1):
+        self.clipboard = clipboard
+        self.modifier = modifier
+        self.restore_delay = restore_delay
+    
+    def inject(self, controller: Any, text: str) -> None:
+        previous = self.clipboard.read()
+        self.clipboard.write(text)
+        
+        try:
+            controller.press(self.modifier)
+            try:
+                controller.press("v")
+                controller.release("v")
+            finally:
+                controller.release(self.modifier)
+            
+            time.sleep(self.restore_delay)
+        finally:
+            try:
+                self.clipboard.write(previous if previous is not None else "")
+            except ClipboardError as e:
+                logger.warning(f"Could not restore the clipboard after pasting: {e}")
@@ -0,0 +1,385 @@
+import time
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import duckdb
+
+from .database import SnippetDatabase, detect_storage_backend, has_arrow, is_parquet, matching_files
+
+logger = logging.getLogger(__name__)
+
+SNIPPETS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS snippets (
+        trigger TEXT PRIMARY KEY,
+        expansion TEXT NOT NULL,
+        category TEXT DEFAULT '',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# DuckDB table function used to read each import format.
+READERS: Dict[str, str] = {
+    "csv": "read_csv",
+    "json": "read_json",
+    "parquet": "read_parquet",
+}
+
+# Options for ``COPY ... TO`` per export format.
+WRITERS: Dict[str, str] = {
+    "csv": "FORMAT csv, HEADER",
+    "json": "FORMAT json",
+    "parquet": "FORMAT parquet",
+}
+
+EXTENSIONS: Dict[str, str] = {
+    ".csv": "csv",
+    ".json": "json",
+    ".jsonl": "json",
+    ".ndjson": "json",
+    ".parquet": "parquet",
+}
+
+# How many offending triggers a validation error names.
+EXAMPLES = 5
+
+# Rows handed over per fetchmany when listing snippets.
+LIST_BATCH_SIZE = 500
+
+
+class PackError(Exception):
+    pass
+
+
+@dataclass
+class ImportReport:
+    source: str
+    rows: int
+    inserted: int
+    updated: int
+    elapsed: float
+    duplicates: List[str] = field(default_factory=list)
+    empty_expansions: List[str] = field(default_factory=list)
+    missing_triggers: int = 0
+    
+    @property
+    def valid(self) -> bool:
+        return not (self.duplicates or self.empty_expansions or self.missing_triggers)
+    
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+    
+    def problems(self) -> List[str]:
+        problems = []
+        if self.missing_triggers:
+            problems.append(f"{self.missing_triggers} rows without a trigger")
+        if self.duplicates:
+            problems.append(f"duplicate triggers: {', '.join(self.duplicates)}")
+        if self.empty_expansions:
+            problems.append(f"empty expansions: {', '.join(self.empty_expansions)}")
+        return problems
+
+
+def detect_format(path: Path, file_format: Optional[str] = None) -> str:
+    if file_format is None:
+        suffix = Path(path).suffix.lower()
+        if suffix not in EXTENSIONS:
+            raise ValueError(f"Cannot tell the format of '{path}', pass one of: {', '.join(sorted(READERS))}")
+        file_format = EXTENSIONS[suffix]
+    if file_format not in READERS:
+        raise ValueError(f"Unknown format '{file_format}', expected one of: {', '.join(sorted(READERS))}")
+    return file_format
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _stage(conn: 'duckdb.DuckDBPyConnection', source: Path, file_format: str, category: Optional[str]) -> None:
+    """Read ``source`` once into the temporary ``incoming`` table."""
+    reader = READERS[file_format]
+    options = ", header = true" if file_format == "csv" else ""
+    relation = f"{reader}({_quote(str(source))}{options})"
+    
+    columns = {row[0] for row in conn.execute(f"DESCRIBE SELECT * FROM {relation}").fetchall()}
+    missing = {"trigger", "expansion"} - columns
+    if missing:
+        raise PackError(f"{source} is missing column(s): {', '.join(sorted(missing))}")
+    
+    category_column = "CAST(category AS TEXT)" if "category" in columns else "NULL"
+    conn.execute(
+        f"""
+        CREATE TEMP TABLE incoming AS
+        SELECT
+            CAST(trigger AS TEXT) AS trigger,
+            CAST(expansion AS TEXT) AS expansion,
+            coalesce(nullif({category_column}, ''), ?, '') AS category
+        FROM {relation}
+        """,
+        [category],
+    )
+
+
+def _validate(conn: 'duckdb.DuckDBPyConnection', report: ImportReport) -> None:
+    report.rows = conn.execute("SELECT count(*) FROM incoming").fetchone()[0]
+    report.missing_triggers = conn.execute(
+        "SELECT count(*) FROM incoming WHERE trigger IS NULL OR trigger = ''"
+    ).fetchone()[0]
+    report.duplicates = [row[0] for row in conn.execute(
+        """
+        SELECT trigger FROM incoming
+        WHERE trigger <> ''
+        GROUP BY trigger
+        HAVING count(*) > 1
+        ORDER BY trigger
+        LIMIT ?
+        """,
+        [EXAMPLES],
+    ).fetchall()]
+    report.empty_expansions = [row[0] for row in conn.execute(
+        """
+        SELECT trigger FROM incoming
+        WHERE trigger <> '' AND (expansion IS NULL OR expansion = '')
+        ORDER BY trigger
+        LIMIT ?
+        """,
+        [EXAMPLES],
+    ).fetchall()]
+
+
+def _count_existing(conn: 'duckdb.DuckDBPyConnection', table: str) -> int:
+    return conn.execute(f"SELECT count(*) FROM incoming JOIN {table} USING (trigger)").fetchone()[0]
+
+
+def import_pack(
+    database_file: Path,
+    source: Path,
+    file_format: Optional[str] = None,
+    category: Optional[str] = None,
+    dry_run: bool = False,
+) -> ImportReport:
+    """Validate a CSV, JSON or Parquet file of snippets and upsert it.
+    
+    The file is read by DuckDB into an in-memory table, checked with a few
+    aggregate queries (missing triggers, duplicate triggers, empty
+    expansions) and merged into ``snippets`` with a single
+    ``INSERT ... ON CONFLICT`` inside one transaction, so a rejected or
+    failed import leaves the database as it was. ``database_file`` is
+    created by the first import that gets that far.
+    """
+    import duckdb
+    
+    if is_parquet(database_file):
+        raise PackError(f"Cannot import into {database_file}: Parquet packs are read-only, export one instead")
+    if detect_storage_backend(database_file) != "duckdb":
+        raise PackError(f"Cannot import into {database_file}: only DuckDB databases can be imported into")
+    source = Path(source)
+    if not source.exists():
+        raise FileNotFoundError(f"Snippet file not found: {source}")
+    file_format = detect_format(source, file_format)
+    
+    started = time.perf_counter()
+    report = ImportReport(str(source), 0, 0, 0, 0.0)
+    conn = duckdb.connect()
+    try:
+        _stage(conn, source, file_format, category)
+        _validate(conn, report)
+        if not report.valid:
+            raise PackError(f"Rejected {source}: {'; '.join(report.problems())}")
+        
+        if dry_run:
+            if Path(database_file).exists():
+                conn.execute(f"ATTACH {_quote(str(database_file))} AS target (READ_ONLY)")
+                report.updated = _count_existing(conn, "target.snippets")
+        else:
+            Path(database_file).parent.mkdir(parents=True, exist_ok=True)
+            conn.execute(f"ATTACH {_quote(str(database_file))} AS target")
+            conn.execute("USE target")
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                conn.execute(SNIPPETS_SCHEMA)
+                report.updated = _count_existing(conn, "snippets")
+                conn.execute(
+                    """
+                    INSERT INTO snippets (trigger, expansion, category)
+                    SELECT trigger, expansion, category FROM incoming
+                    ON CONFLICT (trigger) DO UPDATE SET
+                        expansion = excluded.expansion,
+                        category = excluded.category
+                    """
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        report.inserted = report.rows - report.updated
+    finally:
+        conn.close()
+    
+    report.elapsed = time.perf_counter() - started
+    logger.info(f"Imported {report.rows} snippets from {source} in {report.elapsed:.2f}s ({report.rows_per_sec:.0f} rows/sec)")
+    return report
+
+
+def _stage_columns(conn: 'duckdb.DuckDBPyConnection', path: Path, table: str) -> str:
+    """Copy the snippets of a database DuckDB cannot attach into a temporary table."""
+    with SnippetDatabase(path, idle_timeout=0) as db:
+        triggers, expansions = db.load_columns()
+    
+    if has_arrow():
+        import pyarrow
+        
+        conn.register(f"{table}_arrow", pyarrow.table({"trigger": triggers, "expansion": expansions}))
+        conn.execute(f"CREATE TEMP TABLE {table} AS SELECT * FROM {table}_arrow")
+        conn.unregister(f"{table}_arrow")
+    else:
+        conn.execute(f"CREATE TEMP TABLE {table} (trigger TEXT, expansion TEXT)")
+        conn.executemany(f"INSERT INTO {table} VALUES (?, ?)", list(zip(triggers, expansions)))
+    return table
+
+
+def _attach_layers(conn: 'duckdb.DuckDBPyConnection', database_files: Sequence[Path]) -> List[str]:
+    """One ``SELECT trigger, expansion, category, layer`` per database, in precedence order.
+    
+    DuckDB databases are attached read-only, Parquet sources are read in
+    place and SQLite and flat-file sources are loaded through their storage
+    backend, without categories.
+    """
+    layers = []
+    for index, path in enumerate(database_files):
+        if is_parquet(path):
+            relation = f"read_parquet({_quote(str(path))})"
+            columns = {row[0] for row in conn.execute(f"DESCRIBE SELECT * FROM {relation}").fetchall()}
+            category_column = "category" if "category" in columns else "''"
+        elif detect_storage_backend(path) != "duckdb":
+            relation = _stage_columns(conn, path, f"layer_{index}")
+            category_column = "''"
+        else:
+            conn.execute(f"ATTACH {_quote(str(path))} AS source_{index} (READ_ONLY)")
+            relation = f"source_{index}.snippets"
+            category_column = "category"
+        layers.append(f"SELECT trigger, expansion, {category_column} AS category, {index} AS layer FROM {relation}")
+    return layers
+
+
+def _merge_layers(layers: Sequence[str], where: str = "") -> str:
+    """Query for the layers merged with later ones taking precedence.
+    
+    ``where`` may only filter on ``trigger``: it is applied to each layer
+    before merging, which is the same as filtering afterwards because a
+    trigger's layers are all kept or all dropped.
+    """
+    selects = [f"{layer} {where}" for layer in layers]
+    return f"""
+        SELECT trigger, expansion, category
+        FROM ({' UNION ALL '.join(selects)})
+        QUALIFY row_number() OVER (PARTITION BY trigger ORDER BY layer DESC) = 1
+    """
+
+
+def export_pack(
+    database_files: Sequence[Path],
+    destination: Path,
+    file_format: Optional[str] = None,
+    category: Optional[str] = None,
+) -> int:
+    """Write the snippets of one or more databases to a file; returns the row count.
+    
+    With several databases they are merged in DuckDB with later ones taking
+    precedence, the same way the expander layers its sources, and the
+    result is written by ``COPY ... TO``.
+    """
+    import duckdb
+    
+    file_format = detect_format(destination, file_format)
+    database_files = [Path(path) for path in database_files if matching_files(path)]
+    if not database_files:
+        raise FileNotFoundError("No snippet databases to export")
+    
+    conn = duckdb.connect()
+    try:
+        layers = _attach_layers(conn, database_files)
+        conn.execute(f"CREATE TEMP TABLE merged AS {_merge_layers(layers)}")
+        if category is not None:
+            conn.execute("DELETE FROM merged WHERE category IS DISTINCT FROM ?", [category])
+        
+        Path(destination).parent.mkdir(parents=True, exist_ok=True)
+        conn.execute(f"COPY (SELECT * FROM merged ORDER BY trigger) TO {_quote(str(destination))} ({WRITERS[file_format]})")
+        return conn.execute("SELECT count(*) FROM merged").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class SnippetQuery:
+    """Filtered, ordered and paginated snippets of the merged sources, run in DuckDB.
+    
+    Nothing is loaded into Python up front: the filters, the ``ORDER BY``
+    and the ``LIMIT``/``OFFSET`` are part of the query, and :meth:`batches`
+    hands the rows over ``batch_size`` at a time with ``fetchmany``. The
+    prefix filter is pushed into each source before the layers are merged;
+    the category filter applies to the winning row of each trigger, so a
+    user snippet that moves a trigger out of a category hides it there.
+    """
+    
+    def __init__(
+        self,
+        database_files: Sequence[Path],
+        category: Optional[str] = None,
+        prefix: Optional[str] = None,
+    ):
+        import duckdb
+        
+        self.database_files = [Path(path) for path in database_files if matching_files(path)]
+        self.params: Dict[str, str] = {}
+        self.conn = duckdb.connect()
+        try:
+            if not self.database_files:
+                self.relation = "SELECT NULL::TEXT AS trigger, NULL::TEXT AS expansion, NULL::TEXT AS category LIMIT 0"
+            elif prefix:
+                self.relation = _merge_layers(
+                    _attach_layers(self.conn, self.database_files), "WHERE starts_with(trigger, $prefix)"
+                )
+                self.params["prefix"] = prefix
+            else:
+                self.relation = _merge_layers(_attach_layers(self.conn, self.database_files))
+            if category is not None:
+                self.relation = f"SELECT * FROM ({self.relation}) WHERE category = $category"
+                self.params["category"] = category
+        except Exception:
+            self.conn.close()
+            raise
+    
+    def count(self) -> int:
+        return self.conn.execute(f"SELECT count(*) FROM ({self.relation})", self.params).fetchone()[0]
+    
+    def batches(
+        self,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        batch_size: int = LIST_BATCH_SIZE,
+    ) -> Iterator[List[Tuple[str, str, str]]]:
+        """Yield ``(trigger, expansion, category)`` rows in trigger order, a batch at a time."""
+        params = dict(self.params, offset=offset)
+        page = "OFFSET $offset"
+        if limit is not None:
+            page = "LIMIT $limit " + page
+            params["limit"] = limit
+        
+        result = self.conn.execute(f"SELECT * FROM ({self.relation}) ORDER BY trigger {page}", params)
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+    
+    def close(self) -> None:
+        self.conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
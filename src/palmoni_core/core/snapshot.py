@@ -0,0 +1,82 @@
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional, Sequence
+
+from .expansions import ExpansionCache, LazySnippets
+from .matcher import SnippetMatcher, create_matcher
+from .store import CompactSnippetStore, create_snippet_store
+
+
+@dataclass(frozen=True)
+class SnippetSnapshot:
+    """Immutable, versioned pairing of the snippet mapping and its matcher.
+    
+    Reloads build a complete new snapshot and publish it with a single
+    attribute assignment; readers take one reference and use it for the
+    whole key press, so they never see a matcher from one load paired with
+    the mapping of another. ``snippets`` is a read-only view over a dict
+    that nothing else holds, so handing it out requires no copy.
+    """
+    
+    version: int
+    snippets: Mapping[str, str]
+    matcher: SnippetMatcher
+    created_at: float = field(default_factory=time.time)
+    
+    @classmethod
+    def build(cls, version: int, snippets: Dict[str, str], matcher_name: str) -> "SnippetSnapshot":
+        return cls(
+            version=version,
+            snippets=MappingProxyType(snippets),
+            matcher=create_matcher(matcher_name, snippets),
+        )
+    
+    @classmethod
+    def from_columns(
+        cls,
+        version: int,
+        triggers: Sequence[str],
+        expansions: Sequence[str],
+        matcher_name: str,
+        store: str = "dict",
+        compress_threshold: int = 0,
+    ) -> "SnippetSnapshot":
+        return cls(
+            version=version,
+            snippets=create_snippet_store(store, triggers, expansions, compress_threshold),
+            matcher=create_matcher(matcher_name, triggers),
+        )
+    
+    @classmethod
+    def from_arrow(cls, version: int, table, matcher_name: str) -> "SnippetSnapshot":
+        """Build from an Arrow table of sorted, unique triggers and their expansions.
+        
+        The compact store views the table's buffers; only the triggers are
+        turned into Python strings, for the matcher.
+        """
+        triggers = table.column("trigger")
+        return cls(
+            version=version,
+            snippets=CompactSnippetStore.from_arrow(triggers, table.column("expansion")),
+            matcher=create_matcher(matcher_name, triggers.to_pylist()),
+        )
+    
+    @classmethod
+    def from_triggers(
+        cls,
+        version: int,
+        triggers: Sequence[str],
+        row_ids: Sequence[int],
+        loader: Callable[[int, str], Optional[str]],
+        cache: ExpansionCache,
+        matcher_name: str,
+    ) -> "SnippetSnapshot":
+        return cls(
+            version=version,
+            snippets=LazySnippets(triggers, row_ids, loader, cache),
+            matcher=create_matcher(matcher_name, triggers),
+        )
+    
+    def __len__(self) -> int:
+        return len(self.snippets)
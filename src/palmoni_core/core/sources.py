@@ -0,0 +1,329 @@
+import time
+import logging
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .config import PalmoniConfig
+
+from .cache import SnapshotCache
+from .database import SnippetDatabase, is_glob, matching_files
+from .expansions import ExpansionCache
+from .matcher import SegmentedMatcher
+from .snapshot import SnippetSnapshot
+
+logger = logging.getLogger(__name__)
+
+LOAD_WORKERS = 4
+
+SourceStat = Tuple[int, int, int, int]
+
+
+@dataclass(frozen=True)
+class SnippetSource:
+    name: str
+    path: Path
+
+
+def user_database_file(config: 'PalmoniConfig') -> Path:
+    return Path(config.user_database or config.user_config_dir / "snippets.db").expanduser()
+
+
+def resolve_sources(config: 'PalmoniConfig') -> List[SnippetSource]:
+    """Snippet databases in increasing order of precedence.
+    
+    The bundled database comes first, then each team pack in the order it
+    is listed, then the user's own database: a user snippet overrides a
+    pack's, and a pack's overrides the bundled one. A path listed twice is
+    only loaded once, at its first position.
+    """
+    candidates = [SnippetSource("bundled", Path(config.database_file))]
+    for pack in config.snippet_packs:
+        pack = Path(pack).expanduser()
+        name = pack.parent.name if is_glob(pack) else pack.stem
+        candidates.append(SnippetSource(f"pack:{name}", pack))
+    candidates.append(SnippetSource("user", user_database_file(config)))
+    
+    sources = []
+    seen = set()
+    for source in candidates:
+        key = source.path.resolve()
+        if key not in seen:
+            seen.add(key)
+            sources.append(source)
+    return sources
+
+
+def source_stat(path: Path) -> Optional[SourceStat]:
+    """mtime and size of a database and its write-ahead log, or None if missing.
+    
+    For a glob of Parquet files it is the newest mtime, the total size and
+    the number of files, so adding or removing a file counts as a change.
+    """
+    if is_glob(path):
+        files = matching_files(path)
+        if not files:
+            return None
+        stats = [file.stat() for file in files]
+        return max(stat.st_mtime_ns for stat in stats), sum(stat.st_size for stat in stats), len(stats), 0
+    
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    
+    try:
+        wal = path.with_name(path.name + ".wal").stat()
+        wal_key = (wal.st_mtime_ns, wal.st_size)
+    except FileNotFoundError:
+        wal_key = (0, 0)
+    return (stat.st_mtime_ns, stat.st_size) + wal_key
+
+
+@dataclass(frozen=True)
+class SourceSegment:
+    source: SnippetSource
+    snapshot: SnippetSnapshot
+    stat: SourceStat
+    load_ms: float
+    cached: bool
+    
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+
+class LayeredSnippets(Mapping):
+    """Read-only union of snippet mappings where later layers win.
+    
+    Lookups try the layers from the highest precedence down, so nothing is
+    copied when the layers are combined. The size is worked out once: the
+    largest layer is taken as is and only the other layers' triggers are
+    checked against it.
+    """
+    
+    def __init__(self, layers: Sequence[Mapping]):
+        self.layers = tuple(layers)
+        self._lookup_order = tuple(reversed(self.layers))
+        self.lazy = any(getattr(layer, "lazy", False) for layer in self.layers)
+        
+        largest = max(self.layers, key=len, default={})
+        extra = set()
+        for layer in self.layers:
+            if layer is not largest:
+                extra.update(trigger for trigger in layer if trigger not in largest)
+        self._length = len(largest) + len(extra)
+    
+    def __getitem__(self, trigger: str) -> str:
+        for layer in self._lookup_order:
+            if trigger in layer:
+                return layer[trigger]
+        raise KeyError(trigger)
+    
+    def __contains__(self, trigger) -> bool:
+        return any(trigger in layer for layer in self.layers)
+    
+    def __iter__(self) -> Iterator[str]:
+        seen = set()
+        for layer in self._lookup_order:
+            for trigger in layer:
+                if trigger not in seen:
+                    seen.add(trigger)
+                    yield trigger
+    
+    def __len__(self) -> int:
+        return self._length
+
+
+class SnippetSources:
+    """Loads each snippet source into its own segment and merges them.
+    
+    Every source is compiled on its own and cached in its own snapshot file,
+    and the merged snapshot only references the segments, so a reload
+    rebuilds the sources whose files changed and reuses the rest. Sources
+    load concurrently on a small thread pool; DuckDB releases the GIL while
+    it scans, so the queries overlap.
+    """
+    
+    def __init__(self, config: 'PalmoniConfig', expansion_cache: Optional[ExpansionCache] = None):
+        self.config = config
+        self.expansion_cache = expansion_cache
+        self.sources = resolve_sources(config)
+        self.segments: Dict[SnippetSource, SourceSegment] = {}
+        self.errors: Dict[SnippetSource, str] = {}
+        self._databases: Dict[SnippetSource, SnippetDatabase] = {}
+    
+    @property
+    def bundled(self) -> SnippetSource:
+        return self.sources[0]
+    
+    def paths(self) -> List[Path]:
+        return [source.path for source in self.sources]
+    
+    def database(self, source: SnippetSource) -> SnippetDatabase:
+        """The database of ``source``, opened lazily.
+        
+        ``storage_backend`` only applies to the user's own database; the
+        bundled database and the packs are always detected from their
+        extension and file header.
+        """
+        db = self._databases.get(source)
+        if db is None:
+            backend = self.config.storage_backend if source.name == "user" else "auto"
+            db = self._databases[source] = SnippetDatabase(
+                source.path, idle_timeout=self.config.db_idle_timeout, backend=backend
+            )
+        return db
+    
+    def snapshot_cache(self, source: SnippetSource) -> Optional[SnapshotCache]:
+        if is_glob(source.path):
+            return None
+        if self.config.snapshot_cache and self.config.matcher == "aho-corasick" and self.expansion_cache is None:
+            return SnapshotCache(
+                self.config.user_config_dir / "cache",
+                source.path,
+                store=self.config.snippet_store,
+                compress_threshold=self.config.compress_threshold,
+            )
+        return None
+    
+    def changed(self) -> List[SnippetSource]:
+        """Sources whose files were created, changed or removed since they were loaded."""
+        changed = []
+        for source in self.sources:
+            segment = self.segments.get(source)
+            if source_stat(source.path) != (segment.stat if segment is not None else None):
+                changed.append(source)
+        return changed
+    
+    def load(
+        self,
+        sources: Optional[Iterable[SnippetSource]] = None,
+        use_cache: bool = True,
+        strict: bool = False,
+    ) -> List[SourceSegment]:
+        """Rebuild the segments of ``sources`` (all of them by default).
+        
+        With ``strict`` the first failure is raised and no segment is
+        replaced; otherwise a source that fails to load is logged and left
+        out of the merged snapshot.
+        """
+        pending = list(self.sources if sources is None else sources)
+        if len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(pending), LOAD_WORKERS), thread_name_prefix="palmoni-load") as pool:
+                outcomes = list(pool.map(lambda source: self._try_load(source, use_cache), pending))
+        else:
+            outcomes = [self._try_load(source, use_cache) for source in pending]
+        
+        if strict:
+            for _, error in outcomes:
+                if error is not None:
+                    raise error
+        
+        loaded = []
+        for source, (segment, error) in zip(pending, outcomes):
+            self.segments.pop(source, None)
+            self.errors.pop(source, None)
+            if error is not None:
+                self.errors[source] = str(error)
+                logger.error(f"Failed to load snippets from {source.name} ({source.path}): {error}")
+            elif segment is not None:
+                self.segments[source] = segment
+                loaded.append(segment)
+        return loaded
+    
+    def _try_load(self, source: SnippetSource, use_cache: bool) -> Tuple[Optional[SourceSegment], Optional[Exception]]:
+        try:
+            return self._load_segment(source, use_cache), None
+        except Exception as e:
+            return None, e
+    
+    def _load_segment(self, source: SnippetSource, use_cache: bool) -> Optional[SourceSegment]:
+        stat = source_stat(source.path)
+        if stat is None:
+            return None
+        
+        started = time.perf_counter()
+        cache = self.snapshot_cache(source)
+        if cache is not None and use_cache:
+            snapshot = cache.load(0)
+            if snapshot is not None:
+                return SourceSegment(source, snapshot, stat, (time.perf_counter() - started) * 1000, cached=True)
+        
+        db = self.database(source)
+        try:
+            if self.expansion_cache is None and self._loads_arrow(db):
+                snapshot = SnippetSnapshot.from_arrow(0, db.load_arrow(), self.config.matcher)
+            elif self.expansion_cache is not None:
+                triggers, row_ids = db.load_trigger_ids()
+                snapshot = SnippetSnapshot.from_triggers(
+                    0, triggers, row_ids, db.get_expansion, self.expansion_cache, self.config.matcher
+                )
+            else:
+                triggers, expansions = db.load_columns()
+                snapshot = SnippetSnapshot.from_columns(
+                    0,
+                    triggers,
+                    expansions,
+                    self.config.matcher,
+                    store=self.config.snippet_store,
+                    compress_threshold=self.config.compress_threshold,
+                )
+        finally:
+            if self.expansion_cache is None:
+                db.close()
+        
+        if cache is not None:
+            cache.store(snapshot)
+        load_ms = (time.perf_counter() - started) * 1000
+        logger.debug(f"Loaded {len(snapshot)} snippets from {source.name} in {load_ms:.1f}ms")
+        return SourceSegment(source, snapshot, stat, load_ms, cached=False)
+    
+    def _loads_arrow(self, db: SnippetDatabase) -> bool:
+        """Whether a source can be loaded into the compact store straight from Arrow."""
+        return (
+            db.supports_arrow
+            and self.config.snippet_store == "compact"
+            and not self.config.compress_threshold
+        )
+    
+    def snapshot(self, version: int) -> SnippetSnapshot:
+        """Merge the loaded segments into one snapshot, in precedence order."""
+        segments = [self.segments[source] for source in self.sources if source in self.segments]
+        if not segments:
+            return SnippetSnapshot.from_columns(version, [], [], self.config.matcher)
+        if len(segments) == 1:
+            return replace(segments[0].snapshot, version=version, created_at=time.time())
+        
+        return SnippetSnapshot(
+            version=version,
+            snippets=LayeredSnippets([segment.snapshot.snippets for segment in segments]),
+            matcher=SegmentedMatcher([segment.snapshot.matcher for segment in segments]),
+        )
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        stats = []
+        for source in self.sources:
+            segment = self.segments.get(source)
+            if segment is not None:
+                status = "cached" if segment.cached else "loaded"
+            elif source in self.errors:
+                status = f"error: {self.errors[source]}"
+            else:
+                status = "missing"
+            db = self._databases.get(source)
+            stats.append({
+                "name": source.name,
+                "path": str(source.path),
+                "status": status,
+                "backend": db.backend.name if db is not None else None,
+                "snippets": len(segment) if segment is not None else 0,
+                "load_ms": segment.load_ms if segment is not None else 0.0,
+            })
+        return stats
+    
+    def close(self) -> None:
+        for db in self._databases.values():
+            db.close()
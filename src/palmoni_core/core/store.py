@@ -0,0 +1,184 @@
+import zlib
+import logging
+from array import array
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CompactSnippetStore(Mapping):
+    """Snippet mapping packed into a few contiguous buffers.
+    
+    Triggers are sorted by their UTF-8 bytes and concatenated into one blob
+    with an offset array, so a lookup is a binary search. Expansions live in
+    a second blob; identical bodies are stored once and referenced through
+    ``expansion_ids``, and bodies flagged in ``compressed`` are zlib-packed
+    and only inflated when they are read.
+    """
+    
+    def __init__(
+        self,
+        trigger_offsets: Sequence[int],
+        trigger_blob,
+        expansion_offsets: Sequence[int],
+        expansion_blob,
+        expansion_ids: Optional[Sequence[int]] = None,
+        compressed: Optional[Sequence[int]] = None,
+    ):
+        self._trigger_offsets = trigger_offsets
+        self._trigger_blob = trigger_blob
+        self._expansion_offsets = expansion_offsets
+        self._expansion_blob = expansion_blob
+        self._expansion_ids = expansion_ids
+        self._compressed = compressed
+    
+    @classmethod
+    def build(
+        cls,
+        triggers: Sequence[str],
+        expansions: Sequence[str],
+        compress_threshold: int = 0,
+    ) -> "CompactSnippetStore":
+        """Pack parallel trigger and expansion columns.
+        
+        Bodies of at least ``compress_threshold`` bytes are compressed when
+        that makes them smaller; ``0`` disables compression. Later rows win
+        for duplicate triggers, as with ``dict(zip(...))``.
+        """
+        latest = {trigger: expansion for trigger, expansion in zip(triggers, expansions)}
+        encoded = sorted((trigger.encode("utf-8"), expansion) for trigger, expansion in latest.items())
+        
+        trigger_offsets = array("Q", [0])
+        trigger_blob = bytearray()
+        expansion_offsets = array("Q", [0])
+        expansion_blob = bytearray()
+        expansion_ids = array("I")
+        compressed = array("B")
+        interned: Dict[str, int] = {}
+        
+        for raw_trigger, expansion in encoded:
+            trigger_blob += raw_trigger
+            trigger_offsets.append(len(trigger_blob))
+            
+            expansion_id = interned.get(expansion)
+            if expansion_id is None:
+                expansion_id = interned[expansion] = len(compressed)
+                body = expansion.encode("utf-8")
+                packed = zlib.compress(body) if compress_threshold and len(body) >= compress_threshold else body
+                if len(packed) < len(body):
+                    body = packed
+                    compressed.append(1)
+                else:
+                    compressed.append(0)
+                expansion_blob += body
+                expansion_offsets.append(len(expansion_blob))
+            expansion_ids.append(expansion_id)
+        
+        logger.debug(f"Packed {len(encoded)} snippets ({len(interned)} distinct expansions) into {len(trigger_blob) + len(expansion_blob)} bytes")
+        return cls(trigger_offsets, bytes(trigger_blob), expansion_offsets, bytes(expansion_blob), expansion_ids, compressed)
+    
+    @classmethod
+    def from_arrow(cls, triggers, expansions) -> "CompactSnippetStore":
+        """Wrap Arrow string columns without copying their contents.
+        
+        ``triggers`` must already be sorted and unique (see
+        :meth:`SnippetDatabase.load_arrow`). Arrow keeps each column as an
+        offset array and a byte buffer, the same layout this store uses, so
+        the store just views those buffers; no per-row Python string is made.
+        """
+        trigger_offsets, trigger_blob = _arrow_string_buffers(triggers)
+        expansion_offsets, expansion_blob = _arrow_string_buffers(expansions)
+        return cls(trigger_offsets, trigger_blob, expansion_offsets, expansion_blob)
+    
+    @property
+    def nbytes(self) -> int:
+        """Size of the packed buffers and offset arrays."""
+        parts = [self._trigger_offsets, self._trigger_blob, self._expansion_offsets, self._expansion_blob]
+        parts += [part for part in (self._expansion_ids, self._compressed) if part is not None]
+        return sum(memoryview(part).nbytes for part in parts)
+    
+    @property
+    def distinct_expansions(self) -> int:
+        return len(self._expansion_offsets) - 1
+    
+    def _trigger_bytes(self, index: int) -> bytes:
+        return bytes(self._trigger_blob[self._trigger_offsets[index]:self._trigger_offsets[index + 1]])
+    
+    def trigger(self, index: int) -> str:
+        return self._trigger_bytes(index).decode("utf-8")
+    
+    def expansion(self, index: int) -> str:
+        if self._expansion_ids is not None:
+            index = self._expansion_ids[index]
+        body = bytes(self._expansion_blob[self._expansion_offsets[index]:self._expansion_offsets[index + 1]])
+        if self._compressed is not None and self._compressed[index]:
+            body = zlib.decompress(body)
+        return body.decode("utf-8")
+    
+    def index(self, trigger: str) -> int:
+        key = trigger.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._trigger_bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self._trigger_bytes(lo) == key:
+            return lo
+        return -1
+    
+    def __getitem__(self, trigger: str) -> str:
+        index = self.index(trigger) if isinstance(trigger, str) else -1
+        if index < 0:
+            raise KeyError(trigger)
+        return self.expansion(index)
+    
+    def __contains__(self, trigger) -> bool:
+        return isinstance(trigger, str) and self.index(trigger) >= 0
+    
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self.trigger(index)
+    
+    def __len__(self) -> int:
+        return len(self._trigger_offsets) - 1
+
+
+def _arrow_string_buffers(column) -> Tuple[memoryview, memoryview]:
+    import pyarrow as pa
+    
+    array = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+    if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+        array = array.cast(pa.large_string())
+    
+    _, offsets, data = array.buffers()
+    typecode = "q" if pa.types.is_large_string(array.type) else "i"
+    offsets = memoryview(offsets).cast("B").cast(typecode)[array.offset:array.offset + len(array) + 1]
+    return offsets, memoryview(data) if data is not None else memoryview(b"")
+
+
+def build_dict_store(triggers: Sequence[str], expansions: Sequence[str], compress_threshold: int = 0) -> Mapping[str, str]:
+    return MappingProxyType(dict(zip(triggers, expansions)))
+
+
+SNIPPET_STORES: Dict[str, Callable[..., Mapping[str, str]]] = {
+    "dict": build_dict_store,
+    "compact": CompactSnippetStore.build,
+}
+
+
+def create_snippet_store(
+    name: str,
+    triggers: Sequence[str],
+    expansions: Sequence[str],
+    compress_threshold: int = 0,
+) -> Mapping[str, str]:
+    try:
+        build = SNIPPET_STORES[name]
+    except KeyError:
+        raise ValueError(f"Unknown snippet store '{name}', expected one of: {', '.join(sorted(SNIPPET_STORES))}")
+    
+    return build(triggers, expansions, compress_threshold)
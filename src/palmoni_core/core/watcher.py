@@ -0,0 +1,100 @@
+import logging
+import threading
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Set
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from .database import is_glob
+
+logger = logging.getLogger(__name__)
+
+WATCHED_SUFFIXES = ("", ".wal")
+
+
+class SnippetWatcher(FileSystemEventHandler):
+    """Calls ``on_change`` once a burst of writes to a snippet source settles.
+    
+    The parent directories are watched rather than the files themselves so
+    that atomic replaces (write to a temp file, then rename) are seen too.
+    DuckDB's write-ahead log next to a database counts as part of it, and a
+    path with glob characters (a set of Parquet files) matches any file it
+    names.
+    """
+    
+    def __init__(self, paths: Iterable[Path], on_change: Callable[[], None], debounce: float = 0.5):
+        super().__init__()
+        self.paths = [Path(path) for path in paths]
+        self.on_change = on_change
+        self.debounce = debounce
+        
+        self._watched: Set[Path] = {
+            path.resolve().with_name(path.name + suffix)
+            for path in self.paths
+            for suffix in WATCHED_SUFFIXES
+        }
+        self._patterns = [str(path.resolve()) for path in self.paths if is_glob(path)]
+        self._observer: Optional[Observer] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+    
+    def start(self) -> None:
+        if self._observer is not None:
+            return
+        
+        observer = Observer()
+        for directory in sorted({path.parent for path in self._watched}):
+            if directory.is_dir():
+                observer.schedule(self, str(directory), recursive=False)
+            else:
+                logger.warning(f"Not watching missing snippet directory: {directory}")
+        
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        logger.debug(f"Watching {len(self.paths)} snippet source(s) for changes")
+    
+    def stop(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=1)
+            self._observer = None
+    
+    def _is_watched(self, path) -> bool:
+        if not path:
+            return False
+        if isinstance(path, bytes):
+            path = path.decode()
+        resolved = Path(path).resolve()
+        return resolved in self._watched or any(fnmatch(str(resolved), pattern) for pattern in self._patterns)
+    
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.is_directory or event.event_type in ("opened", "closed_no_write"):
+            return
+        
+        if self._is_watched(event.src_path) or self._is_watched(getattr(event, "dest_path", "")):
+            self._schedule()
+    
+    def _schedule(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def _fire(self) -> None:
+        with self._lock:
+            self._timer = None
+        
+        try:
+            self.on_change()
+        except Exception as e:
+            logger.error(f"Error reloading snippets: {e}")
@@ -0,0 +1,113 @@
+import time
+import tempfile
+from pathlib import Path
+
+from palmoni_core.core.analytics import UsageRecorder, load_usage
+
+
+class TestUsageRecorder:
+    def test_flush_writes_recorded_events(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "analytics.db"
+            recorder = UsageRecorder(path)
+            
+            recorder.record("git::st", 3)
+            recorder.record("git::st", 3)
+            recorder.record("brb", 10)
+            
+            assert not path.exists()
+            assert recorder.flush() == 3
+            assert recorder.pending == 0
+            
+            usage = load_usage(path)
+        
+        assert usage["expansions"] == 3
+        assert usage["keystrokes_saved"] == 16
+        assert usage["top"] == [("git::st", 2, 6), ("brb", 1, 10)]
+    
+    def test_ring_drops_oldest_when_full(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "analytics.db"
+            recorder = UsageRecorder(path, capacity=2)
+            
+            for trigger in ("a", "b", "c"):
+                recorder.record(trigger, 1)
+            recorder.flush()
+            
+            usage = load_usage(path)
+        
+        assert recorder.stats()["dropped"] == 1
+        assert sorted(trigger for trigger, _, _ in usage["top"]) == ["b", "c"]
+    
+    def test_flushes_are_batched(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "analytics.db"
+            recorder = UsageRecorder(path, batch_size=2)
+            
+            for _ in range(5):
+                recorder.record("x", 1)
+            
+            assert len(recorder._take_batch()) == 2
+            assert recorder.flush() == 3
+            
+            assert load_usage(path)["expansions"] == 3
+    
+    def test_background_thread_flushes_full_batch(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "analytics.db"
+            recorder = UsageRecorder(path, flush_interval=60, batch_size=2)
+            recorder.start()
+            try:
+                recorder.record("a", 1)
+                recorder.record("b", 1)
+                
+                deadline = time.monotonic() + 5
+                while recorder.stats()["written"] < 2 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            finally:
+                recorder.stop()
+            
+            assert recorder.stats()["written"] == 2
+            assert not recorder.running
+    
+    def test_stop_flushes_pending_events(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "analytics.db"
+            recorder = UsageRecorder(path, flush_interval=60)
+            recorder.start()
+            recorder.record("a", 1)
+            recorder.stop()
+            
+            assert load_usage(path)["expansions"] == 1
+    
+    def test_unwritable_path_keeps_events(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            recorder = UsageRecorder(Path(temp_dir))
+            recorder.record("a", 1)
+            
+            assert recorder.flush() == 0
+        
+        assert recorder.stats()["failed_flushes"] == 1
+        assert recorder.pending == 1
+
+
+class TestLoadUsage:
+    def test_missing_database(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            usage = load_usage(Path(temp_dir) / "analytics.db")
+        
+        assert usage == {"expansions": 0, "keystrokes_saved": 0, "top": []}
+    
+    def test_limit_and_days(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "analytics.db"
+            recorder = UsageRecorder(path)
+            for trigger in ("a", "a", "b", "c"):
+                recorder.record(trigger, 1)
+            recorder.flush()
+            
+            top = load_usage(path, limit=1)["top"]
+            recent = load_usage(path, days=1)["expansions"]
+        
+        assert top == [("a", 2, 2)]
+        assert recent == 4
@@ -0,0 +1,141 @@
+import io
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import duckdb
+
+from palmoni_core.core.batch import StreamExpander, _fork_context, expand_files, expand_stream, load_snapshot
+from palmoni_core.core.config import PalmoniConfig
+from palmoni_core.core.expander import TextExpander
+from palmoni_core.core.keyio import MemoryOutputSink, ReplayInputSource
+
+BOUNDARIES = {" ", "\n", "\t"}
+
+
+def create_test_database(temp_dir: str) -> Path:
+    db_path = Path(temp_dir) / "test.db"
+    conn = duckdb.connect(str(db_path))
+    conn.execute("""
+        CREATE TABLE snippets (
+            trigger TEXT PRIMARY KEY,
+            expansion TEXT NOT NULL,
+            category TEXT DEFAULT '',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    for trigger, expansion in [("git::st", "git status"), ("brb", "be right back"), ("py::main", "if __name__ == '__main__':")]:
+        conn.execute("INSERT INTO snippets (trigger, expansion) VALUES (?, ?)", [trigger, expansion])
+    conn.close()
+    return db_path
+
+
+class TestStreamExpander:
+    def make_expander(self, temp_dir: str, **overrides) -> StreamExpander:
+        config = PalmoniConfig(database_file=create_test_database(temp_dir), user_config_dir=Path(temp_dir), **overrides)
+        return StreamExpander(load_snapshot(config), BOUNDARIES)
+    
+    def test_expands_triggers(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            expander = self.make_expander(temp_dir)
+            
+            text = expander.feed("run git::st, brb\n\tpy::main") + expander.finish()
+        
+        assert text == "run git status, be right back\n\tif __name__ == '__main__':"
+        assert expander.expansions == 3
+    
+    def test_chunking_does_not_change_output(self):
+        source = "git::st brb " * 50 + "py::ma" + "in\r\n" * 3
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            whole = self.make_expander(temp_dir)
+            expected = whole.feed(source) + whole.finish()
+            
+            chunked = StreamExpander(whole.snapshot, BOUNDARIES)
+            parts = [chunked.feed(source[i:i + 5]) for i in range(0, len(source), 5)]
+            parts.append(chunked.finish())
+        
+        assert "".join(parts) == expected
+        assert chunked.expansions == whole.expansions == 101
+    
+    def test_matches_key_listener(self):
+        source = "ok git::st\nthen brb\tdone py::main"
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = PalmoniConfig(
+                database_file=create_test_database(temp_dir),
+                user_config_dir=Path(temp_dir),
+                watch_snippets=False
+            )
+            sink = MemoryOutputSink()
+            TextExpander(
+                config,
+                input_source=ReplayInputSource.from_text(source, echo=sink),
+                output_sink=sink,
+            ).start()
+            
+            expander = StreamExpander(load_snapshot(config), config.boundary_chars)
+            text = expander.feed(source) + expander.finish()
+        
+        assert text == sink.text
+    
+    def test_expand_stream(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            expander = self.make_expander(temp_dir, snapshot_cache=False)
+            output = io.StringIO()
+            
+            bytes_read = expand_stream(expander, io.StringIO("brb é"), output, chunk_size=2)
+        
+        assert output.getvalue() == "be right back é"
+        assert bytes_read == len("brb é".encode("utf-8"))
+
+
+class TestExpandFiles:
+    def test_expand_files_in_order(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = PalmoniConfig(database_file=create_test_database(temp_dir), user_config_dir=Path(temp_dir))
+            paths = []
+            for index in range(3):
+                path = Path(temp_dir) / f"input-{index}.txt"
+                path.write_text(f"{index}: brb\n", encoding="utf-8")
+                paths.append(path)
+            
+            serial = io.StringIO()
+            list(expand_files(config, paths, serial, jobs=1))
+            parallel = io.StringIO()
+            results = list(expand_files(config, paths, parallel, jobs=2))
+        
+        assert serial.getvalue() == "".join(f"{index}: be right back\n" for index in range(3))
+        assert parallel.getvalue() == serial.getvalue()
+        assert [result.source for result in results] == [str(path) for path in paths]
+        assert sum(result.expansions for result in results) == 3
+    
+    def test_workers_share_uncached_snapshot(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = PalmoniConfig(
+                database_file=create_test_database(temp_dir),
+                user_config_dir=Path(temp_dir),
+                snapshot_cache=False
+            )
+            paths = []
+            for index in range(2):
+                path = Path(temp_dir) / f"input-{index}.txt"
+                path.write_text("brb\n" * 1000, encoding="utf-8")
+                paths.append(path)
+            
+            loads = Path(temp_dir) / "loads.txt"
+            
+            def counting_load(config):
+                with open(loads, "a") as f:
+                    f.write(f"{os.getpid()}\n")
+                return load_snapshot(config)
+            
+            output = io.StringIO()
+            with patch("palmoni_core.core.batch.load_snapshot", side_effect=counting_load):
+                list(expand_files(config, paths, output, jobs=2))
+            
+            if _fork_context() is not None:
+                assert loads.read_text().split() == [str(os.getpid())]
+            assert output.getvalue() == "be right back\n" * 2000
+            assert not list(Path(tempfile.gettempdir()).glob("palmoni-expand-*"))
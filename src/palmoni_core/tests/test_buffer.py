@@ -0,0 +1,67 @@
+import pytest
+
+from palmoni_core.core.buffer import TypedBuffer
+from palmoni_core.core.matcher import AhoCorasickMatcher, ReversedTrieMatcher
+
+
+TRIGGERS = ["git::st", "::ty"]
+
+
+@pytest.mark.parametrize("matcher_class", [AhoCorasickMatcher, ReversedTrieMatcher])
+class TestTypedBuffer:
+    def feed(self, buffer: TypedBuffer, text: str) -> None:
+        for ch in text:
+            buffer.append(ch)
+    
+    def test_capacity_sized_to_longest_trigger(self, matcher_class):
+        buffer = TypedBuffer(matcher_class(TRIGGERS))
+        assert buffer.capacity == len("git::st") + 1
+    
+    def test_drops_oldest_characters(self, matcher_class):
+        buffer = TypedBuffer(matcher_class(TRIGGERS))
+        self.feed(buffer, "x" * 100 + "git::st")
+        
+        assert len(buffer) == buffer.capacity
+        assert buffer.text() == "xgit::st"
+        assert buffer.match() == "git::st"
+    
+    def test_pop_restores_previous_match(self, matcher_class):
+        buffer = TypedBuffer(matcher_class(TRIGGERS))
+        self.feed(buffer, "::tyx")
+        assert buffer.match() is None
+        
+        buffer.pop()
+        
+        assert buffer.text() == "::ty"
+        assert buffer.match() == "::ty"
+    
+    def test_pop_past_start_clears(self, matcher_class):
+        buffer = TypedBuffer(matcher_class(TRIGGERS))
+        self.feed(buffer, "ab")
+        
+        for _ in range(5):
+            buffer.pop()
+        
+        assert buffer.text() == ""
+        self.feed(buffer, "::ty")
+        assert buffer.match() == "::ty"
+    
+    def test_match_before_last(self, matcher_class):
+        buffer = TypedBuffer(matcher_class(TRIGGERS))
+        self.feed(buffer, "::ty ")
+        
+        assert buffer.match() is None
+        assert buffer.match_before_last() == "::ty"
+    
+    def test_match_before_last_empty(self, matcher_class):
+        buffer = TypedBuffer(matcher_class(TRIGGERS))
+        assert buffer.match_before_last() is None
+    
+    def test_bind_replays_retained_text(self, matcher_class):
+        buffer = TypedBuffer(matcher_class(TRIGGERS))
+        self.feed(buffer, "git::s")
+        
+        buffer.bind(matcher_class(TRIGGERS + ["git::s"]))
+        
+        assert buffer.text() == "git::s"
+        assert buffer.match() == "git::s"
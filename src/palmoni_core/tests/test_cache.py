@@ -0,0 +1,134 @@
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from palmoni_core.core.cache import MappedSnippets, SnapshotCache
+from palmoni_core.core.matcher import AhoCorasickMatcher
+from palmoni_core.core.snapshot import SnippetSnapshot
+
+SNIPPETS = {
+    "git::st": "git status",
+    "st": "street",
+    "::ty": "Thank you",
+    "::café": "Café au lait",
+    "py::class": "class Test:\n    pass",
+}
+
+
+class TestSnapshotCache:
+    @pytest.fixture
+    def workspace(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "snippets.db"
+            db_path.write_bytes(b"snippet database contents")
+            yield SnapshotCache(Path(temp_dir) / "cache", db_path), db_path
+    
+    def test_round_trip(self, workspace):
+        cache, _ = workspace
+        assert cache.store(SnippetSnapshot.build(1, dict(SNIPPETS), "aho-corasick"))
+        
+        snapshot = cache.load(version=2)
+        
+        assert snapshot.version == 2
+        assert isinstance(snapshot.snippets, MappedSnippets)
+        assert dict(snapshot.snippets) == SNIPPETS
+        assert snapshot.snippets["::café"] == "Café au lait"
+        assert "missing" not in snapshot.snippets
+        with pytest.raises(KeyError):
+            snapshot.snippets["missing"]
+    
+    def test_matcher_matches_in_memory_automaton(self, workspace):
+        cache, _ = workspace
+        cache.store(SnippetSnapshot.build(1, dict(SNIPPETS), "aho-corasick"))
+        mapped = cache.load(version=1).matcher
+        reference = AhoCorasickMatcher(SNIPPETS)
+        
+        assert mapped.max_length == reference.max_length
+        assert mapped.state_count == reference.state_count
+        for text in ("run git::st", "st", "gist", "x::café", "::t", "py::class", ""):
+            assert mapped.longest_suffix(text) == reference.longest_suffix(text)
+            
+            mapped_state, reference_state = mapped.initial_state(), reference.initial_state()
+            for ch in text:
+                mapped_state = mapped.advance(mapped_state, ch)
+                reference_state = reference.advance(reference_state, ch)
+                assert mapped.match_state(mapped_state) == reference.match_state(reference_state)
+    
+    def test_missing_cache(self, workspace):
+        cache, _ = workspace
+        
+        assert cache.load(version=1) is None
+    
+    def test_changed_database_is_stale(self, workspace):
+        cache, db_path = workspace
+        cache.store(SnippetSnapshot.build(1, dict(SNIPPETS), "aho-corasick"))
+        
+        db_path.write_bytes(b"different database contents")
+        
+        assert cache.load(version=2) is None
+    
+    def test_touched_database_is_still_valid(self, workspace):
+        cache, db_path = workspace
+        cache.store(SnippetSnapshot.build(1, dict(SNIPPETS), "aho-corasick"))
+        
+        stat = db_path.stat()
+        os.utime(db_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        
+        assert cache.load(version=2) is not None
+        assert cache.load(version=3) is not None
+    
+    def test_corrupt_cache_is_ignored(self, workspace):
+        cache, _ = workspace
+        cache.store(SnippetSnapshot.build(1, dict(SNIPPETS), "aho-corasick"))
+        
+        cache.path.write_bytes(b"garbage")
+        
+        assert cache.load(version=1) is None
+    
+    def test_store_settings_are_part_of_the_key(self, workspace):
+        cache, db_path = workspace
+        cache.store(SnippetSnapshot.build(1, dict(SNIPPETS), "aho-corasick"))
+        
+        as_dict = SnapshotCache(cache.path.parent, db_path, store="dict")
+        compressed = SnapshotCache(cache.path.parent, db_path, store="compact", compress_threshold=8)
+        
+        assert as_dict.load(version=1) is None
+        assert compressed.load(version=1) is None
+        
+        as_dict.store(SnippetSnapshot.build(1, dict(SNIPPETS), "aho-corasick"))
+        snapshot = as_dict.load(version=1)
+        assert not isinstance(snapshot.snippets, MappedSnippets)
+        assert dict(snapshot.snippets) == SNIPPETS
+        assert snapshot.matcher.longest_suffix("run git::st") == "git::st"
+        
+        compressed.store(SnippetSnapshot.build(1, dict(SNIPPETS), "aho-corasick"))
+        snapshot = compressed.load(version=1)
+        assert isinstance(snapshot.snippets, MappedSnippets)
+        assert dict(snapshot.snippets) == SNIPPETS
+        assert cache.load(version=1) is None
+    
+    def test_only_aho_corasick_is_stored(self, workspace):
+        cache, _ = workspace
+        
+        assert not cache.store(SnippetSnapshot.build(1, dict(SNIPPETS), "trie"))
+        assert not cache.path.exists()
+    
+    def test_cache_hit_does_not_import_duckdb(self, workspace):
+        cache, db_path = workspace
+        cache.store(SnippetSnapshot.build(1, dict(SNIPPETS), "aho-corasick"))
+        
+        script = (
+            "import sys\n"
+            "from pathlib import Path\n"
+            "from palmoni_core.core.cache import SnapshotCache\n"
+            f"cache = SnapshotCache(Path({str(cache.path.parent)!r}), Path({str(db_path)!r}))\n"
+            "assert len(cache.load(version=1)) == 5\n"
+            "print('duckdb' in sys.modules)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        
+        assert result.stdout.strip() == "False"
@@ -7,6 +7,8 @@ from typer.testing import CliRunner
 
 from palmoni_core.cli.commands import app
 from palmoni_core.core.config import PalmoniConfig
+from palmoni_core.core.diagnostics import ImportTime
+from palmoni_core.core.instrumentation import Instrumentation
 
 
 class TestCLIList:
@@ -96,6 +98,43 @@ class TestCLIList:
         assert "No snippets found" in result.stdout
         assert "Check your database" in result.stdout
     
+    def test_list_command_filters_and_pages(self):
+        runner = CliRunner()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_config = PalmoniConfig(
+                database_file=self.create_test_database(temp_dir),
+                user_config_dir=Path(temp_dir)
+            )
+            
+            with patch('palmoni_core.cli.commands.ensure_user_setup'):
+                with patch('palmoni_core.cli.commands.load_config', return_value=mock_config):
+                    with patch('palmoni_core.core.expander.TextExpander') as mock_expander_class:
+                        paged = runner.invoke(app, ["list", "--limit", "1", "--offset", "1"])
+                        filtered = runner.invoke(app, ["list", "--category", "python", "--prefix", "py::"])
+                        empty = runner.invoke(app, ["list", "--prefix", "nope"])
+        
+        assert not mock_expander_class.called
+        assert paged.exit_code == 0
+        assert "Loaded 3 snippets from database (showing 2-2):" in paged.stdout
+        assert "py::class" in paged.stdout
+        assert "git::st" not in paged.stdout
+        assert "test::long" not in paged.stdout
+        assert "Loaded 1 matching snippets" in filtered.stdout
+        assert "py::class" in filtered.stdout
+        assert "No snippets match." in empty.stdout
+    
+    def test_list_command_rejects_negative_paging(self):
+        runner = CliRunner()
+        
+        with patch('palmoni_core.cli.commands.load_config') as mock_load_config:
+            limit = runner.invoke(app, ["list", "--limit", "-1"])
+            offset = runner.invoke(app, ["list", "--offset", "-5"])
+        
+        assert limit.exit_code == 2
+        assert offset.exit_code == 2
+        assert not mock_load_config.called
+    
     def test_list_command_with_verbose(self):
         runner = CliRunner()
         
@@ -151,7 +190,7 @@ class TestCLIStart:
                 with patch('palmoni_core.cli.commands.load_config') as mock_load_config:
                     mock_load_config.return_value = mock_config
                     
-                    with patch('palmoni_core.cli.commands.TextExpander') as mock_expander_class:
+                    with patch('palmoni_core.core.expander.TextExpander') as mock_expander_class:
                         mock_expander = Mock()
                         mock_expander_class.return_value = mock_expander
                         mock_expander.__enter__ = Mock(return_value=mock_expander)
@@ -166,6 +205,17 @@ class TestCLIStart:
         assert "Starting palmoni text expander" in result.stdout
         assert "Shutting down gracefully" in result.stdout
     
+    def test_start_profile_in_daemon_points_to_ctl(self):
+        runner = CliRunner()
+        
+        with patch('palmoni_core.cli.commands.read_pidfile', return_value=None):
+            with patch('palmoni_core.cli.commands.daemonize', side_effect=SystemExit(0)) as mock_daemonize:
+                result = runner.invoke(app, ["start", "--profile"])
+        
+        assert result.exit_code == 0
+        mock_daemonize.assert_called_once_with(["--profile"])
+        assert "palmoni ctl profile" in result.stdout
+    
     def test_start_command_with_config_file(self):
         runner = CliRunner()
         
@@ -181,7 +231,7 @@ class TestCLIStart:
                     )
                     mock_load_config.return_value = mock_config
                     
-                    with patch('palmoni_core.cli.commands.TextExpander') as mock_expander_class:
+                    with patch('palmoni_core.core.expander.TextExpander') as mock_expander_class:
                         mock_expander = Mock()
                         mock_expander_class.return_value = mock_expander
                         mock_expander.__enter__ = Mock(return_value=mock_expander)
@@ -238,6 +288,7 @@ class TestCLIConfig:
         assert "/test/snippets.db" in result.stdout
         assert "0.5s" in result.stdout
         assert "DEBUG" in result.stdout
+        assert "bundled: /test/snippets.db - missing" in result.stdout
     
     def test_config_no_options(self):
         runner = CliRunner()
@@ -248,6 +299,177 @@ class TestCLIConfig:
         assert "Use --show to display configuration or --init to initialize" in result.stdout
 
 
+class TestCLIDiag:
+    def test_diag_memory_command(self):
+        runner = CliRunner()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = TestCLIList.create_test_database(self, temp_dir)
+            
+            mock_config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            with patch('palmoni_core.cli.commands.load_config') as mock_load_config:
+                mock_load_config.return_value = mock_config
+                
+                result = runner.invoke(app, ["diag", "memory", "--compress-threshold", "16"])
+        
+        assert result.exit_code == 0
+        assert "Snippets: 3" in result.stdout
+        assert "dict" in result.stdout
+        assert "compact+zlib" in result.stdout
+    
+    def test_diag_startup_command(self):
+        runner = CliRunner()
+        timings = [
+            ImportTime("palmoni_core", 50, 2000, 0),
+            ImportTime("duckdb", 1500, 1800, 1),
+        ]
+        
+        with patch('palmoni_core.core.diagnostics.measure_import_times', return_value=timings):
+            result = runner.invoke(app, ["diag", "startup"])
+        
+        assert result.exit_code == 0
+        assert "took 2.0ms" in result.stdout
+        assert "Heavy dependencies loaded: duckdb" in result.stdout
+
+
+class TestCLIReplay:
+    def test_replay_command(self):
+        runner = CliRunner()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = TestCLIList.create_test_database(self, temp_dir)
+            events_path = Path(temp_dir) / "keys.txt"
+            events_path.write_text("run git::st now", encoding="utf-8")
+            
+            mock_config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            with patch('palmoni_core.cli.commands.load_config') as mock_load_config:
+                mock_load_config.return_value = mock_config
+                
+                result = runner.invoke(app, ["replay", str(events_path), "--show-output"])
+        
+        assert result.exit_code == 0
+        assert "Replayed 15 keys" in result.stdout
+        assert "Expansions: 1" in result.stdout
+        assert "run git status now" in result.stdout
+
+
+class TestCLIStats:
+    def test_stats_command(self):
+        from palmoni_core.core.analytics import UsageRecorder
+        
+        runner = CliRunner()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            recorder = UsageRecorder(Path(temp_dir) / "analytics.db")
+            for trigger, saved in [("git::st", 3), ("git::st", 3), ("brb", 10)]:
+                recorder.record(trigger, saved)
+            recorder.flush()
+            
+            mock_config = PalmoniConfig(
+                database_file=Path(temp_dir) / "test.db",
+                user_config_dir=Path(temp_dir)
+            )
+            
+            with patch('palmoni_core.cli.commands.load_config', return_value=mock_config):
+                with patch('palmoni_core.cli.commands.SOCKET_PATH', Path(temp_dir) / "palmoni.sock"):
+                    result = runner.invoke(app, ["stats"])
+        
+        assert result.exit_code == 0
+        assert "Expansions: 3" in result.stdout
+        assert "Keystrokes saved: 16" in result.stdout
+        assert result.stdout.index("git::st") < result.stdout.index("brb")
+
+
+class TestCLIExpand:
+    def test_expand_stdin(self):
+        runner = CliRunner()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = TestCLIList.create_test_database(self, temp_dir)
+            mock_config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            with patch('palmoni_core.cli.commands.load_config', return_value=mock_config):
+                result = runner.invoke(app, ["expand"], input="run git::st now\n")
+        
+        assert result.exit_code == 0
+        assert result.stdout == "run git status now\n"
+        assert "Expanded 1 triggers" in result.stderr
+        assert "MB/s" in result.stderr
+    
+    def test_expand_files(self):
+        runner = CliRunner()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = TestCLIList.create_test_database(self, temp_dir)
+            mock_config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            first = Path(temp_dir) / "first.txt"
+            first.write_text("git::st\n", encoding="utf-8")
+            second = Path(temp_dir) / "second.txt"
+            second.write_text("plain\n", encoding="utf-8")
+            
+            with patch('palmoni_core.cli.commands.load_config', return_value=mock_config):
+                result = runner.invoke(app, ["expand", "--quiet", str(first), str(second)])
+        
+        assert result.exit_code == 0
+        assert result.stdout == "git status\nplain\n"
+        assert result.stderr == ""
+
+
+class TestCLIControl:
+    def test_ctl_commands(self):
+        from palmoni_core.core.control import ControlServer
+        
+        runner = CliRunner()
+        handlers = {
+            "ping": lambda request: {"pid": 1234, "snippets": 3},
+            "stats": lambda request: {"snippets": 3},
+            "reload": lambda request: {"reloaded": True, "version": 2, "snippets": 4},
+            "profile": lambda request: Instrumentation(enabled=True).to_dict(),
+        }
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            socket_path = Path(temp_dir) / "palmoni.sock"
+            
+            with ControlServer(socket_path, handlers):
+                with patch('palmoni_core.cli.commands.SOCKET_PATH', socket_path):
+                    ping = runner.invoke(app, ["ctl", "ping"])
+                    stats = runner.invoke(app, ["ctl", "stats"])
+                    reload = runner.invoke(app, ["ctl", "reload"])
+                    profile = runner.invoke(app, ["ctl", "profile"])
+                    status = runner.invoke(app, ["status"])
+        
+        assert ping.exit_code == 0
+        assert "PID: 1234" in ping.stdout
+        assert '"snippets": 3' in stats.stdout
+        assert "Reloaded 4 snippets (version 2)" in reload.stdout
+        assert "p99" in profile.stdout
+        assert "Palmoni is running (PID: 1234, 3 snippets)" in status.stdout
+    
+    def test_ctl_without_daemon(self):
+        runner = CliRunner()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with patch('palmoni_core.cli.commands.SOCKET_PATH', Path(temp_dir) / "palmoni.sock"):
+                result = runner.invoke(app, ["ctl", "ping"])
+        
+        assert result.exit_code == 1
+        assert "Palmoni daemon not reachable" in result.stdout
+
+
 class TestCLIErrorHandling:
     def test_list_command_error(self):
         runner = CliRunner()
@@ -280,4 +502,43 @@ class TestCLIErrorHandling:
             result = runner.invoke(app, ["config", "--init"])
         
         assert result.exit_code == 1
-        assert "Error initializing configuration" in result.stdout
\ No newline at end of file
+        assert "Error initializing configuration" in result.stdout
+
+
+class TestCLIImportExport:
+    def test_import_then_export(self):
+        runner = CliRunner()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = Path(temp_dir) / "pack.csv"
+            source.write_text("trigger,expansion\nbrb,be right back\nty,thank you\n")
+            mock_config = PalmoniConfig(
+                database_file=TestCLIList.create_test_database(self, temp_dir),
+                user_config_dir=Path(temp_dir)
+            )
+            
+            with patch('palmoni_core.cli.commands.load_config', return_value=mock_config):
+                imported = runner.invoke(app, ["import", str(source)])
+                exported = runner.invoke(app, ["export", str(Path(temp_dir) / "all.json")])
+                lines = (Path(temp_dir) / "all.json").read_text().splitlines()
+        
+        assert imported.exit_code == 0
+        assert "Imported 2 snippets" in imported.stdout
+        assert "rows/sec" in imported.stdout
+        assert exported.exit_code == 0
+        assert "Exported 5 snippets" in exported.stdout
+        assert len(lines) == 5
+    
+    def test_import_rejects_duplicates(self):
+        runner = CliRunner()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = Path(temp_dir) / "pack.csv"
+            source.write_text("trigger,expansion\nbrb,one\nbrb,two\n")
+            
+            result = runner.invoke(app, ["import", str(source), "--into", str(Path(temp_dir) / "pack.db")])
+            created = (Path(temp_dir) / "pack.db").exists()
+        
+        assert result.exit_code == 1
+        assert "duplicate triggers: brb" in result.stdout
+        assert not created
@@ -25,6 +25,14 @@ class TestPalmoniConfig:
         assert config.poll_interval == 0.3
         assert config.log_level == "INFO"
         assert config.boundary_chars == {" ", "\n", "\t"}
+        assert config.matcher == "aho-corasick"
+        assert config.expansion_loading == "eager"
+        assert config.expansion_cache_size == 256
+        assert config.analytics is False
+        assert config.analytics_flush_interval == 5.0
+        assert config.user_database is None
+        assert config.snippet_packs == []
+        assert config.storage_backend == "auto"
     
     def test_config_custom_values(self):
         config = PalmoniConfig(
@@ -79,7 +87,8 @@ class TestLoadConfig:
     def test_load_config_with_file(self):
         config_data = {
             "poll_interval": 0.5,
-            "log_level": "DEBUG"
+            "log_level": "DEBUG",
+            "matcher": "trie"
         }
         
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -92,6 +101,50 @@ class TestLoadConfig:
             
             assert config.poll_interval == 0.5
             assert config.log_level == "DEBUG"
+            assert config.matcher == "trie"
+    
+    def test_load_config_snippet_sources(self):
+        config_data = {
+            "user_database": "~/my-snippets.db",
+            "snippet_packs": ["/team/backend.db", "/team/frontend.db"]
+        }
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_file = Path(temp_dir) / "config.yml"
+            
+            with open(config_file, 'w') as f:
+                yaml.dump(config_data, f)
+            
+            config = load_config(config_file)
+            
+            assert config.user_database == Path.home() / "my-snippets.db"
+            assert config.snippet_packs == [Path("/team/backend.db"), Path("/team/frontend.db")]
+    
+    def test_load_config_unknown_choices_keep_defaults(self, capsys):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_file = Path(temp_dir) / "config.yml"
+            with open(config_file, 'w') as f:
+                yaml.dump({
+                    "matcher": "ahocorasick",
+                    "output_overflow_policy": "drop-oldest",
+                    "storage_backend": "sqlite",
+                    "expansion_loading": "lazzy",
+                    "snippet_store": "compact",
+                    "poll_interval": 0.5
+                }, f)
+            
+            config = load_config(config_file)
+            
+            captured = capsys.readouterr()
+            assert "Unknown matcher 'ahocorasick'" in captured.out
+            assert "Unknown output_overflow_policy 'drop-oldest'" in captured.out
+            assert "Unknown expansion_loading 'lazzy'" in captured.out
+            assert config.matcher == "aho-corasick"
+            assert config.output_overflow_policy == "drop_oldest"
+            assert config.expansion_loading == "eager"
+            assert config.storage_backend == "sqlite"
+            assert config.snippet_store == "compact"
+            assert config.poll_interval == 0.5
     
     def test_load_config_corrupted_file(self, capsys):
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -0,0 +1,81 @@
+import stat
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from palmoni_core.core.control import (
+    CONTROL_SUPPORTED,
+    ControlError,
+    ControlServer,
+    expander_handlers,
+    send_command,
+)
+
+pytestmark = pytest.mark.skipif(not CONTROL_SUPPORTED, reason="Unix domain sockets not available")
+
+
+class TestControlServer:
+    @pytest.fixture
+    def socket_path(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield Path(temp_dir) / "palmoni.sock"
+    
+    def test_round_trip(self, socket_path):
+        handlers = {"ping": lambda request: {"pong": True}}
+        
+        with ControlServer(socket_path, handlers):
+            assert send_command(socket_path, "ping") == {"pong": True}
+            assert send_command(socket_path, "ping") == {"pong": True}
+        
+        assert not socket_path.exists()
+    
+    def test_arguments_are_passed(self, socket_path):
+        with ControlServer(socket_path, {"echo": lambda request: request["text"]}):
+            assert send_command(socket_path, "echo", text="hello") == "hello"
+    
+    def test_unknown_command(self, socket_path):
+        with ControlServer(socket_path, {"ping": lambda request: None}):
+            with pytest.raises(ControlError, match="Unknown command 'reboot'"):
+                send_command(socket_path, "reboot")
+    
+    def test_handler_error(self, socket_path):
+        def fail(request):
+            raise RuntimeError("database locked")
+        
+        with ControlServer(socket_path, {"reload": fail}):
+            with pytest.raises(ControlError, match="database locked"):
+                send_command(socket_path, "reload")
+    
+    def test_socket_is_private(self, socket_path):
+        with ControlServer(socket_path, {}):
+            assert stat.S_IMODE(socket_path.stat().st_mode) & 0o077 == 0
+    
+    def test_stale_socket_is_replaced(self, socket_path):
+        socket_path.write_text("stale")
+        
+        with ControlServer(socket_path, {"ping": lambda request: "pong"}):
+            assert send_command(socket_path, "ping") == "pong"
+    
+    def test_no_daemon(self, socket_path):
+        with pytest.raises(ControlError, match="Could not reach"):
+            send_command(socket_path, "ping")
+
+
+class TestExpanderHandlers:
+    def test_commands(self):
+        expander = Mock()
+        expander.snapshot.__len__ = Mock(return_value=3)
+        expander.snapshot.version = 2
+        expander.reload_snippets.return_value = True
+        expander.get_stats.return_value = {"snippets": 3}
+        handlers = expander_handlers(expander)
+        
+        assert handlers["ping"]({})["snippets"] == 3
+        assert handlers["stats"]({}) == {"snippets": 3}
+        assert handlers["reload"]({}) == {"reloaded": True, "version": 2, "snippets": 3}
+        expander.usage.flush.return_value = 4
+        assert handlers["flush"]({}) == {"written": 4}
+        handlers["shutdown"]({})
+        expander.request_stop.assert_called_once()
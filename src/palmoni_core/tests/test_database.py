@@ -1,9 +1,14 @@
+import json
+import time
 import pytest
+import threading
+import sqlite3
 import tempfile
 import duckdb
 from pathlib import Path
+from unittest.mock import patch
 
-from palmoni_core.core.database import SnippetDatabase
+from palmoni_core.core.database import SnippetDatabase, create_storage_backend, detect_storage_backend
 
 
 class TestSnippetDatabase:
@@ -64,6 +69,41 @@ class TestSnippetDatabase:
             assert snippets["git::st"] == "git status"
             assert snippets["test::long"] == "a" * 60
     
+    @pytest.mark.parametrize("backend", ["numpy", "pyarrow", None])
+    def test_load_columns(self, backend):
+        if backend:
+            pytest.importorskip(backend)
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            db = SnippetDatabase(db_path)
+            
+            with patch('palmoni_core.core.database.get_columnar_backend', return_value=backend):
+                triggers, expansions = db.load_columns()
+            db.close()
+            
+            assert len(triggers) == len(expansions) == 3
+            assert dict(zip(triggers, expansions))["git::st"] == "git status"
+            assert all(isinstance(trigger, str) for trigger in triggers)
+    
+    def test_load_trigger_ids(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with SnippetDatabase(self.create_test_database(temp_dir), idle_timeout=0) as db:
+                triggers, row_ids = db.load_trigger_ids()
+                
+                assert len(triggers) == len(row_ids) == 3
+                row_id = dict(zip(triggers, row_ids))["git::st"]
+                assert db.get_expansion(row_id, "git::st") == "git status"
+    
+    def test_get_expansion_with_stale_row_id(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with SnippetDatabase(self.create_test_database(temp_dir), idle_timeout=0) as db:
+                triggers, row_ids = db.load_trigger_ids()
+                other_row_id = dict(zip(triggers, row_ids))["py::class"]
+                
+                assert db.get_expansion(other_row_id, "git::st") == "git status"
+                assert db.get_expansion(10**6, "missing") is None
+    
     def test_get_snippet_count(self):
         with tempfile.TemporaryDirectory() as temp_dir:
             db_path = self.create_test_database(temp_dir)
@@ -110,4 +150,253 @@ class TestSnippetDatabase:
             db = SnippetDatabase(db_path)
             count = db.get_snippet_count()
             
-            assert count == 0
\ No newline at end of file
+            assert count == 0
+
+class TestSnippetDatabaseConnection:
+    def create_test_database(self, temp_dir: str) -> Path:
+        """Helper to create a test database with sample data."""
+        db_path = Path(temp_dir) / "test.db"
+        conn = duckdb.connect(str(db_path))
+        
+        conn.execute("""
+            CREATE TABLE snippets (
+                trigger TEXT PRIMARY KEY,
+                expansion TEXT NOT NULL,
+                category TEXT DEFAULT '',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        test_snippets = [
+            ("py::class", "class Test:\n    pass", "python"),
+            ("git::st", "git status", "git"),
+            ("git::cm", "git commit -m", "git")
+        ]
+        
+        for trigger, expansion, category in test_snippets:
+            conn.execute("""
+                INSERT INTO snippets (trigger, expansion, category)
+                VALUES (?, ?, ?)
+            """, [trigger, expansion, category])
+        
+        conn.close()
+        return db_path
+    
+    def test_connection_is_opened_lazily(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = SnippetDatabase(self.create_test_database(temp_dir))
+            
+            assert not db.is_open
+            assert db.connections_opened == 0
+    
+    def test_queries_share_one_connection(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with SnippetDatabase(self.create_test_database(temp_dir), idle_timeout=0) as db:
+                db.load_all_snippets()
+                db.get_snippet_count()
+                db.get_snippet("git::st")
+                db.search_snippets("git")
+                
+                assert db.is_open
+                assert db.connections_opened == 1
+            
+            assert not db.is_open
+    
+    def test_connection_is_read_only(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with SnippetDatabase(self.create_test_database(temp_dir), idle_timeout=0) as db:
+                with pytest.raises(duckdb.Error):
+                    with db._get_connection() as conn:
+                        conn.execute("DELETE FROM snippets")
+                
+                assert db.get_snippet_count() == 3
+    
+    def test_idle_connection_is_closed(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = SnippetDatabase(self.create_test_database(temp_dir), idle_timeout=0.05)
+            db.get_snippet_count()
+            assert db.is_open
+            
+            time.sleep(0.3)
+            
+            assert not db.is_open
+            assert db.get_snippet_count() == 3
+            assert db.connections_opened == 2
+            db.close()
+    
+    def test_get_snippet(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with SnippetDatabase(self.create_test_database(temp_dir), idle_timeout=0) as db:
+                assert db.get_snippet("git::st") == "git status"
+                assert db.get_snippet("missing") is None
+    
+    def test_search_snippets(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with SnippetDatabase(self.create_test_database(temp_dir), idle_timeout=0) as db:
+                results = db.search_snippets("GIT")
+                assert results == [("git::cm", "git commit -m"), ("git::st", "git status")]
+                assert db.search_snippets("git", limit=1) == [("git::cm", "git commit -m")]
+    
+    def test_concurrent_readers(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            
+            with SnippetDatabase(db_path, idle_timeout=0) as db:
+                results = []
+                
+                def reader():
+                    results.append(db.get_snippet_count())
+                
+                threads = [threading.Thread(target=reader) for _ in range(8)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                
+                assert results == [3] * 8
+
+
+def write_parquet(path: Path, rows) -> Path:
+    conn = duckdb.connect()
+    conn.execute("CREATE TABLE pack (trigger TEXT, expansion TEXT, category TEXT, notes TEXT)")
+    conn.executemany("INSERT INTO pack VALUES (?, ?, ?, ?)", rows)
+    conn.execute(f"COPY pack TO '{path}' (FORMAT parquet)")
+    conn.close()
+    return path
+
+
+class TestParquetSource:
+    ROWS = [("git::st", "git status", "git", "x"), ("brb", "be right back", "chat", "y")]
+    
+    def test_queries_parquet_in_place(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = write_parquet(Path(temp_dir) / "pack.parquet", self.ROWS)
+            
+            with SnippetDatabase(path, idle_timeout=0) as db:
+                triggers, expansions = db.load_columns()
+                assert db.is_parquet
+                assert dict(zip(triggers, expansions)) == {"git::st": "git status", "brb": "be right back"}
+                assert db.get_snippet_count() == 2
+                assert db.get_snippet("brb") == "be right back"
+                assert db.search_snippets("status") == [("git::st", "git status")]
+    
+    def test_glob_of_parquet_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            write_parquet(Path(temp_dir) / "a.parquet", self.ROWS[:1])
+            write_parquet(Path(temp_dir) / "b.parquet", self.ROWS[1:])
+            
+            with SnippetDatabase(Path(temp_dir) / "*.parquet", idle_timeout=0) as db:
+                assert db.load_all_snippets() == {"git::st": "git status", "brb": "be right back"}
+    
+    def test_missing_glob(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with pytest.raises(FileNotFoundError):
+                SnippetDatabase(Path(temp_dir) / "*.parquet")
+    
+    def test_lazy_lookups_use_trigger(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = write_parquet(Path(temp_dir) / "pack.parquet", self.ROWS)
+            
+            with SnippetDatabase(path, idle_timeout=0) as db:
+                triggers, row_ids = db.load_trigger_ids()
+                assert list(row_ids) == [-1, -1]
+                expansion = db.get_expansion(row_ids[0], triggers[0])
+        
+        expected = {trigger: expansion for trigger, expansion, _, _ in self.ROWS}
+        assert expansion == expected[triggers[0]]
+    
+    def test_load_arrow_is_sorted_and_projected(self):
+        pytest.importorskip("pyarrow")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = write_parquet(Path(temp_dir) / "pack.parquet", self.ROWS + [("brb", "be right back", "chat", "z")])
+            
+            with SnippetDatabase(path, idle_timeout=0) as db:
+                table = db.load_arrow()
+        
+        assert table.column_names == ["trigger", "expansion"]
+        assert table.column("trigger").to_pylist() == ["brb", "git::st"]
+
+
+def write_sqlite(path: Path, rows) -> Path:
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE snippets (trigger TEXT PRIMARY KEY, expansion TEXT NOT NULL, category TEXT DEFAULT '')")
+    conn.executemany("INSERT INTO snippets VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return path
+
+
+class TestStorageBackends:
+    ROWS = [("git::st", "git status", "git"), ("brb", "be right back", "chat")]
+    SNIPPETS = {"git::st": "git status", "brb": "be right back"}
+    
+    def test_detect_by_extension(self):
+        assert detect_storage_backend(Path("pack.parquet")) == "duckdb"
+        assert detect_storage_backend(Path("packs/*.parquet")) == "duckdb"
+        assert detect_storage_backend(Path("team.sqlite3"), "duckdb") == "sqlite"
+        assert detect_storage_backend(Path("mine.yml"), "sqlite") == "file"
+    
+    def test_detect_db_by_header_or_config(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sqlite_db = write_sqlite(Path(temp_dir) / "a.db", self.ROWS)
+            duckdb_db = TestSnippetDatabase().create_test_database(temp_dir)
+            
+            assert detect_storage_backend(sqlite_db) == "sqlite"
+            assert detect_storage_backend(duckdb_db) == "duckdb"
+            assert detect_storage_backend(duckdb_db, "sqlite") == "sqlite"
+    
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError, match="Unknown storage backend 'redis'"):
+            create_storage_backend(Path("snippets.db"), "redis")
+    
+    def test_sqlite_backend(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = write_sqlite(Path(temp_dir) / "team.sqlite", self.ROWS)
+            
+            with SnippetDatabase(path, idle_timeout=0) as db:
+                assert db.backend.name == "sqlite"
+                assert db.load_all_snippets() == self.SNIPPETS
+                assert db.get_snippet_count() == 2
+                assert db.search_snippets("STATUS") == [("git::st", "git status")]
+                triggers, row_ids = db.load_trigger_ids()
+                assert {trigger: db.get_expansion(row_id, trigger) for trigger, row_id in zip(triggers, row_ids)} == self.SNIPPETS
+                
+                with pytest.raises(sqlite3.OperationalError):
+                    db.open().execute("DELETE FROM snippets")
+    
+    def test_json_mapping(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "snippets.json"
+            path.write_text(json.dumps(self.SNIPPETS), encoding="utf-8")
+            
+            with SnippetDatabase(path, idle_timeout=0) as db:
+                assert db.backend.name == "file"
+                assert db.load_all_snippets() == self.SNIPPETS
+                assert db.get_snippet("brb") == "be right back"
+                assert db.get_snippet("nope") is None
+                assert db.search_snippets("b") == [("brb", "be right back")]
+    
+    def test_yaml_records(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "snippets.yaml"
+            path.write_text(
+                "- trigger: git::st\n  expansion: git status\n  category: git\n"
+                "- trigger: brb\n  expansion: be right back\n",
+                encoding="utf-8",
+            )
+            
+            with SnippetDatabase(path, idle_timeout=0) as db:
+                triggers, row_ids = db.load_trigger_ids()
+                assert list(triggers) == ["git::st", "brb"]
+                assert db.get_expansion(row_ids[0], "git::st") == "git status"
+                assert db.get_expansion(row_ids[0], "brb") == "be right back"
+    
+    def test_load_arrow_needs_duckdb(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "snippets.json"
+            path.write_text("{}", encoding="utf-8")
+            
+            with SnippetDatabase(path, idle_timeout=0) as db:
+                assert db.get_snippet_count() == 0
+                with pytest.raises(NotImplementedError):
+                    db.load_arrow()
@@ -0,0 +1,41 @@
+import sys
+
+from palmoni_core.core.diagnostics import measure_import_times, measure_snippet_memory, parse_import_times
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        300 |     encodings.aliases
+import time:      1500 |       1800 |   encodings
+import time:        50 |       1970 | palmoni_core
+unrelated line
+"""
+
+
+class TestImportTimes:
+    def test_parse_import_times(self):
+        timings = parse_import_times(IMPORTTIME_OUTPUT)
+        
+        assert [timing.module for timing in timings] == ["_io", "encodings.aliases", "encodings", "palmoni_core"]
+        assert timings[1].self_us == 300
+        assert timings[1].package == "encodings"
+        assert [timing.depth for timing in timings] == [1, 2, 1, 0]
+        assert timings[3].cumulative_us == 1970
+    
+    def test_cli_does_not_import_heavy_dependencies(self):
+        timings = measure_import_times("palmoni_core.cli.commands", python=sys.executable)
+        packages = {timing.package for timing in timings}
+        
+        assert "palmoni_core" in packages
+        assert not packages & {"duckdb", "pynput", "watchdog"}
+
+
+class TestSnippetMemory:
+    def test_measure_snippet_memory(self):
+        def load_columns():
+            return [f"t{i}" for i in range(500)], [f"expansion {i % 10}" * 20 for i in range(500)]
+        
+        sizes = measure_snippet_memory(load_columns, compress_threshold=64)
+        
+        assert set(sizes) == {"dict", "compact", "compact+zlib"}
+        assert 0 < sizes["compact"] < sizes["dict"]
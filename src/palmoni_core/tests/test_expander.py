@@ -2,9 +2,12 @@ import pytest
 import tempfile
 import duckdb
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, call, patch
+from palmoni_core.core.keyio import MemoryOutputSink, ReplayInputSource, SpecialKey
 
+from palmoni_core.core.analytics import load_usage
 from palmoni_core.core.expander import TextExpander
+from palmoni_core.core.output import ClipboardError
 from palmoni_core.core.config import PalmoniConfig
 
 
@@ -111,6 +114,9 @@ class TestTextExpander:
             assert len(result) == 2
             assert result["py::class"] == "class Test:\n    pass"
             assert result is not expander.snippets
+            
+            with pytest.raises(TypeError):
+                result["::ty"] = "Thank you"
     
     def test_get_snippet_count(self):
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -125,7 +131,123 @@ class TestTextExpander:
             
             assert expander.get_snippet_count() == 2
     
-    @patch('palmoni_core.core.expander.Controller')
+    def test_reload_snippets(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            expander = TextExpander(config)
+            old_matcher = expander.matcher
+            
+            conn = duckdb.connect(str(db_path))
+            conn.execute("INSERT INTO snippets (trigger, expansion) VALUES ('::ty', 'Thank you')")
+            conn.close()
+            
+            assert expander.reload_snippets()
+            
+            assert expander.snippets["::ty"] == "Thank you"
+            assert expander.matcher is not old_matcher
+            assert expander.matcher.longest_suffix("::ty") == "::ty"
+            assert expander.get_stats()["reload"]["count"] == 1
+            assert expander.get_stats()["snapshot"]["version"] == 2
+    
+    def test_second_start_uses_snapshot_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            TextExpander(config)
+            expander = TextExpander(config)
+            
+            assert expander.db.connections_opened == 0
+            assert expander.snippets["git::st"] == "git status"
+            assert expander.matcher.longest_suffix("run git::st") == "git::st"
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_lazy_expansion_loading(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            mock_controller = Mock()
+            mock_controller_class.return_value = mock_controller
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir),
+                expansion_loading="lazy",
+                expansion_cache_size=1
+            )
+            
+            expander = TextExpander(config)
+            
+            for ch in "git::st":
+                expander._on_key_press(Mock(char=ch))
+            
+            mock_controller.type.assert_called_once_with(" status")
+            assert expander.get_snippet_count() == 2
+            stats = expander.get_stats()["expansions"]
+            assert stats["loading"] == "lazy"
+            assert stats["misses"] == 1
+            assert stats["size"] == 1
+            expander.db.close()
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_instrumentation(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir),
+                instrumentation=True
+            )
+            
+            expander = TextExpander(config)
+            for ch in "git::st":
+                expander._on_key_press(Mock(char=ch))
+            
+            histograms = expander.instrumentation.histograms
+            assert histograms["event"].count == 7
+            assert histograms["match"].count == 7
+            assert histograms["inject"].count == 1
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_instrumentation_disabled_by_default(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = PalmoniConfig(
+                database_file=self.create_test_database(temp_dir),
+                user_config_dir=Path(temp_dir)
+            )
+            
+            expander = TextExpander(config)
+            expander._on_key_press(Mock(char="g"))
+            
+            assert expander.instrumentation.histograms["event"].count == 0
+    
+    def test_reload_failure_keeps_snippets(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            expander = TextExpander(config)
+            
+            with patch.object(expander.db, 'load_columns', side_effect=Exception("locked")):
+                assert not expander.reload_snippets()
+            
+            assert len(expander.snippets) == 2
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
     def test_expand_trigger(self, mock_controller_class):
         with tempfile.TemporaryDirectory() as temp_dir:
             db_path = self.create_test_database(temp_dir)
@@ -138,7 +260,7 @@ class TestTextExpander:
             )
             
             expander = TextExpander(config)
-            expander.keyboard_controller = mock_controller
+            expander.output_sink = mock_controller
             
             expander._expand_trigger("test", "expansion")
             
@@ -146,7 +268,7 @@ class TestTextExpander:
             assert mock_controller.release.call_count == 4
             mock_controller.type.assert_called_once_with("expansion")
     
-    @patch('palmoni_core.core.expander.Controller')
+    @patch('palmoni_core.core.expander.PynputOutputSink')
     def test_expand_trigger_with_boundary(self, mock_controller_class):
         with tempfile.TemporaryDirectory() as temp_dir:
             db_path = self.create_test_database(temp_dir)
@@ -159,7 +281,7 @@ class TestTextExpander:
             )
             
             expander = TextExpander(config)
-            expander.keyboard_controller = mock_controller
+            expander.output_sink = mock_controller
             
             expander._expand_trigger("test", "expansion", boundary_char=" ")
             
@@ -167,6 +289,142 @@ class TestTextExpander:
             assert mock_controller.release.call_count == 5
             mock_controller.type.assert_called_with(" ")
 
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_expand_trigger_pastes_long_expansion(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            mock_controller = Mock()
+            mock_controller_class.return_value = mock_controller
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir),
+                paste_threshold=5,
+                paste_restore_delay=0,
+                clipboard_backend="memory"
+            )
+            
+            expander = TextExpander(config)
+            expander.output_sink = mock_controller
+            expander.paste_strategy.clipboard.write("previous")
+            
+            expander._expand_trigger("py::class", "class Test:\n    pass")
+            
+            assert not mock_controller.type.called
+            mock_controller.press.assert_any_call("v")
+            assert expander.paste_strategy.clipboard.read() == "previous"
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_failed_clipboard_restore_injects_once(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            mock_controller = Mock()
+            mock_controller_class.return_value = mock_controller
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir),
+                paste_threshold=5,
+                paste_restore_delay=0,
+                clipboard_backend="memory"
+            )
+            
+            expander = TextExpander(config)
+            expander.output_sink = mock_controller
+            clipboard = Mock()
+            clipboard.read.return_value = "previous"
+            clipboard.write.side_effect = [None, ClipboardError("clipboard gone")]
+            expander.paste_strategy.clipboard = clipboard
+            
+            expander._expand_trigger("py::class", "class Test:\n    pass")
+            
+            assert not mock_controller.type.called
+            assert mock_controller.press.call_args_list.count(call("v")) == 1
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_expand_trigger_types_short_expansion(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            mock_controller = Mock()
+            mock_controller_class.return_value = mock_controller
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir),
+                paste_threshold=50,
+                clipboard_backend="memory"
+            )
+            
+            expander = TextExpander(config)
+            expander.output_sink = mock_controller
+            
+            expander._expand_trigger("py::class", "class Test:\n    pass")
+            
+            mock_controller.type.assert_called_once_with("class Test:\n    pass")
+            assert expander.paste_strategy.clipboard.read() is None
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_expand_trigger_keeps_common_prefix(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            mock_controller = Mock()
+            mock_controller_class.return_value = mock_controller
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            expander = TextExpander(config)
+            expander.output_sink = mock_controller
+            
+            expander._expand_trigger("git::st", "git status", boundary_char=" ")
+            
+            assert mock_controller.press.call_count == 5
+            assert mock_controller.type.call_args_list == [call(" status"), call(" ")]
+            assert expander.get_stats()["injection"] == {"expansions": 1, "chars_kept": 3}
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_expand_trigger_nothing_to_change(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            mock_controller = Mock()
+            mock_controller_class.return_value = mock_controller
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            expander = TextExpander(config)
+            expander.output_sink = mock_controller
+            
+            expander._expand_trigger("todo", "todo", boundary_char="\n")
+            
+            assert not mock_controller.press.called
+            assert not mock_controller.type.called
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_expand_trigger_extends_trigger(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            mock_controller = Mock()
+            mock_controller_class.return_value = mock_controller
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            expander = TextExpander(config)
+            expander.output_sink = mock_controller
+            
+            expander._expand_trigger("brb", "brb, back soon", boundary_char="\t")
+            
+            mock_controller.press.assert_has_calls([call(SpecialKey.BACKSPACE), call(SpecialKey.TAB)])
+            assert mock_controller.press.call_count == 2
+            mock_controller.type.assert_called_once_with(", back soon")
 
 class TestTextExpanderKeyHandling:
     def create_test_database(self, temp_dir: str) -> Path:
@@ -191,7 +449,7 @@ class TestTextExpanderKeyHandling:
         conn.close()
         return db_path
     
-    @patch('palmoni_core.core.expander.Controller')
+    @patch('palmoni_core.core.expander.PynputOutputSink')
     def test_on_key_press_exact_match(self, mock_controller_class):
         with tempfile.TemporaryDirectory() as temp_dir:
             db_path = self.create_test_database(temp_dir)
@@ -204,7 +462,7 @@ class TestTextExpanderKeyHandling:
             )
             
             expander = TextExpander(config)
-            expander.keyboard_controller = mock_controller
+            expander.output_sink = mock_controller
             
             for char in "test":
                 key = Mock()
@@ -214,7 +472,7 @@ class TestTextExpanderKeyHandling:
             assert mock_controller.type.called
             assert expander.typed_buffer == ""
     
-    @patch('palmoni_core.core.expander.Controller')
+    @patch('palmoni_core.core.expander.PynputOutputSink')
     def test_on_key_press_boundary_match(self, mock_controller_class):
         with tempfile.TemporaryDirectory() as temp_dir:
             db_path = self.create_test_database(temp_dir)
@@ -227,7 +485,7 @@ class TestTextExpanderKeyHandling:
             )
             
             expander = TextExpander(config)
-            expander.keyboard_controller = mock_controller
+            expander.output_sink = mock_controller
             
             for char in "test":
                 key = Mock()
@@ -258,6 +516,227 @@ class TestTextExpanderKeyHandling:
                 expander._on_key_press(key)
             
             assert expander.typed_buffer == "hello"
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_on_key_press_with_trie_matcher(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            mock_controller = Mock()
+            mock_controller_class.return_value = mock_controller
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir),
+                matcher="trie"
+            )
+            
+            expander = TextExpander(config)
+            expander.output_sink = mock_controller
+            
+            for char in "a test":
+                key = Mock()
+                key.char = char
+                expander._on_key_press(key)
+            
+            mock_controller.type.assert_called_once_with("expansion")
+            assert expander.typed_buffer == ""
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_on_key_press_backspace_restores_match(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            mock_controller = Mock()
+            mock_controller_class.return_value = mock_controller
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            expander = TextExpander(config)
+            expander.output_sink = mock_controller
+            
+            for char in "tesx":
+                key = Mock()
+                key.char = char
+                expander._on_key_press(key)
+            
+            expander._on_key_press(SpecialKey.BACKSPACE)
+            assert expander.typed_buffer == "tes"
+            
+            key = Mock()
+            key.char = "t"
+            expander._on_key_press(key)
+            
+            mock_controller.type.assert_called_once_with("expansion")
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_on_key_press_enqueues_when_worker_running(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            mock_controller = Mock()
+            mock_controller_class.return_value = mock_controller
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            expander = TextExpander(config)
+            expander.output_sink = mock_controller
+            
+            with patch.object(expander.output_worker, 'submit') as mock_submit:
+                with patch.object(type(expander.output_worker), 'running', True):
+                    for char in "test":
+                        key = Mock()
+                        key.char = char
+                        expander._on_key_press(key)
+            
+            job = mock_submit.call_args[0][0]
+            assert (job.trigger, job.expansion, job.boundary_char) == ("test", "expansion", None)
+            assert not mock_controller.type.called
+            assert expander.typed_buffer == ""
+    
+    def test_on_key_press_ignores_injected_events(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            expander = TextExpander(config)
+            
+            for char in "abc":
+                key = Mock()
+                key.char = char
+                expander._on_key_press(key, True)
+            
+            assert expander.typed_buffer == ""
+            assert expander.get_stats()["listener"]["events_filtered"] == 3
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_on_key_press_ignores_own_expansion(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir),
+                injection_grace=0
+            )
+            
+            expander = TextExpander(config)
+            echoed = []
+            
+            def echo(text):
+                for char in text:
+                    key = Mock()
+                    key.char = char
+                    echoed.append(char)
+                    expander._on_key_press(key)
+            
+            expander.output_sink = mock_controller_class.return_value
+            expander.output_sink.type.side_effect = echo
+            
+            expander._expand_trigger("x", "a test")
+            
+            assert "".join(echoed) == "a test"
+            assert expander.output_sink.type.call_count == 1
+            assert expander.get_stats()["listener"]["events_filtered"] == len("a test")
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_failed_injection_counts_as_failed_job(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = PalmoniConfig(
+                database_file=self.create_test_database(temp_dir),
+                user_config_dir=Path(temp_dir)
+            )
+            
+            expander = TextExpander(config)
+            expander.load_snippets()
+            expander.output_sink = mock_controller_class.return_value
+            expander.output_sink.press.side_effect = RuntimeError("no display")
+            
+            assert expander._expand_match(expander.snapshot, "test", " ")
+            output = expander.get_stats()["output"]
+        
+        assert output["jobs_failed"] == 1
+        assert output["jobs_completed"] == 0
+        assert expander.expansions_injected == 0
+    
+    @patch('palmoni_core.core.expander.PynputOutputSink')
+    def test_on_key_press_after_reload(self, mock_controller_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            mock_controller = Mock()
+            mock_controller_class.return_value = mock_controller
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            expander = TextExpander(config)
+            expander.output_sink = mock_controller
+            
+            for char in "::t":
+                key = Mock()
+                key.char = char
+                expander._on_key_press(key)
+            
+            conn = duckdb.connect(str(db_path))
+            conn.execute("INSERT INTO snippets (trigger, expansion) VALUES ('::ty', 'Thank you')")
+            conn.close()
+            expander.reload_snippets()
+            
+            key = Mock()
+            key.char = "y"
+            expander._on_key_press(key)
+            
+            mock_controller.type.assert_called_once_with("Thank you")
+            assert expander.get_stats()["listener"]["last_match_version"] == 2
+    
+    def test_replay_through_memory_sink(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir),
+                watch_snippets=False,
+                analytics=True
+            )
+            
+            sink = MemoryOutputSink()
+            source = ReplayInputSource.from_text("a tes\bst here", echo=sink)
+            expander = TextExpander(config, input_source=source, output_sink=sink)
+            expander.start()
+            
+            assert sink.text == "a expansion here"
+            assert source.delivered == len("a tes\bst here")
+            assert expander.get_stats()["injection"]["expansions"] == 1
+            assert expander.get_stats()["listener"]["events_filtered"] == 0
+            assert load_usage(Path(temp_dir) / "analytics.db")["top"] == [("test", 1, len("expansion") - len("test"))]
+    
+    def test_typed_buffer_is_bounded(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = self.create_test_database(temp_dir)
+            
+            config = PalmoniConfig(
+                database_file=db_path,
+                user_config_dir=Path(temp_dir)
+            )
+            
+            expander = TextExpander(config)
+            
+            for char in "aGVsbG8gd29ybGQ=" * 100:
+                key = Mock()
+                key.char = char
+                expander._on_key_press(key)
+            
+            assert len(expander.typed_buffer) == len("test") + 1
 
 
 class TestTextExpanderContextManager:
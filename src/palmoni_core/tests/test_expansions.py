@@ -0,0 +1,71 @@
+from unittest.mock import Mock
+
+import pytest
+
+from palmoni_core.core.expansions import ExpansionCache, LazySnippets
+
+
+class TestExpansionCache:
+    def test_get_and_put(self):
+        cache = ExpansionCache(capacity=2)
+        
+        assert cache.get("git::st") is None
+        cache.put("git::st", "git status")
+        
+        assert cache.get("git::st") == "git status"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hit_rate"] == 0.5
+    
+    def test_least_recently_used_is_evicted(self):
+        cache = ExpansionCache(capacity=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        
+        cache.put("c", "3")
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+        assert len(cache) == 2
+        assert cache.stats()["evictions"] == 1
+    
+    def test_clear_keeps_counters(self):
+        cache = ExpansionCache()
+        cache.put("a", "1")
+        cache.get("a")
+        
+        cache.clear()
+        
+        assert len(cache) == 0
+        assert cache.stats()["hits"] == 1
+
+
+class TestLazySnippets:
+    def test_expansion_is_loaded_once(self):
+        loader = Mock(return_value="git status")
+        snippets = LazySnippets(["git::st", "::ty"], [0, 1], loader, ExpansionCache())
+        
+        assert snippets["git::st"] == "git status"
+        assert snippets["git::st"] == "git status"
+        
+        loader.assert_called_once_with(0, "git::st")
+    
+    def test_membership_does_not_load(self):
+        loader = Mock()
+        snippets = LazySnippets(["git::st"], [7], loader, ExpansionCache())
+        
+        assert "git::st" in snippets
+        assert "missing" not in snippets
+        assert list(snippets) == ["git::st"]
+        assert len(snippets) == 1
+        loader.assert_not_called()
+    
+    def test_missing_trigger(self):
+        snippets = LazySnippets(["git::st"], [0], Mock(return_value=None), ExpansionCache())
+        
+        with pytest.raises(KeyError):
+            snippets["missing"]
+        with pytest.raises(KeyError):
+            snippets["git::st"]
@@ -0,0 +1,67 @@
+from palmoni_core.core.instrumentation import (
+    BUCKET_COUNT,
+    Histogram,
+    Instrumentation,
+    format_report,
+)
+
+
+class TestHistogram:
+    def test_buckets(self):
+        histogram = Histogram()
+        
+        histogram.record_ns(500)
+        histogram.record_ns(1500)
+        histogram.record_ns(10**12)
+        
+        assert histogram.counts[0] == 1
+        assert histogram.counts[1] == 1
+        assert histogram.counts[BUCKET_COUNT - 1] == 1
+        assert histogram.count == 3
+        assert histogram.max_ns == 10**12
+    
+    def test_percentiles(self):
+        histogram = Histogram()
+        for _ in range(99):
+            histogram.record_ns(3000)
+        histogram.record_ns(900_000)
+        
+        assert histogram.percentile_ns(50) == 4096
+        assert histogram.percentile_ns(99) == 4096
+        assert histogram.percentile_ns(100) == 900_000
+    
+    def test_empty(self):
+        data = Histogram().to_dict()
+        
+        assert data["count"] == 0
+        assert data["p99_us"] == 0
+        assert data["buckets"] == {}
+
+
+class TestInstrumentation:
+    def test_disabled_by_default(self):
+        instrumentation = Instrumentation()
+        
+        assert not instrumentation.enabled
+        assert "disabled" in format_report(instrumentation.to_dict())
+    
+    def test_record_and_report(self):
+        instrumentation = Instrumentation(enabled=True)
+        
+        instrumentation.record("event", instrumentation.clock())
+        instrumentation.record("inject", instrumentation.clock())
+        data = instrumentation.to_dict()
+        
+        assert data["histograms"]["event"]["count"] == 1
+        assert data["expansions_per_minute"] > 0
+        report = format_report(data)
+        assert "event" in report
+        assert "p99" in report
+    
+    def test_reset(self):
+        instrumentation = Instrumentation(enabled=True)
+        instrumentation.record("match", instrumentation.clock())
+        
+        instrumentation.reset()
+        
+        assert instrumentation.histograms["match"].count == 0
@@ -0,0 +1,105 @@
+import pytest
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock
+
+from palmoni_core.core.keyio import (
+    MemoryOutputSink,
+    ReplayInputSource,
+    SpecialKey,
+    create_output_sink,
+    send_key,
+)
+
+
+class TestMemoryOutputSink:
+    def test_applies_typing_and_special_keys(self):
+        sink = MemoryOutputSink()
+        
+        sink.type("helo")
+        send_key(sink, SpecialKey.BACKSPACE)
+        sink.type("lo")
+        send_key(sink, SpecialKey.ENTER)
+        send_key(sink, SpecialKey.TAB)
+        
+        assert sink.text == "hello\n\t"
+    
+    def test_chords_are_not_text(self):
+        sink = MemoryOutputSink()
+        
+        sink.press(SpecialKey.CTRL)
+        sink.press("v")
+        sink.release("v")
+        sink.release(SpecialKey.CTRL)
+        send_key(sink, "x")
+        
+        assert sink.text == "x"
+    
+    def test_send_key_accepts_key_codes(self):
+        sink = MemoryOutputSink()
+        key = Mock()
+        key.char = "a"
+        
+        send_key(sink, key)
+        
+        assert sink.text == "a"
+
+
+class TestReplayInputSource:
+    def test_from_text_maps_control_characters(self):
+        source = ReplayInputSource.from_text("a\b\n\t")
+        
+        assert source.events == ["a", SpecialKey.BACKSPACE, SpecialKey.ENTER, SpecialKey.TAB]
+    
+    def test_from_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "keys.txt"
+            path.write_text("hi\n", encoding="utf-8")
+            
+            source = ReplayInputSource.from_file(path)
+        
+        assert source.events == ["h", "i", SpecialKey.ENTER]
+    
+    def test_replays_events_in_order(self):
+        sink = MemoryOutputSink()
+        source = ReplayInputSource.from_text("ab\bc", echo=sink)
+        received = []
+        wait_idle = Mock()
+        
+        source.start(lambda key, injected: received.append((key, injected)), wait_idle=wait_idle)
+        source.join()
+        
+        assert received == [("a", False), ("b", False), (SpecialKey.BACKSPACE, False), ("c", False)]
+        assert wait_idle.call_count == 4
+        assert source.delivered == 4
+        assert sink.text == "ac"
+    
+    def test_unpaced_replay_does_not_wait(self):
+        source = ReplayInputSource.from_text("abc", paced=False)
+        wait_idle = Mock()
+        
+        source.start(lambda key, injected: None, wait_idle=wait_idle)
+        source.join()
+        
+        assert not wait_idle.called
+        assert source.delivered == 3
+    
+    def test_stop(self):
+        source = ReplayInputSource.from_text("abc")
+        
+        source.start(lambda key, injected: source.stop())
+        source.join()
+        
+        assert source.delivered == 1
+    
+    def test_does_not_see_output(self):
+        assert not ReplayInputSource([]).sees_output
+
+
+class TestOutputSinks:
+    def test_create_output_sink(self):
+        assert isinstance(create_output_sink("memory"), MemoryOutputSink)
+    
+    def test_create_unknown_output_sink(self):
+        with pytest.raises(ValueError, match="Unknown output sink"):
+            create_output_sink("braille")
@@ -0,0 +1,104 @@
+import pytest
+
+from palmoni_core.core.matcher import (
+    MATCHERS,
+    AhoCorasickMatcher,
+    ReversedTrieMatcher,
+    SegmentedMatcher,
+    create_matcher,
+)
+
+
+TRIGGERS = ["git::st", "git::stash", "::ty", "py::class", "st"]
+
+
+@pytest.mark.parametrize("name", sorted(MATCHERS))
+class TestSnippetMatchers:
+    def test_exact_match(self, name):
+        matcher = create_matcher(name, TRIGGERS)
+        assert matcher.longest_suffix("git::st") == "git::st"
+    
+    def test_match_at_end_of_text(self, name):
+        matcher = create_matcher(name, TRIGGERS)
+        assert matcher.longest_suffix("hello py::class") == "py::class"
+    
+    def test_prefers_longest_trigger(self, name):
+        matcher = create_matcher(name, TRIGGERS)
+        assert matcher.longest_suffix("run git::st") == "git::st"
+        assert matcher.longest_suffix("xst") == "st"
+    
+    def test_no_match(self, name):
+        matcher = create_matcher(name, TRIGGERS)
+        assert matcher.longest_suffix("git::s") is None
+        assert matcher.longest_suffix("") is None
+    
+    def test_empty_trigger_set(self, name):
+        matcher = create_matcher(name, [])
+        assert matcher.max_length == 0
+        assert matcher.longest_suffix("anything") is None
+    
+    def test_empty_triggers_are_ignored(self, name):
+        matcher = create_matcher(name, ["", "::ty"])
+        assert matcher.trigger_count == 1
+        assert matcher.longest_suffix("abc") is None
+    
+    def test_max_length(self, name):
+        matcher = create_matcher(name, TRIGGERS)
+        assert matcher.max_length == len("git::stash")
+
+
+class TestAhoCorasickMatcher:
+    def test_incremental_matches_one_shot(self):
+        matcher = AhoCorasickMatcher(TRIGGERS)
+        text = "say ::ty then git::stash it"
+        
+        state = matcher.initial_state()
+        for i, ch in enumerate(text):
+            state = matcher.advance(state, ch)
+            assert matcher.match_state(state) == matcher.longest_suffix(text[:i + 1])
+    
+    def test_overlapping_triggers_use_failure_links(self):
+        matcher = AhoCorasickMatcher(["abcd", "bc"])
+        
+        state = matcher.initial_state()
+        for ch in "abc":
+            state = matcher.advance(state, ch)
+        
+        assert matcher.match_state(state) == "bc"
+
+
+class TestSegmentedMatcher:
+    @pytest.mark.parametrize("name", sorted(MATCHERS))
+    def test_longest_trigger_across_segments(self, name):
+        matcher = SegmentedMatcher([create_matcher(name, ["st", "::ty"]), create_matcher(name, ["git::st"])])
+        
+        assert matcher.longest_suffix("run git::st") == "git::st"
+        assert matcher.longest_suffix("xst") == "st"
+        assert matcher.longest_suffix("git::s") is None
+        assert matcher.max_length == len("git::st")
+        assert matcher.trigger_count == 3
+    
+    def test_incremental_matches_one_shot(self):
+        matcher = SegmentedMatcher([AhoCorasickMatcher(["git::stash", "st"]), AhoCorasickMatcher(["git::st", "::ty"])])
+        text = "say ::ty then git::stash it"
+        
+        assert matcher.incremental
+        state = matcher.initial_state()
+        for i, ch in enumerate(text):
+            state = matcher.advance(state, ch)
+            assert matcher.match_state(state) == matcher.longest_suffix(text[:i + 1])
+    
+    def test_not_incremental_with_trie_segment(self):
+        matcher = SegmentedMatcher([AhoCorasickMatcher(["a"]), ReversedTrieMatcher(["b"])])
+        
+        assert not matcher.incremental
+
+
+class TestCreateMatcher:
+    def test_registry_names(self):
+        assert MATCHERS["trie"] is ReversedTrieMatcher
+        assert MATCHERS["aho-corasick"] is AhoCorasickMatcher
+    
+    def test_unknown_matcher(self):
+        with pytest.raises(ValueError):
+            create_matcher("regex", TRIGGERS)
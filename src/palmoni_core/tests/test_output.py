@@ -0,0 +1,241 @@
+import time
+import threading
+
+import pytest
+from unittest.mock import Mock, call, patch
+
+from palmoni_core.core.output import (
+    ClipboardError,
+    ExpansionJob,
+    InMemoryClipboard,
+    InjectionGuard,
+    OutputWorker,
+    PasteStrategy,
+    SystemClipboard,
+    TypingStrategy,
+    create_clipboard,
+)
+
+
+class TestOutputWorker:
+    def test_run_job_inline_records_metrics(self):
+        handled = []
+        worker = OutputWorker(handled.append)
+        
+        job = ExpansionJob("git::st", "git status")
+        worker.run_job(job)
+        
+        assert handled == [job]
+        stats = worker.stats()
+        assert stats["jobs_completed"] == 1
+        assert stats["max_injection_ms"] >= stats["last_injection_ms"] >= 0
+    
+    def test_worker_processes_submitted_jobs(self):
+        done = threading.Event()
+        handled = []
+        
+        def handler(job):
+            handled.append(job.trigger)
+            if len(handled) == 2:
+                done.set()
+        
+        worker = OutputWorker(handler)
+        worker.start()
+        try:
+            assert worker.running
+            worker.submit(ExpansionJob("a", "1"))
+            worker.submit(ExpansionJob("b", "2"))
+            assert done.wait(2)
+        finally:
+            worker.stop()
+        
+        assert handled == ["a", "b"]
+        assert not worker.running
+    
+    def test_restart_waits_for_slow_injection(self):
+        started = threading.Event()
+        release = threading.Event()
+        handled = []
+        
+        def handler(job):
+            started.set()
+            release.wait(2)
+            handled.append(job.trigger)
+        
+        worker = OutputWorker(handler)
+        worker.start()
+        worker.submit(ExpansionJob("a", "1"))
+        assert started.wait(2)
+        
+        worker.stop(timeout=0.05)
+        assert worker.running
+        
+        threading.Timer(0.1, release.set).start()
+        worker.start()
+        try:
+            threads = [thread for thread in threading.enumerate() if thread.name == "palmoni-output"]
+            assert len(threads) == 1
+            assert handled == ["a"]
+        finally:
+            worker.stop()
+        
+        assert not worker.running
+    
+    def test_drop_oldest_policy(self):
+        worker = OutputWorker(lambda job: None, max_queue_size=2, overflow_policy="drop_oldest")
+        
+        for trigger in ("a", "b", "c"):
+            assert worker.submit(ExpansionJob(trigger, trigger))
+        
+        assert worker.queue_depth == 2
+        assert worker.stats()["jobs_dropped"] == 1
+        assert [worker._queue.get_nowait().trigger for _ in range(2)] == ["b", "c"]
+    
+    def test_drop_newest_policy(self):
+        worker = OutputWorker(lambda job: None, max_queue_size=1, overflow_policy="drop_newest")
+        
+        assert worker.submit(ExpansionJob("a", "a"))
+        assert not worker.submit(ExpansionJob("b", "b"))
+        
+        assert worker.stats()["jobs_dropped"] == 1
+        assert worker._queue.get_nowait().trigger == "a"
+    
+    def test_stale_jobs_are_cancelled(self):
+        handled = []
+        worker = OutputWorker(handled.append, max_job_age=0.01)
+        worker.submit(ExpansionJob("old", "x", created_at=time.monotonic() - 1))
+        
+        worker.start()
+        worker.stop()
+        
+        assert handled == []
+        assert worker.stats()["jobs_cancelled"] == 1
+    
+    def test_cancel_pending(self):
+        worker = OutputWorker(lambda job: None)
+        worker.submit(ExpansionJob("a", "a"))
+        worker.submit(ExpansionJob("b", "b"))
+        
+        assert worker.cancel_pending() == 2
+        assert worker.queue_depth == 0
+    
+    def test_wait_idle(self):
+        handled = []
+        
+        def handler(job):
+            time.sleep(0.05)
+            handled.append(job.trigger)
+        
+        worker = OutputWorker(handler)
+        assert worker.wait_idle(timeout=0)
+        worker.submit(ExpansionJob("a", "a"))
+        assert not worker.wait_idle(timeout=0)
+        
+        worker.start()
+        try:
+            assert worker.wait_idle(timeout=2)
+        finally:
+            worker.stop()
+        
+        assert handled == ["a"]
+    
+    def test_handler_errors_are_counted(self):
+        def handler(job):
+            raise RuntimeError("boom")
+        
+        worker = OutputWorker(handler)
+        worker.run_job(ExpansionJob("a", "a"))
+        
+        assert worker.stats()["jobs_failed"] == 1
+        assert worker.stats()["jobs_completed"] == 0
+    
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            OutputWorker(lambda job: None, overflow_policy="block")
+
+
+class TestInjectionStrategies:
+    def test_typing_strategy(self):
+        controller = Mock()
+        TypingStrategy().inject(controller, "git status")
+        controller.type.assert_called_once_with("git status")
+    
+    def test_paste_strategy_sends_single_chord(self):
+        controller = Mock()
+        clipboard = InMemoryClipboard("previous")
+        strategy = PasteStrategy(clipboard, modifier="ctrl", restore_delay=0)
+        
+        seen = []
+        controller.press.side_effect = lambda key: seen.append(clipboard.read()) if key == "v" else None
+        
+        strategy.inject(controller, "class Test:\n    pass")
+        
+        assert controller.press.call_args_list == [call("ctrl"), call("v")]
+        assert controller.release.call_args_list == [call("v"), call("ctrl")]
+        assert not controller.type.called
+        assert seen == ["class Test:\n    pass"]
+        assert clipboard.read() == "previous"
+    
+    def test_paste_strategy_restores_clipboard_on_error(self):
+        controller = Mock()
+        controller.press.side_effect = [None, RuntimeError("no display")]
+        clipboard = InMemoryClipboard("previous")
+        strategy = PasteStrategy(clipboard, modifier="ctrl", restore_delay=0)
+        
+        with pytest.raises(RuntimeError):
+            strategy.inject(controller, "text")
+        
+        controller.release.assert_called_with("ctrl")
+        assert clipboard.read() == "previous"
+    
+    def test_paste_strategy_empty_clipboard(self):
+        clipboard = InMemoryClipboard()
+        PasteStrategy(clipboard, modifier="ctrl", restore_delay=0).inject(Mock(), "text")
+        assert clipboard.read() == ""
+    
+    def test_paste_strategy_failed_restore_does_not_raise(self):
+        controller = Mock()
+        clipboard = Mock()
+        clipboard.read.return_value = "previous"
+        clipboard.write.side_effect = [None, ClipboardError("clipboard gone")]
+        
+        PasteStrategy(clipboard, modifier="ctrl", restore_delay=0).inject(controller, "text")
+        
+        controller.press.assert_any_call("v")
+        assert clipboard.write.call_args_list == [call("text"), call("previous")]
+
+
+class TestClipboards:
+    def test_create_clipboard(self):
+        assert isinstance(create_clipboard("memory"), InMemoryClipboard)
+        assert isinstance(create_clipboard("system"), SystemClipboard)
+    
+    def test_create_unknown_clipboard(self):
+        with pytest.raises(ValueError):
+            create_clipboard("x11")
+    
+    def test_system_clipboard_without_tools(self):
+        clipboard = SystemClipboard()
+        
+        with patch.object(SystemClipboard, '_detect_commands', return_value=None):
+            with pytest.raises(ClipboardError):
+                clipboard.write("text")
+
+
+class TestInjectionGuard:
+    def test_active_inside_window(self):
+        guard = InjectionGuard(grace=0)
+        assert not guard.is_active()
+        
+        with guard:
+            assert guard.is_active()
+        
+        assert not guard.is_active()
+    
+    def test_grace_period(self):
+        guard = InjectionGuard(grace=60)
+        
+        with guard:
+            pass
+        
+        assert guard.is_active()
@@ -0,0 +1,180 @@
+import json
+import tempfile
+from pathlib import Path
+
+import duckdb
+import pytest
+
+from palmoni_core.core.packs import PackError, SnippetQuery, detect_format, export_pack, import_pack
+
+
+def write_csv(path: Path, rows) -> Path:
+    conn = duckdb.connect()
+    conn.execute("CREATE TABLE rows (trigger TEXT, expansion TEXT)")
+    conn.executemany("INSERT INTO rows VALUES (?, ?)", rows)
+    conn.execute(f"COPY rows TO '{path}' (FORMAT csv, HEADER)")
+    conn.close()
+    return path
+
+
+def read_snippets(path: Path):
+    conn = duckdb.connect(str(path), read_only=True)
+    try:
+        return conn.execute("SELECT trigger, expansion, category FROM snippets ORDER BY trigger").fetchall()
+    finally:
+        conn.close()
+
+
+class TestImportPack:
+    def test_creates_database_and_upserts(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database = Path(temp_dir) / "user" / "snippets.db"
+            first = write_csv(Path(temp_dir) / "first.csv", [("brb", "be right back"), ("git::st", "git status")])
+            second = write_csv(Path(temp_dir) / "second.csv", [("brb", "back in five"), ("lgtm", "looks good to me")])
+            
+            created = import_pack(database, first, category="chat")
+            merged = import_pack(database, second)
+            snippets = read_snippets(database)
+        
+        assert (created.rows, created.inserted, created.updated) == (2, 2, 0)
+        assert (merged.rows, merged.inserted, merged.updated) == (2, 1, 1)
+        assert snippets == [
+            ("brb", "back in five", ""),
+            ("git::st", "git status", "chat"),
+            ("lgtm", "looks good to me", ""),
+        ]
+    
+    def test_rejects_invalid_rows_without_writing(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database = Path(temp_dir) / "snippets.db"
+            import_pack(database, write_csv(Path(temp_dir) / "good.csv", [("brb", "be right back")]))
+            bad = write_csv(Path(temp_dir) / "bad.csv", [("x", "1"), ("x", "2"), ("y", ""), (None, "z"), ("ok", "fine")])
+            
+            with pytest.raises(PackError) as excinfo:
+                import_pack(database, bad)
+            snippets = read_snippets(database)
+        
+        message = str(excinfo.value)
+        assert "1 rows without a trigger" in message
+        assert "duplicate triggers: x" in message
+        assert "empty expansions: y" in message
+        assert snippets == [("brb", "be right back", "")]
+    
+    def test_json_and_dry_run(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database = Path(temp_dir) / "snippets.db"
+            source = Path(temp_dir) / "pack.json"
+            source.write_text(json.dumps([
+                {"trigger": "brb", "expansion": "be right back", "category": "chat"},
+                {"trigger": "ty", "expansion": "thank you"},
+            ]))
+            import_pack(database, write_csv(Path(temp_dir) / "seed.csv", [("brb", "old")]))
+            
+            report = import_pack(database, source, dry_run=True)
+            snippets = read_snippets(database)
+        
+        assert (report.rows, report.inserted, report.updated) == (2, 1, 1)
+        assert snippets == [("brb", "old", "")]
+    
+    def test_missing_columns(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = Path(temp_dir) / "pack.csv"
+            source.write_text("name,body\nbrb,be right back\n")
+            
+            with pytest.raises(PackError, match=r"missing column\(s\): expansion, trigger"):
+                import_pack(Path(temp_dir) / "snippets.db", source)
+    
+    def test_rejects_non_duckdb_target(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = write_csv(Path(temp_dir) / "pack.csv", [("brb", "be right back")])
+            
+            with pytest.raises(PackError, match="only DuckDB databases"):
+                import_pack(Path(temp_dir) / "snippets.json", source)
+    
+    def test_detect_format(self):
+        assert detect_format(Path("pack.ndjson")) == "json"
+        assert detect_format(Path("pack.txt"), "parquet") == "parquet"
+        with pytest.raises(ValueError, match="Cannot tell the format"):
+            detect_format(Path("pack.txt"))
+
+
+class TestExportPack:
+    def test_round_trip_through_parquet(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database = Path(temp_dir) / "snippets.db"
+            import_pack(database, write_csv(Path(temp_dir) / "pack.csv", [("brb", "be right back"), ("ty", "thank you")]))
+            exported = Path(temp_dir) / "out" / "pack.parquet"
+            
+            count = export_pack([database], exported)
+            copy = Path(temp_dir) / "copy.db"
+            import_pack(copy, exported)
+            
+            assert count == 2
+            assert read_snippets(copy) == read_snippets(database)
+    
+    def test_later_databases_take_precedence(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            bundled = Path(temp_dir) / "bundled.db"
+            user = Path(temp_dir) / "user.db"
+            import_pack(bundled, write_csv(Path(temp_dir) / "a.csv", [("brb", "be right back"), ("ty", "thank you")]), category="chat")
+            import_pack(user, write_csv(Path(temp_dir) / "b.csv", [("brb", "back in five")]), category="mine")
+            exported = Path(temp_dir) / "merged.csv"
+            
+            count = export_pack([bundled, user, Path(temp_dir) / "missing.db"], exported, category="chat")
+            lines = exported.read_text().splitlines()
+        
+        assert count == 1
+        assert lines == ["trigger,expansion,category", "ty,thank you,chat"]
+    
+    def test_merges_flat_file_source(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            bundled = Path(temp_dir) / "bundled.db"
+            user = Path(temp_dir) / "user.json"
+            import_pack(bundled, write_csv(Path(temp_dir) / "a.csv", [("brb", "be right back"), ("ty", "thank you")]))
+            user.write_text(json.dumps({"brb": "back in five"}), encoding="utf-8")
+            exported = Path(temp_dir) / "merged.csv"
+            
+            count = export_pack([bundled, user], exported)
+            lines = exported.read_text().splitlines()
+        
+        assert count == 2
+        assert lines == ["trigger,expansion,category", 'brb,back in five,""', 'ty,thank you,""']
+
+
+class TestSnippetQuery:
+    def create_layers(self, temp_dir: str):
+        bundled = Path(temp_dir) / "bundled.db"
+        user = Path(temp_dir) / "user.db"
+        rows = [("git::st", "git status"), ("git::co", "git checkout"), ("py::def", "def"), ("brb", "be right back")]
+        import_pack(bundled, write_csv(Path(temp_dir) / "a.csv", rows), category="bundled")
+        import_pack(user, write_csv(Path(temp_dir) / "b.csv", [("git::co", "git commit")]), category="mine")
+        return [bundled, user, Path(temp_dir) / "missing.db"]
+    
+    def test_merges_orders_and_pages(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with SnippetQuery(self.create_layers(temp_dir)) as query:
+                total = query.count()
+                batches = list(query.batches(limit=3, offset=1, batch_size=2))
+        
+        assert total == 4
+        assert batches == [
+            [("git::co", "git commit", "mine"), ("git::st", "git status", "bundled")],
+            [("py::def", "def", "bundled")],
+        ]
+    
+    def test_prefix_and_category_filters(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            files = self.create_layers(temp_dir)
+            with SnippetQuery(files, prefix="git::") as query:
+                by_prefix = [row[0] for rows in query.batches() for row in rows]
+            with SnippetQuery(files, category="bundled", prefix="git::") as query:
+                by_both = [row[0] for rows in query.batches() for row in rows]
+        
+        assert by_prefix == ["git::co", "git::st"]
+        assert by_both == ["git::st"]
+    
+    def test_no_sources(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with SnippetQuery([Path(temp_dir) / "missing.db"], prefix="x") as query:
+                assert query.count() == 0
+                assert list(query.batches()) == []
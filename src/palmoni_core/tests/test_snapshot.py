@@ -0,0 +1,41 @@
+import dataclasses
+
+import pytest
+
+from palmoni_core.core.snapshot import SnippetSnapshot
+
+
+class TestSnippetSnapshot:
+    def test_build(self):
+        snapshot = SnippetSnapshot.build(3, {"git::st": "git status"}, "aho-corasick")
+        
+        assert snapshot.version == 3
+        assert len(snapshot) == 1
+        assert snapshot.snippets["git::st"] == "git status"
+        assert snapshot.matcher.longest_suffix("run git::st") == "git::st"
+    
+    def test_snippets_are_read_only(self):
+        snapshot = SnippetSnapshot.build(1, {"git::st": "git status"}, "trie")
+        
+        with pytest.raises(TypeError):
+            snapshot.snippets["::ty"] = "Thank you"
+    
+    def test_snapshot_is_frozen(self):
+        snapshot = SnippetSnapshot.build(1, {}, "trie")
+        
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            snapshot.version = 2
+    
+    def test_snippets_are_not_copied(self):
+        snippets = {"git::st": "git status"}
+        snapshot = SnippetSnapshot.build(1, snippets, "trie")
+        
+        snippets["::ty"] = "Thank you"
+        
+        assert "::ty" in snapshot.snippets
+    
+    def test_from_columns(self):
+        snapshot = SnippetSnapshot.from_columns(1, ("git::st", "::ty"), ("git status", "Thank you"), "trie")
+        
+        assert dict(snapshot.snippets) == {"git::st": "git status", "::ty": "Thank you"}
+        assert snapshot.matcher.trigger_count == 2
@@ -0,0 +1,251 @@
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from types import MappingProxyType
+from unittest.mock import patch
+
+import duckdb
+import pytest
+
+from palmoni_core.core.config import PalmoniConfig
+from palmoni_core.core.database import SnippetDatabase
+from palmoni_core.core.expander import TextExpander
+from palmoni_core.core.sources import LayeredSnippets, SnippetSources, resolve_sources
+
+
+def create_database(path: Path, snippets) -> Path:
+    conn = duckdb.connect(str(path))
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS snippets (
+            trigger TEXT PRIMARY KEY,
+            expansion TEXT NOT NULL,
+            category TEXT DEFAULT '',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    for trigger, expansion in snippets:
+        conn.execute("INSERT OR REPLACE INTO snippets (trigger, expansion) VALUES (?, ?)", [trigger, expansion])
+    conn.close()
+    return path
+
+
+def create_layers(temp_dir: str, **overrides) -> PalmoniConfig:
+    root = Path(temp_dir)
+    bundled = create_database(root / "bundled.db", [("git::st", "git status"), ("brb", "be right back")])
+    pack = create_database(root / "team.db", [("brb", "back in five"), ("deploy", "make deploy")])
+    create_database(root / "snippets.db", [("deploy", "make deploy-staging")])
+    return PalmoniConfig(database_file=bundled, user_config_dir=root, snippet_packs=[pack], **overrides)
+
+
+class TestResolveSources:
+    def test_precedence_order(self):
+        config = PalmoniConfig(
+            database_file=Path("/app/snippets.db"),
+            user_config_dir=Path("/home/me/.config/palmoni"),
+            snippet_packs=[Path("/team/a.db"), Path("/team/b.db")]
+        )
+        
+        sources = resolve_sources(config)
+        
+        assert [source.name for source in sources] == ["bundled", "pack:a", "pack:b", "user"]
+        assert sources[-1].path == Path("/home/me/.config/palmoni/snippets.db")
+    
+    def test_duplicate_paths_load_once(self):
+        config = PalmoniConfig(
+            database_file=Path("/app/snippets.db"),
+            user_config_dir=Path("/app"),
+            snippet_packs=[Path("/app/snippets.db")]
+        )
+        
+        assert [source.name for source in resolve_sources(config)] == ["bundled"]
+
+
+class TestLayeredSnippets:
+    def test_later_layers_win(self):
+        snippets = LayeredSnippets([{"a": "1", "b": "2"}, {"b": "3", "c": "4"}])
+        
+        assert snippets["b"] == "3"
+        assert snippets["a"] == "1"
+        assert len(snippets) == 3
+        assert sorted(snippets) == ["a", "b", "c"]
+        assert "c" in snippets and "d" not in snippets
+        assert dict(snippets.items()) == {"a": "1", "b": "3", "c": "4"}
+
+
+class TestSnippetSources:
+    def test_merges_sources_by_precedence(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sources = SnippetSources(create_layers(temp_dir))
+            sources.load()
+            snapshot = sources.snapshot(1)
+            sources.close()
+        
+        assert dict(snapshot.snippets.items()) == {
+            "git::st": "git status",
+            "brb": "back in five",
+            "deploy": "make deploy-staging",
+        }
+        assert snapshot.matcher.longest_suffix("now deploy") == "deploy"
+        assert [source["status"] for source in sources.stats()] == ["loaded", "loaded", "loaded"]
+    
+    def test_sources_are_cached_independently(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = create_layers(temp_dir)
+            first = SnippetSources(config)
+            first.load()
+            
+            second = SnippetSources(config)
+            second.load()
+            
+            cache_files = list((Path(temp_dir) / "cache").glob("snapshot-*.bin"))
+            opened = [second.database(source).connections_opened for source in second.sources]
+        
+        assert len(cache_files) == 3
+        assert [source["status"] for source in second.stats()] == ["cached", "cached", "cached"]
+        assert opened == [0, 0, 0]
+    
+    def test_changing_snippet_store_rebuilds_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            compact = SnippetSources(create_layers(temp_dir, snippet_store="compact"))
+            compact.load()
+            
+            as_dict = SnippetSources(create_layers(temp_dir, snippet_store="dict"))
+            as_dict.load()
+            cached = SnippetSources(create_layers(temp_dir, snippet_store="dict"))
+            cached.load()
+        
+        assert [source["status"] for source in as_dict.stats()] == ["loaded", "loaded", "loaded"]
+        assert [source["status"] for source in cached.stats()] == ["cached", "cached", "cached"]
+        assert all(isinstance(segment.snapshot.snippets, MappingProxyType) for segment in cached.segments.values())
+    
+    def test_missing_and_broken_sources_are_left_out(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = create_layers(temp_dir, snapshot_cache=False)
+            broken = Path(temp_dir) / "broken.db"
+            broken.write_text("not a database")
+            config.snippet_packs.append(broken)
+            (Path(temp_dir) / "snippets.db").unlink()
+            
+            sources = SnippetSources(config)
+            sources.load()
+            snapshot = sources.snapshot(1)
+        
+        statuses = {source["name"]: source["status"] for source in sources.stats()}
+        assert statuses["user"] == "missing"
+        assert statuses["pack:broken"].startswith("error:")
+        assert snapshot.snippets["deploy"] == "make deploy"
+    
+    def test_storage_backend_only_applies_to_user_database(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = create_layers(temp_dir, storage_backend="sqlite", snapshot_cache=False)
+            user_db = Path(temp_dir) / "snippets.db"
+            user_db.unlink()
+            conn = sqlite3.connect(str(user_db))
+            conn.execute("CREATE TABLE snippets (trigger TEXT PRIMARY KEY, expansion TEXT NOT NULL, category TEXT DEFAULT '')")
+            conn.execute("INSERT INTO snippets (trigger, expansion) VALUES ('ty', 'thank you')")
+            conn.commit()
+            conn.close()
+            
+            sources = SnippetSources(config)
+            sources.load()
+            snapshot = sources.snapshot(1)
+            sources.close()
+        
+        assert [source["status"] for source in sources.stats()] == ["loaded", "loaded", "loaded"]
+        assert dict(snapshot.snippets.items()) == {
+            "git::st": "git status",
+            "brb": "back in five",
+            "deploy": "make deploy",
+            "ty": "thank you",
+        }
+    
+    def test_single_source_is_used_directly(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = PalmoniConfig(
+                database_file=create_database(Path(temp_dir) / "bundled.db", [("brb", "be right back")]),
+                user_config_dir=Path(temp_dir)
+            )
+            sources = SnippetSources(config)
+            sources.load()
+            
+            snapshot = sources.snapshot(3)
+        
+        assert snapshot.version == 3
+        assert snapshot.matcher is sources.segments[sources.bundled].snapshot.matcher
+    
+    
+    def test_compact_store_loads_duckdb_through_arrow(self):
+        pytest.importorskip("pyarrow")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = create_layers(temp_dir, snippet_store="compact")
+            
+            with patch.object(SnippetDatabase, "load_columns", side_effect=AssertionError("not via Arrow")):
+                sources = SnippetSources(config)
+                sources.load()
+                cached = SnippetSources(config)
+                cached.load()
+            
+            snapshot = cached.snapshot(1)
+        
+        assert [segment.cached for segment in cached.segments.values()] == [True, True, True]
+        assert dict(snapshot.snippets) == {"git::st": "git status", "brb": "back in five", "deploy": "make deploy-staging"}
+    
+    def test_parquet_pack_glob(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pack_dir = Path(temp_dir) / "packs"
+            pack_dir.mkdir()
+            conn = duckdb.connect()
+            conn.execute(f"COPY (SELECT 'brb' AS trigger, 'parquet brb' AS expansion, 1 AS extra) TO '{pack_dir / 'a.parquet'}' (FORMAT parquet)")
+            config = create_layers(temp_dir, snippet_store="compact")
+            config.snippet_packs = [pack_dir / "*.parquet"]
+            
+            sources = SnippetSources(config)
+            sources.load()
+            assert sources.snapshot(1).snippets["brb"] == "parquet brb"
+            assert sources.changed() == []
+            
+            conn.execute(f"COPY (SELECT 'ty' AS trigger, 'thank you' AS expansion) TO '{pack_dir / 'b.parquet'}' (FORMAT parquet)")
+            conn.close()
+            changed = sources.changed()
+            sources.load(changed)
+            snapshot = sources.snapshot(2)
+        
+        assert [source.name for source in changed] == ["pack:packs"]
+        assert snapshot.snippets["ty"] == "thank you"
+        assert snapshot.matcher.longest_suffix("so ty") == "ty"
+
+
+class TestLayeredExpander:
+    def test_reload_rebuilds_only_changed_source(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = create_layers(temp_dir, watch_snippets=False)
+            expander = TextExpander(config)
+            segments = dict(expander.sources.segments)
+            
+            pack = config.snippet_packs[0]
+            create_database(pack, [("lgtm", "looks good to me")])
+            stat = pack.stat()
+            os.utime(pack, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            
+            with patch.object(expander.sources, "_load_segment", wraps=expander.sources._load_segment) as load:
+                assert expander.reload_snippets()
+            
+            reloaded = [call.args[0].name for call in load.call_args_list]
+            unchanged = [source for source in expander.sources.sources if source.name != "pack:team"]
+            
+            assert reloaded == ["pack:team"]
+            assert all(expander.sources.segments[source] is segments[source] for source in unchanged)
+            assert expander.snippets["lgtm"] == "looks good to me"
+            assert expander.matcher.longest_suffix("so lgtm") == "lgtm"
+            expander.stop()
+    
+    def test_lazy_expansions_resolve_through_layers(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = create_layers(temp_dir, expansion_loading="lazy", watch_snippets=False)
+            expander = TextExpander(config)
+            
+            assert expander.snippets["brb"] == "back in five"
+            assert expander.snippets.lazy
+            assert len(expander.get_snippet_sources()) == 3
+            expander.stop()
@@ -0,0 +1,83 @@
+import pytest
+
+from palmoni_core.core.store import CompactSnippetStore, create_snippet_store
+
+SNIPPETS = {
+    "git::st": "git status",
+    "::ty": "Thank you",
+    "::thx": "Thank you",
+    "::café": "Café au lait",
+    "py::main": "if __name__ == '__main__':\n    main()\n" * 20,
+}
+
+
+class TestCompactSnippetStore:
+    def test_matches_dict(self):
+        store = CompactSnippetStore.build(list(SNIPPETS), list(SNIPPETS.values()))
+        
+        assert dict(store) == SNIPPETS
+        assert len(store) == len(SNIPPETS)
+        assert "::café" in store
+        assert "missing" not in store
+        assert 42 not in store
+        with pytest.raises(KeyError):
+            store["missing"]
+    
+    def test_identical_expansions_are_stored_once(self):
+        store = CompactSnippetStore.build(list(SNIPPETS), list(SNIPPETS.values()))
+        
+        assert store.distinct_expansions == len(SNIPPETS) - 1
+    
+    def test_large_bodies_are_compressed(self):
+        plain = CompactSnippetStore.build(list(SNIPPETS), list(SNIPPETS.values()))
+        packed = CompactSnippetStore.build(list(SNIPPETS), list(SNIPPETS.values()), compress_threshold=100)
+        
+        assert packed.nbytes < plain.nbytes
+        assert packed["py::main"] == SNIPPETS["py::main"]
+        assert packed["git::st"] == "git status"
+    
+    def test_later_duplicate_trigger_wins(self):
+        store = CompactSnippetStore.build(["a", "b", "a"], ["1", "2", "3"])
+        
+        assert dict(store) == {"a": "3", "b": "2"}
+    
+    def test_empty(self):
+        store = CompactSnippetStore.build([], [])
+        
+        assert len(store) == 0
+        assert "a" not in store
+    
+    def test_from_arrow_matches_build(self):
+        pa = pytest.importorskip("pyarrow")
+        triggers = sorted(SNIPPETS, key=lambda trigger: trigger.encode("utf-8"))
+        table = pa.table({"trigger": triggers, "expansion": [SNIPPETS[trigger] for trigger in triggers]})
+        
+        store = CompactSnippetStore.from_arrow(table.column("trigger"), table.column("expansion"))
+        
+        assert dict(store) == SNIPPETS
+        assert store["::café"] == "Café au lait"
+        assert "missing" not in store
+        assert len(store) == len(SNIPPETS)
+    
+    def test_from_arrow_slices_and_large_strings(self):
+        pa = pytest.importorskip("pyarrow")
+        triggers = pa.array(["x", "a", "b"], type=pa.large_string())[1:]
+        expansions = pa.array(["-", "1", "2"])[1:]
+        
+        store = CompactSnippetStore.from_arrow(triggers, expansions)
+        
+        assert dict(store) == {"a": "1", "b": "2"}
+
+
+class TestCreateSnippetStore:
+    @pytest.mark.parametrize("name", ["dict", "compact"])
+    def test_create(self, name):
+        store = create_snippet_store(name, list(SNIPPETS), list(SNIPPETS.values()))
+        
+        assert dict(store) == SNIPPETS
+        with pytest.raises(TypeError):
+            store["new"] = "value"
+    
+    def test_unknown_store(self):
+        with pytest.raises(ValueError, match="Unknown snippet store"):
+            create_snippet_store("btree", [], [])
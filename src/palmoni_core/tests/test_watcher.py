@@ -0,0 +1,80 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from palmoni_core.core.watcher import SnippetWatcher
+
+
+class TestSnippetWatcher:
+    def test_change_triggers_callback(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "snippets.db"
+            db_path.write_text("v1")
+            changed = threading.Event()
+            
+            watcher = SnippetWatcher([db_path], changed.set, debounce=0.05)
+            watcher.start()
+            try:
+                db_path.write_text("v2")
+                assert changed.wait(5)
+            finally:
+                watcher.stop()
+    
+    def test_atomic_replace_triggers_callback(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "snippets.db"
+            db_path.write_text("v1")
+            changed = threading.Event()
+            
+            watcher = SnippetWatcher([db_path], changed.set, debounce=0.05)
+            watcher.start()
+            try:
+                tmp_path = Path(temp_dir) / "snippets.db.tmp"
+                tmp_path.write_text("v2")
+                os.replace(tmp_path, db_path)
+                assert changed.wait(5)
+            finally:
+                watcher.stop()
+    
+    def test_unrelated_files_are_ignored(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "snippets.db"
+            db_path.write_text("v1")
+            changed = threading.Event()
+            
+            watcher = SnippetWatcher([db_path], changed.set, debounce=0.05)
+            watcher.start()
+            try:
+                (Path(temp_dir) / "other.txt").write_text("x")
+                assert not changed.wait(0.5)
+            finally:
+                watcher.stop()
+    
+    def test_burst_is_debounced(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "snippets.db"
+            calls = []
+            
+            watcher = SnippetWatcher([db_path], lambda: calls.append(1), debounce=0.2)
+            for _ in range(5):
+                watcher._schedule()
+            
+            threading.Event().wait(0.5)
+            watcher.stop()
+            
+            assert calls == [1]
+    
+    def test_glob_matches_new_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            changed = threading.Event()
+            
+            watcher = SnippetWatcher([Path(temp_dir) / "*.parquet"], changed.set, debounce=0.05)
+            watcher.start()
+            try:
+                (Path(temp_dir) / "notes.txt").write_text("x")
+                assert not changed.wait(0.3)
+                (Path(temp_dir) / "team.parquet").write_text("x")
+                assert changed.wait(5)
+            finally:
+                watcher.stop()